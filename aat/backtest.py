@@ -45,7 +45,7 @@ class Backtest(StreamingDataSource):
     def close(self) -> None:
         pass
 
-    def seqnum(self, num: int) -> None:
+    def seqnum(self, num: int, instrument=None, checkpoint: bool = False) -> None:
         pass
 
     def tickToData(self, tick: str) -> None:
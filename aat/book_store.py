@@ -0,0 +1,130 @@
+import os
+import struct
+import time
+from typing import Dict
+from .enums import ExchangeType, ExchangeType_to_string, Side
+from .exceptions import AATException
+from .logging import log
+from .order_book import Book, L3Book, OrderBook
+from .structs import Instrument
+
+_MAGIC = b'AATB'
+_VERSION = 1
+
+# magic, version, flags, sequence, written at, tick size, lot size, bids, asks
+_HEADER = struct.Struct('<4sHHqddd II')
+_LEVEL = struct.Struct('<qq')  # ticks, lots
+_ORDER = struct.Struct('<qqH')  # ticks, lots, order_id length
+
+_FLAG_ORDERS = 1
+
+
+def dump_book(book: Book) -> bytes:
+    '''binary snapshot of a book: its levels (or its orders, for an
+    L3Book) in integer ticks and lots, with its last sequence number'''
+    orders = isinstance(book, L3Book)
+    sides = []
+    for side in (Side.BUY, Side.SELL):
+        if orders:
+            # queue order within a level is time priority, keep it
+            queues = book._queues[side]
+            sides.append([(price, lots, order_id) for price, _ in book.side(side) for order_id, lots in queues[price].items()])
+        else:
+            sides.append(list(book.side(side)))
+
+    parts = [_HEADER.pack(_MAGIC, _VERSION, _FLAG_ORDERS if orders else 0, book.sequence, time.time(),
+                          book._tick_size, book._lot_size, len(sides[0]), len(sides[1]))]
+    for entries in sides:
+        for entry in entries:
+            if orders:
+                order_id = entry[2].encode()
+                parts.append(_ORDER.pack(entry[0], entry[1], len(order_id)))
+                parts.append(order_id)
+            else:
+                parts.append(_LEVEL.pack(*entry))
+    return b''.join(parts)
+
+
+def written_at(data: bytes) -> float:
+    '''time a snapshot from `dump_book` was written'''
+    return _HEADER.unpack_from(data)[4]
+
+
+def load_book(book: Book, data: bytes) -> float:
+    '''load a snapshot from `dump_book` into a book, returning the time
+    it was written'''
+    magic, version, flags, sequence, written, tick_size, lot_size, nbids, nasks = _HEADER.unpack_from(data)
+    if magic != _MAGIC or version != _VERSION:
+        raise AATException('Not a book snapshot!')
+
+    offset = _HEADER.size
+    sides = []
+    for count in (nbids, nasks):
+        entries = []
+        for _ in range(count):
+            if flags & _FLAG_ORDERS:
+                price, lots, length = _ORDER.unpack_from(data, offset)
+                offset += _ORDER.size
+                order_id = data[offset:offset + length].decode()
+                offset += length
+                entries.append((price * tick_size, lots * lot_size, order_id))
+            else:
+                price, lots = _LEVEL.unpack_from(data, offset)
+                offset += _LEVEL.size
+                entries.append((price * tick_size, lots * lot_size))
+        sides.append(entries)
+
+    book.load(sides[0], sides[1])
+    book.sequence = sequence
+    return written
+
+
+class BookStore(object):
+    '''order book snapshots on disk, one file per exchange and instrument'''
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def filename(self, exchange: ExchangeType, instrument: Instrument) -> str:
+        pair = instrument.underlying.value
+        return os.path.join(self.path, f'{ExchangeType_to_string(exchange)}-{pair[0].value}-{pair[1].value}.book')
+
+    def dump(self, exchange: ExchangeType, ob: OrderBook) -> Dict[str, bytes]:
+        '''serialize every book of an exchange. Must run where the books
+        are updated (the event loop), the result can be written anywhere'''
+        return {self.filename(exchange, instrument): dump_book(ob.book(instrument)) for instrument in ob.instruments()}
+
+    def write(self, snapshots: Dict[str, bytes]) -> None:
+        for filename, data in snapshots.items():
+            # write then rename, a crash never leaves a torn snapshot
+            tmp = filename + '.tmp'
+            with open(tmp, 'wb') as fp:
+                fp.write(data)
+            os.replace(tmp, filename)
+
+    def save(self, exchange: ExchangeType, ob: OrderBook) -> None:
+        self.write(self.dump(exchange, ob))
+
+    def load(self, exchange: ExchangeType, ob: OrderBook, max_age: float = None) -> Dict[Instrument, int]:
+        '''load an exchange's snapshots newer than `max_age` seconds, returns their sequence numbers'''
+        ret = {}
+        for instrument in ob.instruments():
+            filename = self.filename(exchange, instrument)
+            if not os.path.exists(filename):
+                continue
+            with open(filename, 'rb') as fp:
+                data = fp.read()
+
+            try:
+                if max_age is not None and time.time() - written_at(data) > max_age:
+                    continue
+                book = ob.book(instrument)
+                load_book(book, data)
+            except (AATException, struct.error, UnicodeDecodeError) as e:
+                log.warning(f'Skipping book snapshot {filename}: {e}')
+                ob.book(instrument).load([], [])
+                continue
+
+            ret[instrument] = book.sequence
+        return ret
@@ -1,7 +1,22 @@
+import asyncio
+import inspect
+from functools import partial
+import time
 from abc import ABCMeta, abstractmethod
+from collections import OrderedDict
+from .enums import OverflowPolicy
 from .structs import MarketData, TradeResponse
 from .logging import log
 
+# handlers whose updates a newer one for the same key replaces
+_CONFLATED = ('onTrade', 'onOpen', 'onCancel', 'onChange')
+
+# handlers taking lists of ticks, see `StreamingDataSource.registerCallback`
+_BATCHES = ('onTradeBatch', 'onOpenBatch', 'onFillBatch', 'onCancelBatch', 'onChangeBatch')
+
+# never dropped or replaced
+_FILLS = ('onFill', 'onFillBatch')
+
 
 class Callback(metaclass=ABCMeta):
     '''callback interface'''
@@ -127,3 +142,137 @@ class Print(Callback):
 
     def onContinue(self, data) -> None:
         log.info('Continue')
+
+
+class QueuedCallback(Callback):
+    '''runs a callback from its own task, fed through a bounded queue'''
+
+    def __init__(self, callback: Callback, maxsize: int = 1000, policy: OverflowPolicy = OverflowPolicy.BLOCK) -> None:
+        self._callback = callback
+        self._maxsize = maxsize
+        self._policy = policy
+        self._queue = OrderedDict()  # key -> (handler, data, time queued)
+        self._count = 0  # keys for what isn't conflated
+        self._task = None
+        self._ready = None  # asyncio.Event, set when the queue has items
+        self._space = None  # asyncio.Event, set when the queue has room
+
+        # metrics
+        self.delivered = 0
+        self.dropped = 0
+        self.max_depth = 0
+        self.lag = 0.0  # seconds the last callback waited in the queue
+        self.max_lag = 0.0
+
+        for handler in _BATCHES:
+            if getattr(callback, handler, None):
+                setattr(self, handler, partial(self._put, handler))
+        # see TradingStrategy.declines
+        self.declines = getattr(callback, 'declines', frozenset())
+
+    def _put(self, handler: str, data) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.delivered += 1
+            getattr(self._callback, handler)(data)
+            return
+
+        if self._task is None:
+            self._ready = asyncio.Event()
+            self._space = asyncio.Event()
+            self._task = loop.create_task(self._consume())
+
+        if self._policy == OverflowPolicy.CONFLATE and handler in _CONFLATED:
+            key = (data.instrument, data.exchange, data.type)
+            if key in self._queue:
+                self.dropped += 1
+        else:
+            key = self._count
+            self._count += 1
+
+        if key not in self._queue and len(self._queue) >= self._maxsize and self._policy != OverflowPolicy.BLOCK:
+            self._drop()
+
+        self._queue[key] = (handler, data, time.monotonic())
+        self.max_depth = max(self.max_depth, len(self._queue))
+        self._ready.set()
+
+    def _drop(self) -> None:
+        for key, (handler, _, _) in self._queue.items():
+            if handler not in _FILLS:
+                del self._queue[key]
+                self.dropped += 1
+                return
+
+    async def _consume(self) -> None:
+        while True:
+            await self._ready.wait()
+            while self._queue:
+                handler, data, queued = self._queue.pop(next(iter(self._queue)))
+                self._space.set()
+                self.lag = time.monotonic() - queued
+                self.max_lag = max(self.max_lag, self.lag)
+                self.delivered += 1
+                try:
+                    ret = getattr(self._callback, handler)(data)
+                    if inspect.isawaitable(ret):
+                        await ret
+                except Exception as e:
+                    log.error(f'Queued callback {self._callback}.{handler} failed on {data}: {e}')
+            self._ready.clear()
+
+    async def backpressure(self) -> None:
+        '''wait while a BLOCK queue is full. Feed handlers await this
+        between messages'''
+        while self._policy == OverflowPolicy.BLOCK and self._task is not None and len(self._queue) >= self._maxsize:
+            self._space.clear()
+            await self._space.wait()
+
+    def metrics(self) -> dict:
+        return {'depth': len(self._queue),
+                'max_depth': self.max_depth,
+                'delivered': self.delivered,
+                'dropped': self.dropped,
+                'lag': self.lag,
+                'max_lag': self.max_lag}
+
+    def onTrade(self, data: MarketData) -> None:
+        self._put('onTrade', data)
+
+    def onOpen(self, data: MarketData) -> None:
+        self._put('onOpen', data)
+
+    def onFill(self, resp: TradeResponse) -> None:
+        self._put('onFill', resp)
+
+    def onCancel(self, data: MarketData) -> None:
+        self._put('onCancel', data)
+
+    def onChange(self, data: MarketData) -> None:
+        self._put('onChange', data)
+
+    def onError(self, data: MarketData) -> None:
+        self._put('onError', data)
+
+    def onStart(self) -> None:
+        return self._callback.onStart()
+
+    def onExit(self) -> None:
+        return self._callback.onExit()
+
+    def onAnalyze(self, engine) -> None:
+        return self._callback.onAnalyze(engine)
+
+    def onHalt(self, data) -> None:
+        return self._callback.onHalt(data)
+
+    def onContinue(self, data) -> None:
+        return self._callback.onContinue(data)
+
+
+class ConflatingCallback(QueuedCallback):
+    '''queued callback keeping only the latest market data per instrument, exchange and TickType'''
+
+    def __init__(self, callback: Callback, maxsize: int = 1000) -> None:
+        super(ConflatingCallback, self).__init__(callback, maxsize, OverflowPolicy.CONFLATE)
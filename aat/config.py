@@ -1,5 +1,5 @@
-from traitlets import HasTraits, List, Instance, Float, Type, Tuple, Dict, Bool
-from .enums import TradingType, ExchangeType, PairType, InstrumentType
+from traitlets import HasTraits, List, Instance, Float, Type, Tuple, Dict, Bool, Unicode, Int
+from .enums import TradingType, ExchangeType, PairType, InstrumentType, OverflowPolicy
 from .structs import Instrument
 
 
@@ -8,6 +8,14 @@ class ExchangeConfig(HasTraits):
     trading_type = Instance(klass=TradingType, args=('NONE',), kwargs={})
     currency_pairs = List(trait=Instance(PairType), default_value=[PairType.BTCUSD])
     instruments = List(trait=Instance(Instrument), default_value=[Instrument(type=InstrumentType.PAIR, underlying=PairType.BTCUSD)])
+    decoder = Unicode(default_value='auto')  # websocket JSON decoder: auto, orjson, ujson or json
+    batch_receive = Bool(default_value=False)  # dispatch frames buffered on the websocket together
+    max_batch = Int(default_value=1000)  # most frames dispatched together
+    dedup_size = Int(default_value=100000)  # recent trades remembered to drop repeats, 0 to turn off
+    dedup_window = Float(default_value=0.0)  # seconds trades are remembered, 0 for no limit
+    reconnect_delay = Float(default_value=0.5)  # seconds before the first reconnect, doubling after each failure
+    reconnect_max_delay = Float(default_value=30.0)  # most seconds between reconnects
+    stall_timeout = Float(default_value=30.0)  # seconds without a websocket message before reconnecting, 0 to turn off
 
 
 class SyntheticExchangeConfig(ExchangeConfig):
@@ -47,3 +55,10 @@ class TradingEngineConfig(HasTraits):
     risk_options = Instance(klass=RiskConfig, args=(), kwargs={})
     execution_options = Instance(klass=ExecutionConfig, args=(), kwargs={})
     strategy_options = List(trait=Instance(StrategyConfig), default_value=[])  # List of strategy options
+    book_snapshot_path = Unicode(default_value='')  # directory for order book snapshots, off if empty
+    order_books = Bool(default_value=False)  # keep live order books, also on if a strategy class sets order_books
+    book_snapshot_interval = Float(default_value=60.0)  # seconds between order book snapshots
+    resync_stagger = Float(default_value=0.5)  # seconds between order book resync requests
+    strategy_queue_size = Int(default_value=0)  # per strategy queue of callbacks, 0 to call them in the feed
+    overflow_policy = Instance(klass=OverflowPolicy, args=('BLOCK',), kwargs={})  # when a strategy queue is full
+    reorder_lateness = Float(default_value=0.0)  # seconds trades are held to merge feeds in timestamp order, 0 to turn off
@@ -51,6 +51,22 @@ class StreamingDataSource(DataSource):
                            TickType.ANALYZE: [],
                            TickType.HALT: [],
                            TickType.CONTINUE: []}
+        # callbacks taking a list of ticks, see Exchange.receiveBatch
+        self._batch_callbacks = {TickType.TRADE: [],
+                                 TickType.OPEN: [],
+                                 TickType.FILL: [],
+                                 TickType.CANCEL: [],
+                                 TickType.CHANGE: []}
+        self._subscribed = None  # TickTypes with callbacks, see MarketData.subscribed
+        self._backpressure = []  # coroutine functions the feed awaits between messages
+
+    def _register(self, field: TickType, callback) -> None:
+        self._callbacks[field].append(callback)
+        self._subscribed = None
+
+    def _registerBatch(self, field: TickType, callback) -> None:
+        self._batch_callbacks[field].append(callback)
+        self._subscribed = None
 
     @abstractmethod
     async def run(self, engine) -> None:
@@ -61,7 +77,7 @@ class StreamingDataSource(DataSource):
         '''close the websocket'''
 
     @abstractmethod
-    def seqnum(self, number: int):
+    def seqnum(self, number: int, instrument=None, checkpoint: bool = False):
         '''manage sequence numbers'''
 
     @abstractmethod
@@ -72,44 +88,69 @@ class StreamingDataSource(DataSource):
         for cb in self._callbacks[field]:
             cb(data, *args, **kwargs)
 
+        # one at a time, batch callbacks get batches of one
+        if field in self._batch_callbacks:
+            for cb in self._batch_callbacks[field]:
+                cb([data])
+
+    def callbackBatch(self, field: TickType, data: list) -> None:
+        for cb in self._batch_callbacks[field]:
+            cb(data)
+
     # Data functions
     @abstractmethod
     def tickToData(self, jsn):
         '''convert json to market data based on fields'''
 
     def onTrade(self, callback: Callback) -> None:
-        self._callbacks[TickType.TRADE].append(callback)
+        self._register(TickType.TRADE, callback)
 
     def onOpen(self, callback: Callback) -> None:
-        self._callbacks[TickType.OPEN].append(callback)
+        self._register(TickType.OPEN, callback)
 
     def onFill(self, callback: Callback) -> None:
-        self._callbacks[TickType.FILL].append(callback)
+        self._register(TickType.FILL, callback)
 
     def onCancel(self, callback: Callback) -> None:
-        self._callbacks[TickType.CANCEL].append(callback)
+        self._register(TickType.CANCEL, callback)
 
     def onChange(self, callback: Callback) -> None:
-        self._callbacks[TickType.CHANGE].append(callback)
+        self._register(TickType.CHANGE, callback)
+
+    def onTradeBatch(self, callback) -> None:
+        self._registerBatch(TickType.TRADE, callback)
+
+    def onOpenBatch(self, callback) -> None:
+        self._registerBatch(TickType.OPEN, callback)
+
+    def onFillBatch(self, callback) -> None:
+        self._registerBatch(TickType.FILL, callback)
+
+    def onCancelBatch(self, callback) -> None:
+        self._registerBatch(TickType.CANCEL, callback)
+
+    def onChangeBatch(self, callback) -> None:
+        self._registerBatch(TickType.CHANGE, callback)
 
     def onError(self, callback: Callback) -> None:
-        self._callbacks[TickType.ERROR].append(callback)
+        self._register(TickType.ERROR, callback)
 
     def onExit(self, callback: Callback) -> None:
-        self._callbacks[TickType.EXIT].append(callback)
+        self._register(TickType.EXIT, callback)
 
     def onAnalyze(self, callback: Callback) -> None:
-        self._callbacks[TickType.ANALYZE].append(callback)
+        self._register(TickType.ANALYZE, callback)
 
     def onHalt(self, callback: Callback) -> None:
-        self._callbacks[TickType.HALT].append(callback)
+        self._register(TickType.HALT, callback)
 
     def onContinue(self, callback: Callback) -> None:
-        self._callbacks[TickType.CONTINUE].append(callback)
+        self._register(TickType.CONTINUE, callback)
 
     def registerCallback(self, callback: Callback) -> None:
         if not isinstance(callback, Callback):
             raise CallbackException(f'{callback} is not an instance of class Callback')
+        declines = getattr(callback, 'declines', ())
         for att in ['onTrade',
                     'onOpen',
                     'onFill',
@@ -119,5 +160,16 @@ class StreamingDataSource(DataSource):
                     'onAnalyze',
                     'onHalt',
                     'onContinue']:
-            if hasattr(callback, att):
+            # declined or disabled (see Print) handlers are left out, so
+            # feeds don't subscribe to what no one consumes
+            if att in declines:
+                continue
+            if hasattr(self, att + 'Batch') and getattr(callback, att + 'Batch', None):
+                # opted in to lists of ticks instead
+                getattr(self, att + 'Batch')(getattr(callback, att + 'Batch'))
+            elif getattr(callback, att, None):
                 getattr(self, att)(getattr(callback, att))
+
+        if hasattr(callback, 'backpressure'):
+            # e.g. a QueuedCallback, lets the consumer hold up the feed
+            self._backpressure.append(callback.backpressure)
@@ -0,0 +1,53 @@
+import time
+from collections import OrderedDict
+from .structs import MarketData
+
+
+class Deduplicator(object):
+    '''drops repeats of recent trades, keyed by sequence number or trade id'''
+
+    def __init__(self, maxsize: int = 100000, window: float = 0.0) -> None:
+        self._maxsize = maxsize
+        self._window = window
+        self._seen = OrderedDict()  # key -> time first seen, oldest first
+
+        # metrics
+        self.duplicates = 0
+        self.evicted = 0
+
+    @staticmethod
+    def key(data: MarketData) -> tuple:
+        if data.sequence >= 0:
+            return data.exchange, data.instrument, data.sequence
+        if data.trade_id:
+            return data.exchange, data.instrument, data.trade_id
+        return None
+
+    def duplicate(self, data: MarketData) -> bool:
+        '''whether a trade has been seen already, remembering it if not'''
+        key = self.key(data)
+        if key is None:
+            return False
+        if key in self._seen:
+            self.duplicates += 1
+            return True
+
+        seen = self._seen
+        now = time.monotonic()
+        seen[key] = now
+        if len(seen) > self._maxsize:
+            seen.popitem(last=False)
+            self.evicted += 1
+        if self._window:
+            while seen and next(iter(seen.values())) < now - self._window:
+                seen.popitem(last=False)
+                self.evicted += 1
+        return False
+
+    def metrics(self) -> dict:
+        return {'duplicates': self.duplicates,
+                'evicted': self.evicted,
+                'size': len(self._seen)}
+
+    def __len__(self) -> int:
+        return len(self._seen)
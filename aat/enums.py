@@ -143,3 +143,14 @@ class RiskReason(BaseEnum):
     NONE = 'NONE'
     PARTIAL = 'PARTIAL'
     FULL = 'FULL'
+
+
+class ResyncState(BaseEnum):
+    SYNCING = 'SYNCING'
+    LIVE = 'LIVE'
+
+
+class OverflowPolicy(BaseEnum):
+    BLOCK = 'BLOCK'  # hold up the feed until the consumer catches up
+    DROP_OLDEST = 'DROP_OLDEST'  # drop the oldest market data
+    CONFLATE = 'CONFLATE'  # keep the latest per instrument, exchange and TickType
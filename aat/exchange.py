@@ -1,15 +1,28 @@
 import aiohttp
-import json
+import ccxt
+import time
+from collections import deque
 from datetime import datetime
 from functools import lru_cache
-from typing import List
+from typing import Dict, List, Tuple
 from .config import ExchangeConfig
+from .dedup import Deduplicator
 from .enums import PairType, CurrencyType, ExchangeType, ExchangeType_to_string, TickType
 from .market_data import MarketData
+from .order_book import OrderBook
 from .order_entry import OrderEntry
 from .structs import Account, Instrument
 from .exceptions import AATException
-from .utils import findpath
+from .logging import log
+from .utils import findpath, json_decoder
+
+
+def _buffered(ws) -> int:
+    '''frames received and not yet read on an aiohttp websocket'''
+    # no public API for this: aiohttp 3 (pinned in setup.py) keeps them in
+    # a deque on its reader, anything else counts as empty
+    buffer = getattr(getattr(ws, '_reader', None), '_buffer', None)
+    return len(buffer) if isinstance(buffer, deque) else 0
 
 
 class Exchange(MarketData, OrderEntry):
@@ -21,6 +34,10 @@ class Exchange(MarketData, OrderEntry):
         self._options = options
         self._exchange = exchange_type
         self._query_engine = query_engine
+        self._decode = json_decoder(options.decoder)
+
+        # drop repeated trades, e.g. replayed after a reconnect
+        self._dedup = Deduplicator(options.dedup_size, options.dedup_window) if options.dedup_size > 0 else None
 
     @lru_cache(None)
     def accounts(self):
@@ -70,10 +87,34 @@ class Exchange(MarketData, OrderEntry):
     def currencies(self) -> List[CurrencyType]:
         return [CurrencyType(x) for x in self.oe_client().fetch_curencies()]
 
+    @lru_cache(None)
+    def _markets(self) -> list:
+        return self.oe_client().fetch_markets()
+
     @lru_cache(None)
     def markets(self) -> List[Instrument]:
         # TODO derivatives
-        return [Instrument(underlying=PairType.from_string(m['symbol'])) for m in self.oe_client().fetch_markets()]
+        return [Instrument(underlying=PairType.from_string(m['symbol'])) for m in self._markets()]
+
+    @lru_cache(None)
+    def sizes(self) -> Dict[Instrument, Tuple[float, float]]:
+        '''(tick size, lot size) of each market, from its price and
+        amount precision'''
+        tick_mode = getattr(self.oe_client(), 'precisionMode', ccxt.DECIMAL_PLACES) == ccxt.TICK_SIZE
+        ret = {}
+        for m in self._markets():
+            precision = m.get('precision') or {}
+            if precision.get('price') is None or precision.get('amount') is None:
+                continue
+            try:
+                instrument = Instrument(underlying=PairType.from_string(m['symbol']))
+            except ValueError:
+                continue
+            if tick_mode:
+                ret[instrument] = (float(precision['price']), float(precision['amount']))
+            else:
+                ret[instrument] = (10.0 ** -precision['price'], 10.0 ** -precision['amount'])
+        return ret
 
     def ticker(self,
                instrument: Instrument = None,
@@ -125,27 +166,111 @@ class Exchange(MarketData, OrderEntry):
         df.sort_index(inplace=True)
         return df
 
-    def orderBook(self, level=1):
-        '''get order book'''
-        return self.oe_client().getProductOrderBook(level=level)
+    def orderBook(self, instrument: Instrument) -> dict:
+        '''get an order book snapshot, as {bids, asks, sequence}'''
+        book = self.oe_client().fetch_l2_order_book(str(instrument.underlying))
+        return {'bids': book['bids'],
+                'asks': book['asks'],
+                'sequence': book.get('nonce') if book.get('nonce') is not None else -1}
+
+    def book(self, instruments: List[Instrument]) -> OrderBook:
+        '''order book for this exchange's market data'''
+        return OrderBook(instruments, sizes=self.sizes())
+
+    def sequenced(self) -> bool:
+        '''whether market data has gapless sequence numbers, so the book
+        can be resynchronized from `orderBook` snapshots'''
+        return False
 
     async def receive(self) -> None:
+        if self.options().batch_receive:
+            await self.receiveBatch()
+            return
+
         async for msg in self.ws:
-            if msg.type == aiohttp.WSMsgType.TEXT:
-                self.callback_data(json.loads(msg.data))
+            self._last_message = time.monotonic()
+            if msg.type in (aiohttp.WSMsgType.TEXT, aiohttp.WSMsgType.BINARY):
+                self.callback_data(self._decode(msg.data))
             elif msg.type == aiohttp.WSMsgType.ERROR:
                 self.callback(TickType.ERROR, msg.data)
 
+            for wait in self._backpressure:
+                await wait()
+
+    async def receiveBatch(self) -> None:
+        '''receive, reading every frame already buffered on the websocket
+        (up to `max_batch`) after each wait and dispatching them together'''
+        max_batch = self.options().max_batch
+        if not isinstance(getattr(getattr(self.ws, '_reader', None), '_buffer', None), deque):
+            log.warning('Websocket buffer not readable with this aiohttp, receiving one frame at a time')
+        while True:
+            msgs = [await self.ws.receive()]
+            for _ in range(min(_buffered(self.ws), max_batch - 1)):
+                msgs.append(await self.ws.receive())
+            self._last_message = time.monotonic()
+
+            ticks = []
+            closed = False
+            for msg in msgs:
+                if msg.type in (aiohttp.WSMsgType.TEXT, aiohttp.WSMsgType.BINARY):
+                    ticks.append(self.toData(self._decode(msg.data)))
+                elif msg.type == aiohttp.WSMsgType.ERROR:
+                    self.callback(TickType.ERROR, msg.data)
+                elif msg.type in (aiohttp.WSMsgType.CLOSE, aiohttp.WSMsgType.CLOSING, aiohttp.WSMsgType.CLOSED):
+                    closed = True
+            self.dispatchBatch(ticks)
+
+            for wait in self._backpressure:
+                await wait()
+
+            if closed:
+                return
+
+    def toData(self, data):
+        '''convert a decoded message, or None to skip it'''
+        return self.tickToData(data)
+
     def callback_data(self, data) -> None:
-        res = self.tickToData(data)
-        if res is None:
-            return
+        self.dispatch(self.toData(data))
+
+    def dispatch(self, res) -> None:
+        '''send a converted tick to the books, then the callbacks'''
+        if res is not None and self._deliver(res):
+            self.callback(res.type, res)
 
-        if self._seqnum_enabled and res.type != TickType.HEARTBEAT:
-            self.seqnum(res.sequence)
+    def dispatchBatch(self, ticks: list) -> None:
+        '''dispatch ticks received together, each through the books and per
+        tick callbacks in turn, then a list per TickType to batch callbacks'''
+        batches = {}
+        for res in ticks:
+            if res is None or not self._deliver(res):
+                continue
+            for cb in self._callbacks[res.type]:
+                cb(res)
+            if res.type in self._batch_callbacks:
+                if res.type not in batches:
+                    batches[res.type] = []
+                batches[res.type].append(res)
+
+        for field, batch in batches.items():
+            self.callbackBatch(field, batch)
+
+    def _deliver(self, res) -> bool:
+        '''track the sequence and update the books, whether callbacks see it'''
+        if self._seqnum_enabled and res.sequence >= 0:
+            self.seqnum(res.sequence, res.instrument, res.checkpoint)
+
+        # books are current before strategies see the tick
+        for cb in self._book_callbacks:
+            cb(res)
 
         if not self._running:
             pass
 
-        if res.type != TickType.HEARTBEAT:
-            self.callback(res.type, res)
+        if res.type == TickType.TRADE and self._dedup is not None and self._dedup.duplicate(res):
+            return False
+
+        for cb in self._order_callbacks.get(res.type, ()):
+            cb(res)
+
+        return res.type != TickType.HEARTBEAT and res.type not in self.book_only
@@ -1,67 +1,148 @@
+import base64
+import hashlib
+import hmac
 import json
+import time
 from functools import lru_cache
 from datetime import datetime
-from ..enums import PairType, TickType, TickType_from_string
+from typing import List
+from ..enums import OrderType, PairType, Side, TickType
 from ..exchange import Exchange
-from ..structs import MarketData, Instrument
+from ..order_book import L3Book, OrderBook
+from ..structs import Instrument, LazyMarketData, MarketData
 from ..utils import parse_date, str_to_side, str_to_order_type
 
 
 class CoinbaseExchange(Exchange):
-    @lru_cache(None)
+    # done messages close orders on the book, ours also go to onOrderFill
+    book_only = frozenset({TickType.FILL})
+
     def subscription(self):
-        return [json.dumps({"type": "subscribe", "product_id": x.value[0].value + '-' + x.value[1].value}) for x in self.options().currency_pairs]
+        '''subscribe on the channels registered callbacks need, worked out on every connect'''
+        message = {"type": "subscribe",
+                   "product_ids": [x.value[0].value + '-' + x.value[1].value for x in self.options().currency_pairs],
+                   "channels": ['full', 'heartbeat']}
+        if not self._market_orders():
+            message['channels'] = ['matches', 'heartbeat']
+            auth = self._auth() if any(self._order_callbacks.values()) else {}
+            if auth:
+                message['channels'].append('user')
+                message.update(auth)
+        return [json.dumps(message)]
+
+    def _market_orders(self) -> bool:
+        '''whether callbacks need every order on the market'''
+        if self._book_callbacks or self._seqnum_enabled:
+            return True
+        return any(self._callbacks[field] or self._batch_callbacks.get(field) for field in (TickType.OPEN, TickType.CANCEL, TickType.CHANGE))
+
+    def _auth(self) -> dict:
+        '''signature for private channels, empty without API keys'''
+        try:
+            client = self.oe_client()
+        except KeyError:
+            return {}
+        if not client or not client.apiKey:
+            return {}
+        timestamp = str(time.time())
+        message = (timestamp + 'GET' + '/users/self/verify').encode()
+        signature = hmac.new(base64.b64decode(client.secret), message, hashlib.sha256)
+        return {'signature': base64.b64encode(signature.digest()).decode(),
+                'key': client.apiKey,
+                'passphrase': client.password,
+                'timestamp': timestamp}
 
     @lru_cache(None)
     def heartbeat(self):
-        return json.dumps({"type": "heartbeat", "on": True})
+        # subscribed as a channel
+        return ''
+
+    def book(self, instruments: List[Instrument]) -> OrderBook:
+        '''the full channel gives individual orders'''
+        return OrderBook(instruments, book=L3Book, sizes=self.sizes())
+
+    def sequenced(self) -> bool:
+        return True
+
+    def orderBook(self, instrument: Instrument) -> dict:
+        '''full (level 3) order book, so resting orders keep their ids'''
+        product_id = instrument.underlying.value[0].value + '-' + instrument.underlying.value[1].value
+        book = self.oe_client().publicGetProductsIdBook({'id': product_id, 'level': 3})
+        return {'bids': book['bids'],
+                'asks': book['asks'],
+                'sequence': int(book['sequence'])}
+
+    def toData(self, data) -> MarketData:
+        # skip messages nothing consumes, having only read their type
+        typ = self._tickType(data)
+        return self._convert(data, typ) if typ in self.subscribed() else None
+
+    def _tickType(self, jsn: dict) -> TickType:
+        typ = _TICK_TYPES.get(jsn.get('type', '').lower(), TickType.ERROR)
+        if typ in (TickType.OPEN, TickType.FILL, TickType.CHANGE, TickType.HEARTBEAT) and jsn.get('reason', '').upper() == 'CANCELED':
+            return TickType.CANCEL
+        return typ
 
     def tickToData(self, jsn: dict) -> MarketData:
         '''convert a jsn tick off the websocket to a MarketData struct'''
-        if jsn.get('type') == 'received':
-            return
-
-        s = jsn.get('type').upper()
-        reason = jsn.get('reason', '').upper()
-        if s == 'MATCH' or (s == 'DONE' and reason == 'FILLED'):
-            typ = TickType.TRADE
-        elif s in ('OPEN', 'DONE', 'CHANGE', 'HEARTBEAT'):
-            if reason == 'CANCELED':
-                typ = TickType.CANCEL
-            elif s == 'DONE':
-                typ = TickType.FILL
-            else:
-                typ = TickType_from_string(s.upper())
-        else:
-            typ = TickType.ERROR
-
-        order_id = jsn.get('order_id', jsn.get('maker_order_id', ''))
-        time = parse_date(jsn.get('time')) if jsn.get('time') else datetime.now()
-
-        if typ in (TickType.CANCEL, TickType.OPEN):
-            volume = float(jsn.get('remaining_size', 'nan'))
-        else:
-            volume = float(jsn.get('size', 'nan'))
-        price = float(jsn.get('price', 'nan'))
-
-        currency_pair = PairType.from_string(jsn.get('product_id')) if typ != TickType.ERROR else PairType.NONE
-
-        instrument = Instrument(underlying=currency_pair)
-
-        order_type = str_to_order_type(jsn.get('order_type', ''))
-        side = str_to_side(jsn.get('side', ''))
-        remaining_volume = float(jsn.get('remaining_size', 0.0))
-
-        sequence = int(jsn.get('sequence', -1))
-        ret = MarketData(order_id=order_id,
-                         time=time,
-                         volume=volume,
-                         price=price,
-                         type=typ,
-                         instrument=instrument,
-                         remaining=remaining_volume,
-                         side=side,
-                         exchange=self.exchange(),
-                         order_type=order_type,
-                         sequence=sequence)
-        return ret
+        return self._convert(jsn, self._tickType(jsn))
+
+    def _convert(self, jsn: dict, typ: TickType) -> MarketData:
+        if jsn.get('type') == 'heartbeat':
+            # heartbeat channel messages repeat the last sequence number
+            return CoinbaseMarketData(jsn, type=typ, exchange=self.exchange(), checkpoint=True)
+        return CoinbaseMarketData(jsn, type=typ, exchange=self.exchange())
+
+
+_TICK_TYPES = {'match': TickType.TRADE,
+               # nothing on the book yet, but sequenced like everything else
+               'received': TickType.HEARTBEAT,
+               'open': TickType.OPEN,
+               'done': TickType.FILL,
+               'change': TickType.CHANGE,
+               'heartbeat': TickType.HEARTBEAT}
+
+
+@lru_cache(None)
+def _instrument(product_id: str) -> Instrument:
+    return Instrument(underlying=PairType.from_string(product_id))
+
+
+class CoinbaseMarketData(LazyMarketData):
+    '''a coinbase websocket message, its fields converted when first read'''
+
+    def _parse_time(self) -> datetime:
+        return parse_date(self._jsn['time']) if self._jsn.get('time') else datetime.now()
+
+    def _parse_volume(self) -> float:
+        jsn = self._jsn
+        if self.type in (TickType.CANCEL, TickType.OPEN, TickType.FILL):
+            return float(jsn.get('remaining_size', 'nan'))
+        if self.type == TickType.CHANGE:
+            # size change of a resting order, volume is the amount removed
+            return float(jsn.get('old_size', 'nan')) - float(jsn.get('new_size', 'nan'))
+        return float(jsn.get('size', 'nan'))
+
+    def _parse_price(self) -> float:
+        return float(self._jsn.get('price', 'nan'))
+
+    def _parse_instrument(self) -> Instrument:
+        return _instrument(self._jsn.get('product_id')) if self.type != TickType.ERROR else Instrument(underlying=PairType.NONE)
+
+    def _parse_side(self) -> Side:
+        return str_to_side(self._jsn.get('side', ''))
+
+    def _parse_remaining(self) -> float:
+        return float(self._jsn.get('new_size', self._jsn.get('remaining_size', 0.0)))
+
+    def _parse_sequence(self) -> int:
+        return int(self._jsn.get('sequence', -1))
+
+    def _parse_order_type(self) -> OrderType:
+        return str_to_order_type(self._jsn.get('order_type', ''))
+
+    def _parse_order_id(self) -> str:
+        return self._jsn.get('order_id', self._jsn.get('maker_order_id', ''))
+
+    def _parse_trade_id(self) -> str:
+        return str(self._jsn.get('trade_id', ''))
@@ -7,10 +7,12 @@ import time
 from aiostream import stream
 from datetime import datetime
 from functools import lru_cache
+from typing import List
 from ..define import EXCHANGE_MARKET_DATA_ENDPOINT
 from ..enums import TickType, TickType_from_string, PairType
 from ..exchange import Exchange
 from ..logging import log
+from ..order_book import AbsoluteBook, OrderBook
 from ..structs import MarketData, Instrument
 from ..utils import str_to_side
 
@@ -24,9 +26,14 @@ class GeminiExchange(Exchange):
     def heartbeat(self):
         return ''
 
-    async def run(self, engine) -> None:
+    def book(self, instruments: List[Instrument]) -> OrderBook:
+        '''level updates give the new volume at the price'''
+        return OrderBook(instruments, book=AbsoluteBook, sizes=self.sizes())
+
+    async def connect(self, session: aiohttp.ClientSession) -> None:
+        '''one websocket per symbol, plus one for private events'''
         options = self.options()
-        # private events
+        # private events, signed with a fresh nonce on every connect
         gemini_api_key = self.oe_client().apiKey
         gemini_api_secret = self.oe_client().secret.encode()
 
@@ -35,16 +42,14 @@ class GeminiExchange(Exchange):
         b64 = base64.b64encode(encoded_payload)
         signature = hmac.new(gemini_api_secret, b64, hashlib.sha384).hexdigest()
 
-        session = aiohttp.ClientSession(headers={
+        self.ws = []
+        for x in self.subscription():
+            self.ws.append(await session.ws_connect(EXCHANGE_MARKET_DATA_ENDPOINT(self.exchange(), options.trading_type) % x))
+        private_events = await session.ws_connect("wss://api.gemini.com/v1/order/events", headers={
             'X-GEMINI-PAYLOAD': b64.decode(),
             'X-GEMINI-APIKEY': gemini_api_key,
             'X-GEMINI-SIGNATURE': signature
         })
-
-        # startup and redundancy
-        log.info('Starting....')
-        self.ws = [await session.ws_connect(EXCHANGE_MARKET_DATA_ENDPOINT(self.exchange(), options.trading_type) % x) for x in self.subscription()]
-        private_events = await session.ws_connect("wss://api.gemini.com/v1/order/events")
         self.ws.append(private_events)
 
         # set subscription for each ws
@@ -52,71 +57,101 @@ class GeminiExchange(Exchange):
             self.ws[i]._subscription = sub
             log.info(f'Sending Subscription {sub}')
 
-        log.info(f'Connected: {self.exchange()}')
-        log.info('')
-        log.critical(f'Starting algo trading: {self.exchange()}')
-        try:
-            while True:
-                await self.receive()
-
-        except KeyboardInterrupt:
-            log.critical('Terminating program')
-            engine.terminate()
-            return
+    async def close(self) -> None:
+        for ws in self.ws or []:
+            await ws.close()
 
     async def receive(self) -> None:
         '''gemini has its own receive method because it uses 1 connection per symbol instead of multiplexing'''
         async def get_data_sub_pair(ws, sub=None):
             async for ret in ws:
                 yield ret, sub
-
-        # add one for private stream
-        async for val in stream.merge(*[get_data_sub_pair(self.ws[i], sub) for i, sub in enumerate(self.subscription() + [None])]):
-            jsn = json.loads(val[0].data)
-
-            if isinstance(jsn, dict) and 'events' in jsn:
-                events = jsn.get('events', [])
-            elif not isinstance(jsn, list):
-                events = [jsn]
-            else:
-                events = jsn
-
-            if val[1]:
-                # data stream
-                pair = json.loads(val[1]).get('product_id')
-            else:
-                # private events
-                pair = None
-
-            for item in events:
-                if item.get('type', 'subscription_ack') in ('subscription_ack', 'heartbeat'):
-                    # can skip these
-                    continue
-                if item.get('type') == 'accepted':
-                    # can ignore these as well, will have a fill and/or booked
-                    # https://docs.gemini.com/websocket-api/#workflow
-                    continue
-                if item.get('type') == 'closed':
-                    # can ignore these as well, will have a fill or cancelled
-                    # https://docs.gemini.com/websocket-api/#workflow
-                    continue
-
-                if pair is None:
+            # closed
+            yield None, sub
+
+        # product of each data stream, looked up per message
+        products = {sub: json.loads(sub).get('product_id') for sub in self.subscription()}
+
+        # add one for private stream. Any socket closing ends the session,
+        # the others alone would keep it looking alive
+        merged = stream.merge(*[get_data_sub_pair(self.ws[i], sub) for i, sub in enumerate(self.subscription() + [None])])
+        async with merged.stream() as streamer:
+            async for val in streamer:
+                if val[0] is None:
+                    log.warning(f'{self.exchange()} websocket for {val[1] or "order events"} closed')
+                    return
+                self._last_message = time.monotonic()
+                jsn = self._decode(val[0].data)
+
+                if isinstance(jsn, dict) and 'events' in jsn:
+                    events = jsn.get('events', [])
+                    # market data events are timestamped by their update
+                    stamp = jsn.get('timestampms')
+                    if stamp is not None:
+                        for item in events:
+                            if 'timestampms' not in item:
+                                item['timestampms'] = stamp
+                elif not isinstance(jsn, list):
+                    events = [jsn]
+                else:
+                    events = jsn
+
+                if val[1]:
+                    # data stream
+                    pair = products[val[1]]
+                else:
                     # private events
-                    pair = item['symbol']
-
-                item['symbol'] = pair
-                res = self.tickToData(item)
-
-                if not self._running:
-                    pass
-
-                if res.type != TickType.HEARTBEAT:
-                    self.callback(res.type, res)
+                    pair = None
+
+                for item in events:
+                    if item.get('type', 'subscription_ack') in ('subscription_ack', 'heartbeat'):
+                        # can skip these
+                        continue
+                    if item.get('type') == 'accepted':
+                        # can ignore these as well, will have a fill and/or booked
+                        # https://docs.gemini.com/websocket-api/#workflow
+                        continue
+                    if item.get('type') == 'closed':
+                        # can ignore these as well, will have a fill or cancelled
+                        # https://docs.gemini.com/websocket-api/#workflow
+                        continue
+
+                    if pair is None:
+                        # private events
+                        pair = item['symbol']
+
+                    item['symbol'] = pair
+                    res = self.tickToData(item)
+
+                    if val[1]:
+                        # books are current before strategies see the tick,
+                        # private events are our own orders and stay out
+                        for cb in self._book_callbacks:
+                            cb(res)
+
+                    if not self._running:
+                        pass
+
+                    # our own order events are never repeats of each other
+                    if val[1] and res.type == TickType.TRADE and self._dedup is not None and self._dedup.duplicate(res):
+                        continue
+
+                    for cb in self._order_callbacks.get(res.type, ()):
+                        cb(res)
+
+                    if res.type != TickType.HEARTBEAT:
+                        self.callback(res.type, res)
+
+                for wait in self._backpressure:
+                    await wait()
 
     def tickToData(self, jsn: dict) -> MarketData:
         order_id = jsn.get('order_id', '') or str(jsn.get('tid', ''))
-        time = datetime.now()
+        # market trades carry tid, fills of our orders carry fill.trade_id
+        trade_id = str(jsn.get('tid', '') or (jsn.get('fill') or {}).get('trade_id', ''))
+        # exchange time as naive UTC, like the other feeds, so merged
+        # feeds can be put in timestamp order
+        time = datetime.utcfromtimestamp(jsn['timestampms'] / 1000.0) if jsn.get('timestampms') else datetime.utcnow()
         price = float(jsn.get('price', 'nan'))
         volume = float(jsn.get('amount', 0.0))
 
@@ -155,5 +190,6 @@ class GeminiExchange(Exchange):
                          remaining=remaining_volume,
                          side=side,
                          exchange=self.exchange(),
-                         sequence=sequence)
+                         sequence=sequence,
+                         trade_id=trade_id)
         return ret
@@ -2,12 +2,13 @@ from typing import List
 from .config import ExecutionConfig
 from .enums import Side, TradingType, TradeResult
 from .exchange import Exchange
+from .ledger import Ledger
 from .logging import log
-from .structs import TradeRequest, TradeResponse, Account
+from .structs import TradeRequest, TradeResponse
 
 
 class Execution(object):
-    def __init__(self, options: ExecutionConfig, exchanges: List[Exchange], accounts: List[Account]) -> None:
+    def __init__(self, options: ExecutionConfig, exchanges: List[Exchange], accounts: Ledger) -> None:
         self.trading_type = options.trading_type
         self.exchanges = exchanges
         self.accounts = accounts
@@ -94,6 +95,17 @@ class Execution(object):
     def cancel(self, resp: TradeResponse):  # TODO
         return self.exchanges[resp.exchange].cancel(resp)
 
-    def cancelAll(self):
-        for ex in self.exchanges.values():
-            ex.cancelAll()
+    def cancelAll(self, resps: List[TradeResponse] = None):
+        if resps is None:
+            for ex in self.exchanges.values():
+                ex.cancelAll()
+            return
+
+        # group by exchange so each exchange gets one bulk request
+        order_ids = {}
+        for resp in resps:
+            if resp.exchange not in order_ids:
+                order_ids[resp.exchange] = []
+            order_ids[resp.exchange].append(resp.order_id)
+        for exchange, ids in order_ids.items():
+            self.exchanges[exchange].cancelAll(ids)
@@ -0,0 +1,76 @@
+from bisect import bisect_left, bisect_right
+from typing import Iterator, Tuple
+
+
+class IntervalSet(object):
+    '''set of integers stored as sorted, disjoint half open ranges [start, end)'''
+
+    def __init__(self) -> None:
+        self._starts = []
+        self._ends = []
+        self._size = 0
+
+    def add(self, start: int, end: int) -> None:
+        '''add the numbers in [start, end)'''
+        if end <= start:
+            return
+        # ranges overlapping or touching [start, end) are merged into it
+        lo = bisect_left(self._ends, start)
+        hi = bisect_right(self._starts, end)
+        if lo < hi:
+            start = min(start, self._starts[lo])
+            end = max(end, self._ends[hi - 1])
+            self._size -= sum(e - s for s, e in zip(self._starts[lo:hi], self._ends[lo:hi]))
+        self._starts[lo:hi] = [start]
+        self._ends[lo:hi] = [end]
+        self._size += end - start
+
+    def _find(self, number: int) -> int:
+        i = bisect_right(self._starts, number) - 1
+        return i if i >= 0 and number < self._ends[i] else -1
+
+    def remove(self, number: int) -> bool:
+        '''remove a number, returning whether it was there'''
+        i = self._find(number)
+        if i < 0:
+            return False
+
+        start, end = self._starts[i], self._ends[i]
+        if start == number and end == number + 1:
+            del self._starts[i]
+            del self._ends[i]
+        elif start == number:
+            self._starts[i] = number + 1
+        elif end == number + 1:
+            self._ends[i] = number
+        else:
+            # split in two
+            self._ends[i] = number
+            self._starts.insert(i + 1, number + 1)
+            self._ends.insert(i + 1, end)
+        self._size -= 1
+        return True
+
+    def clear(self) -> None:
+        self._starts = []
+        self._ends = []
+        self._size = 0
+
+    def ranges(self) -> Iterator[Tuple[int, int]]:
+        '''the ranges as (start, end), ascending'''
+        return zip(self._starts, self._ends)
+
+    def __contains__(self, number: int) -> bool:
+        return self._find(number) >= 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __bool__(self) -> bool:
+        return bool(self._starts)
+
+    def __str__(self) -> str:
+        return '{' + ', '.join(f'{s}-{e - 1}' if e - s > 1 else str(s) for s, e in self.ranges()) + '}'
+
+    def __repr__(self) -> str:
+        return f'<IntervalSet {self}>'
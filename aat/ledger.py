@@ -0,0 +1,117 @@
+from types import MappingProxyType
+from typing import Iterable, Mapping
+from .enums import CurrencyType, ExchangeType
+from .structs import Account
+
+
+class Ledger(object):
+    '''accounts by (exchange, currency) with running totals, changed through `update` and `adjust`'''
+
+    def __init__(self, accounts: Iterable[Account] = None) -> None:
+        self._accounts = {}  # (exchange, currency) -> Account
+        self._by_exchange = {}  # exchange -> {currency: Account}
+        self._by_currency = {}  # currency -> {exchange: Account}
+
+        # running totals
+        self._balance_by_currency = {}
+        self._value_by_currency = {}
+        self._value_by_exchange = {}
+        self._value = 0.0
+
+        for account in accounts or []:
+            self.add(account)
+
+    def add(self, account: Account) -> None:
+        '''start tracking an account'''
+        key = (account.exchange, account.currency)
+        if key in self._accounts:
+            self.remove(account.exchange, account.currency)
+
+        self._accounts[key] = account
+
+        if account.exchange not in self._by_exchange:
+            self._by_exchange[account.exchange] = {}
+            self._value_by_exchange[account.exchange] = 0.0
+        self._by_exchange[account.exchange][account.currency] = account
+
+        if account.currency not in self._by_currency:
+            self._by_currency[account.currency] = {}
+            self._balance_by_currency[account.currency] = 0.0
+            self._value_by_currency[account.currency] = 0.0
+        self._by_currency[account.currency][account.exchange] = account
+
+        self._apply(account, account.balance, account.value)
+
+    def remove(self, exchange: ExchangeType, currency: CurrencyType) -> Account:
+        '''stop tracking an account and return it'''
+        account = self._accounts.pop((exchange, currency))
+        del self._by_exchange[exchange][currency]
+        del self._by_currency[currency][exchange]
+        self._apply(account, -account.balance, -account.value)
+        return account
+
+    def _apply(self, account: Account, balance: float, value: float) -> None:
+        self._balance_by_currency[account.currency] += balance
+        self._value_by_currency[account.currency] += value
+        self._value_by_exchange[account.exchange] += value
+        self._value += value
+
+    def get(self, exchange: ExchangeType, currency: CurrencyType) -> Account:
+        return self._accounts[(exchange, currency)]
+
+    def update(self, account: Account, balance: float = None, value: float = None) -> None:
+        '''set the balance and/or value of an account'''
+        balance = account.balance if balance is None else balance
+        value = account.value if value is None else value
+        self._apply(account, balance - account.balance, value - account.value)
+        account.balance = balance
+        account.value = value
+
+    def adjust(self, account: Account, balance: float) -> None:
+        '''change the balance of an account by `balance`'''
+        self.update(account, balance=account.balance + balance)
+
+    def by_exchange(self, exchange: ExchangeType) -> Mapping[CurrencyType, Account]:
+        return MappingProxyType(self._by_exchange.get(exchange, {}))
+
+    def by_currency(self, currency: CurrencyType) -> Mapping[ExchangeType, Account]:
+        return MappingProxyType(self._by_currency.get(currency, {}))
+
+    def balance(self, currency: CurrencyType) -> float:
+        '''total balance of a currency across exchanges'''
+        return self._balance_by_currency.get(currency, 0.0)
+
+    def value(self, currency: CurrencyType = None, exchange: ExchangeType = None) -> float:
+        '''total value of a currency, of an exchange, or of everything'''
+        if currency is not None and exchange is not None:
+            return self._accounts[(exchange, currency)].value if (exchange, currency) in self._accounts else 0.0
+        if currency is not None:
+            return self._value_by_currency.get(currency, 0.0)
+        if exchange is not None:
+            return self._value_by_exchange.get(exchange, 0.0)
+        return self._value
+
+    def keys(self):
+        return self._accounts.keys()
+
+    def values(self):
+        return self._accounts.values()
+
+    def items(self):
+        return self._accounts.items()
+
+    def __contains__(self, key) -> bool:
+        return key in self._accounts
+
+    def __getitem__(self, key) -> Account:
+        return self._accounts[key]
+
+    def __iter__(self):
+        # (exchange, currency) keys, like a dict
+        return iter(self._accounts)
+
+    def __len__(self) -> int:
+        return len(self._accounts)
+
+    def __repr__(self) -> str:
+        return f'<Ledger - {list(self._accounts.values())}>'
@@ -1,18 +1,68 @@
 import aiohttp
+import asyncio
+import random
+import time
 from abc import abstractmethod
 from .data_source import StreamingDataSource
 from .define import EXCHANGE_MARKET_DATA_ENDPOINT
+from .enums import TickType
+from .interval_set import IntervalSet
 from .structs import MarketData
 from .logging import log
 
 
+class _Sequence(object):
+    '''sequence numbers seen on one instrument'''
+
+    def __init__(self, last: int) -> None:
+        self.last = last
+        self.missing = IntervalSet()
+        self.behind = None  # last number of a run below `last`
+        self.run = 0
+
+        # metrics
+        self.gaps = 0
+        self.max_gap = 0
+        self.late = 0
+        self.duplicates = 0
+        self.resets = 0
+
+
 class MarketData(StreamingDataSource):
+    # TickTypes on the feed that only update order books: other
+    # participants' orders, only dispatched to our own order callbacks
+    book_only = frozenset()
+
+    # numbers below the last one that aren't missing are replays, until
+    # this many follow on from each other: then the feed started over
+    seqnum_reset_run = 5
+
     def __init__(self, *args, **kwargs) -> None:
         super(MarketData, self).__init__()
-        self._lastseqnum = -1
-        self._missingseqnum = set()  # type: set
+        self._sequences = {}  # instrument -> _Sequence
         self._seqnum_enabled = False
 
+        # order books, fed every tick before any other callback
+        self._book_callbacks = []
+
+        # our own orders' cancels and fills, see `onOrderCancel`
+        self._order_callbacks = {TickType.CANCEL: [], TickType.FILL: []}
+
+        # connection, see `run`
+        self.ws = None
+        self._last_message = 0.0  # monotonic time of the last websocket message
+        self._connected_at = 0.0
+        self._disconnected = None  # monotonic time the connection was lost
+
+        # metrics
+        self.connected = False
+        self.connects = 0
+        self.reconnects = 0
+        self.stalls = 0
+        self.errors = 0
+        self.recovery = 0.0  # seconds the last outage lasted
+        self.max_recovery = 0.0
+
     @abstractmethod
     def subscription(self):
         '''subscription for websocket'''
@@ -21,57 +71,213 @@ class MarketData(StreamingDataSource):
     def heartbeat(self):
         '''heartbeat for websocket'''
 
-    def seqnum(self, number: int) -> None:
-        if self._lastseqnum == -1:
-            # first seen
-            self._lastseqnum = number
+    def onBook(self, callback) -> None:
+        '''register an order book update. Unlike other callbacks these see
+        every tick, including sequenced ones that carry no data'''
+        self._book_callbacks.append(callback)
+        self._subscribed = None
+
+    def onOrderCancel(self, callback) -> None:
+        '''register for cancels of our own orders, feeds may take them from a private channel'''
+        self._order_callbacks[TickType.CANCEL].append(callback)
+        self._subscribed = None
+
+    def onOrderFill(self, callback) -> None:
+        '''register for orders we placed being filled, including fills
+        that are only reported as done on feeds marking FILL book_only'''
+        self._order_callbacks[TickType.FILL].append(callback)
+        self._subscribed = None
+
+    def subscribed(self) -> set:
+        '''TickTypes some registered callback consumes, feed handlers skip the rest'''
+        if self._subscribed is None:
+            if self._book_callbacks or self._seqnum_enabled:
+                self._subscribed = set(TickType.__members__.values())
+            else:
+                self._subscribed = ({field for field, callbacks in self._callbacks.items() if callbacks} |
+                                    {field for field, callbacks in self._batch_callbacks.items() if callbacks}) - self.book_only
+                self._subscribed |= {field for field, callbacks in self._order_callbacks.items() if callbacks}
+        return self._subscribed
+
+    def seqnum(self, number: int, instrument=None, checkpoint: bool = False) -> None:
+        '''track a sequence number per instrument, see `gaps`'''
+        if instrument not in self._sequences:
+            self._sequences[instrument] = _Sequence(number)
+            return
+        seq = self._sequences[instrument]
+
+        if checkpoint:
+            if number > seq.last:
+                # everything up to and including it was missed
+                seq.gaps += 1
+                seq.max_gap = max(seq.max_gap, number - seq.last)
+                seq.missing.add(seq.last + 1, number + 1)
+                seq.last = number
             return
 
-        if number != self._lastseqnum + 1 and number not in self._missingseqnum:
-            log.error('ERROR: Missing sequence number/s: %s' % ','.join(
-                str(x) for x in range(self._lastseqnum + 1, number + 1)))
-            self._missingseqnum.update(
-                x for x in range(self._lastseqnum + 1, number + 1))
-            log.error(self._missingseqnum)
+        if number == seq.last + 1:
+            seq.last = number
+            seq.behind = None
+
+        elif number > seq.last:
+            seq.gaps += 1
+            seq.max_gap = max(seq.max_gap, number - seq.last - 1)
+            seq.missing.add(seq.last + 1, number)
+            log.debug(f'Missing sequence numbers on {instrument}: {seq.last + 1}-{number - 1}')
+            seq.last = number
+            seq.behind = None
 
-        if number in self._missingseqnum:
-            self._missingseqnum.remove(number)
-            log.warning('INFO: Got out of order data for seqnum: %s' % number)
+        elif seq.missing.remove(number):
+            seq.late += 1
 
         else:
-            self._lastseqnum = number
+            seq.run = seq.run + 1 if seq.behind is not None and number == seq.behind + 1 else 1
+            seq.behind = number
+            if seq.run < self.seqnum_reset_run:
+                # seen already, e.g. replayed after a reconnect
+                seq.duplicates += 1
+            else:
+                # still counting up from below, the feed started over
+                seq.duplicates -= seq.run - 1
+                seq.resets += 1
+                seq.missing.clear()
+                seq.last = number
+                seq.behind = None
+
+    def gaps(self) -> dict:
+        '''sequence gap metrics by instrument'''
+        return {str(instrument): {'last': seq.last,
+                                  'gaps': seq.gaps,
+                                  'max_gap': seq.max_gap,
+                                  'late': seq.late,
+                                  'duplicates': seq.duplicates,
+                                  'resets': seq.resets,
+                                  'missing': len(seq.missing),
+                                  'missing_ranges': list(seq.missing.ranges())}
+                for instrument, seq in self._sequences.items()}
+
+    def connection(self) -> dict:
+        '''websocket connection metrics'''
+        return {'connected': self.connected,
+                'connects': self.connects,
+                'reconnects': self.reconnects,
+                'stalls': self.stalls,
+                'errors': self.errors,
+                'recovery': self.recovery,
+                'max_recovery': self.max_recovery}
+
+    async def connect(self, session: aiohttp.ClientSession) -> None:
+        '''open the websocket and subscribe, called again on every reconnect'''
+        options = self.options()
+        self.ws = await session.ws_connect(EXCHANGE_MARKET_DATA_ENDPOINT(self.exchange(), options.trading_type))
+
+        for sub in self.subscription():
+            await self.ws.send_str(sub)
+            log.info('Sending Subscription %s' % sub)
+
+        if self.heartbeat():
+            await self.ws.send_str(self.heartbeat())
+            log.info('Sending Heartbeat %s' % self.heartbeat())
 
     async def close(self) -> None:
         '''close the websocket'''
-        await self.ws.close()
+        if self.ws is not None:
+            await self.ws.close()
+
+    async def _watchdog(self, timeout: float) -> None:
+        '''return once no message has arrived for `timeout` seconds'''
+        while True:
+            idle = time.monotonic() - self._last_message
+            if idle >= timeout:
+                return
+            await asyncio.sleep(timeout - idle)
+
+    async def _session(self, session: aiohttp.ClientSession, stall_timeout: float) -> None:
+        '''connect, then receive until the feed closes or stalls'''
+        if stall_timeout > 0:
+            await asyncio.wait_for(self.connect(session), stall_timeout)
+        else:
+            await self.connect(session)
+
+        now = time.monotonic()
+        self._last_message = now
+        self._connected_at = now
+        self.connected = True
+        self.connects += 1
+        if self._disconnected is not None:
+            self.recovery = now - self._disconnected
+            self.max_recovery = max(self.max_recovery, self.recovery)
+            self._disconnected = None
+            log.info(f'Reconnected: {self.exchange()} after {self.recovery:.1f}s')
+        else:
+            log.info(f'Connected: {self.exchange()}')
+            log.info('')
+            log.critical(f'Starting algo trading: {self.exchange()}')
+
+        if stall_timeout <= 0:
+            await self.receive()
+            return
+
+        receive = asyncio.ensure_future(self.receive())
+        watchdog = asyncio.ensure_future(self._watchdog(stall_timeout))
+        try:
+            await asyncio.wait((receive, watchdog), return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            receive.cancel()
+            watchdog.cancel()
+
+        if receive.done() and not receive.cancelled():
+            # raise whatever ended the feed
+            receive.result()
+        else:
+            self.stalls += 1
+            log.warning(f'No market data from {self.exchange()} for {stall_timeout}s, reconnecting')
 
     async def run(self, engine) -> None:
+        '''keep the websocket up, reconnecting with backoff when it closes, fails or stalls'''
         options = self.options()
-        session = aiohttp.ClientSession()
+        delay = options.reconnect_delay
 
-        while True:
-            # startup and redundancy
-            log.info('Starting....')
-            self.ws = await session.ws_connect(EXCHANGE_MARKET_DATA_ENDPOINT(self.exchange(), options.trading_type))
-            log.info(f'Connected: {self.exchange()}')
+        log.info('Starting....')
+        async with aiohttp.ClientSession() as session:
+            while True:
+                try:
+                    await self._session(session, options.stall_timeout)
 
-            for sub in self.subscription():
-                await self.ws.send_str(sub)
-                log.info('Sending Subscription %s' % sub)
+                except KeyboardInterrupt:
+                    log.critical('Terminating program')
+                    return
 
-            if self.heartbeat():
-                await self.ws.send_str(self.heartbeat())
-                log.info('Sending Heartbeat %s' % self.heartbeat())
+                except asyncio.CancelledError:
+                    raise
 
-            log.info('')
-            log.critical(f'Starting algo trading: {self.exchange()}')
-            try:
-                while True:
-                    await self.receive()
+                except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+                    self.errors += 1
+                    log.warning(f'Market data connection to {self.exchange()} failed: {e!r}')
 
-            except KeyboardInterrupt:
-                log.critical('Terminating program')
-                return
+                except Exception as e:
+                    # e.g. a message that doesn't decode or convert, or a
+                    # callback raising: the feed carries on after a reconnect
+                    self.errors += 1
+                    log.exception(f'Market data from {self.exchange()} failed: {e!r}')
+
+                finally:
+                    now = time.monotonic()
+                    if self.connected and now - self._connected_at >= options.reconnect_max_delay:
+                        # the connection held up, back off from scratch
+                        delay = options.reconnect_delay
+                    self.connected = False
+                    try:
+                        await self.close()
+                    except Exception as e:
+                        log.debug(f'Error closing websocket: {e!r}')
+
+                if self._disconnected is None:
+                    self._disconnected = now
+                self.reconnects += 1
+
+                await asyncio.sleep(delay / 2 + random.uniform(0, delay / 2))
+                delay = min(delay * 2, options.reconnect_max_delay)
 
     @abstractmethod
     def tickToData(self, jsn: dict) -> MarketData:
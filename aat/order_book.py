@@ -1,7 +1,16 @@
 # from abc import ABCMeta
+import math
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from decimal import Decimal
 from .structs import Instrument
 from .enums import Side, TickType
-# from heapq import heappush, heappop
+
+try:
+    from .binding import PriceLevels as NativePriceLevels
+except ImportError:
+    # extension not built
+    NativePriceLevels = None
 
 
 class Order(object):
@@ -13,87 +22,553 @@ class Order(object):
         return self.price < other.price
 
 
+class PriceLevels(object):
+    '''price levels on one side of a book in integer ticks and lots, best price last'''
+
+    def __init__(self, side: Side) -> None:
+        self._side = side
+        self._sign = 1 if side == Side.BUY else -1
+        self._keys = []  # sign * price, ascending, best last
+        self._volumes = {}  # price -> volume
+        self._listeners = []
+
+        # cumulative depth from the best level, best first
+        self._depth_keys = []
+        self._depth_volumes = []
+        self._depth_notionals = []
+
+    def add(self, price: int, volume: int) -> int:
+        '''add volume (negative to remove) to a level, dropping the
+        level once it is empty. Returns the new volume of the level'''
+        if price in self._volumes:
+            volume += self._volumes[price]
+        return self.set(price, volume)
+
+    def set(self, price: int, volume: int) -> int:
+        '''set the volume of a level, dropping the level if empty'''
+        if volume <= 0:
+            if price in self._volumes:
+                self.remove(price)
+            return 0
+
+        if price not in self._volumes:
+            insort(self._keys, self._sign * price)
+        self._volumes[price] = volume
+        self._invalidate(self._sign * price)
+
+        for listener in self._listeners:
+            listener(self._side, price, volume)
+        return volume
+
+    def remove(self, price: int) -> None:
+        del self._volumes[price]
+        key = self._sign * price
+        if self._keys[-1] == key:
+            # top of book
+            self._keys.pop()
+        else:
+            del self._keys[bisect_left(self._keys, key)]
+        self._invalidate(key)
+
+        for listener in self._listeners:
+            listener(self._side, price, 0)
+
+    def listen(self, listener) -> None:
+        self._listeners.append(listener)
+
+    def clear(self) -> None:
+        volumes = self._volumes
+        self._keys = []
+        self._volumes = {}
+        self._depth_keys = []
+        self._depth_volumes = []
+        self._depth_notionals = []
+
+        # listeners see the book already empty
+        for listener in self._listeners:
+            for price in volumes:
+                listener(self._side, price, 0)
+
+    def _invalidate(self, key: int) -> None:
+        # cached levels better than the changed one are still valid
+        depth_keys = self._depth_keys
+        while depth_keys and depth_keys[-1] <= key:
+            depth_keys.pop()
+            self._depth_volumes.pop()
+            self._depth_notionals.pop()
+
+    def _extend(self, n: int) -> int:
+        '''extend the cumulative cache to `n` levels (or all of them),
+        returning the number of cached levels'''
+        n = min(n, len(self._keys))
+        keys = self._keys
+        i = len(self._depth_keys)
+        volume = self._depth_volumes[-1] if i else 0
+        notional = self._depth_notionals[-1] if i else 0
+        while i < n:
+            key = keys[-i - 1]
+            level = self._volumes[self._sign * key]
+            volume += level
+            notional += level * self._sign * key
+            self._depth_keys.append(key)
+            self._depth_volumes.append(volume)
+            self._depth_notionals.append(notional)
+            i += 1
+        return n
+
+    def volume(self, price: int) -> int:
+        return self._volumes.get(price, 0)
+
+    def best(self) -> int:
+        '''best price, or None if there are no levels'''
+        return self._sign * self._keys[-1] if self._keys else None
+
+    def top(self, n: int) -> list:
+        '''the `n` best levels as (price, volume), best first'''
+        return [(self._sign * key, self._volumes[self._sign * key]) for key in self._keys[:-n - 1:-1]] if n > 0 else []
+
+    def depth(self, n: int = None) -> int:
+        '''total volume of the `n` best levels (all levels if None)'''
+        n = self._extend(len(self._keys) if n is None else n)
+        return self._depth_volumes[n - 1] if n > 0 else 0
+
+    def fill(self, size: int) -> int:
+        '''notional (price * volume) to fill `size` against these
+        levels, or None if there is not enough volume'''
+        # cached cumulative volume usually covers it already
+        i = bisect_left(self._depth_volumes, size)
+        while i == len(self._depth_volumes):
+            if self._extend(i + 16) == i:
+                return None
+            i = bisect_left(self._depth_volumes, size, i)
+
+        volume = self._depth_volumes[i - 1] if i else 0
+        notional = self._depth_notionals[i - 1] if i else 0
+        return notional + (size - volume) * self._sign * self._depth_keys[i]
+
+    def __iter__(self):
+        '''iterate levels as (price, volume), best first'''
+        for key in reversed(self._keys):
+            yield self._sign * key, self._volumes[self._sign * key]
+
+    def __contains__(self, price: int) -> bool:
+        return price in self._volumes
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+def _digits(size: float) -> int:
+    '''decimal places needed to print multiples of `size`'''
+    return max(0, -Decimal(repr(size)).normalize().as_tuple().exponent)
+
+
+# levels used by the books, native when the C++ extension is built
+BookLevels = NativePriceLevels or PriceLevels
+
+
 class Book(object):
-    def __init__(self, instrument: Instrument):
+    '''aggregated (L2) book for one instrument, kept in integer ticks and lots'''
+
+    def __init__(self, instrument: Instrument, tick_size: float = 0.01, lot_size: float = 0.0001):
         self._instrument = instrument
-        self._bid = []
-        self._bidd = {}
+        self._tick_size = tick_size
+        self._lot_size = lot_size
+        self._price_digits = _digits(tick_size)
+        self._volume_digits = _digits(lot_size)
+        self._bid = BookLevels(Side.BUY)
+        self._ask = BookLevels(Side.SELL)
+
+        # sequence number of the last snapshot loaded
+        self.sequence = -1
+
+    def ticks(self, price: float) -> int:
+        return int(round(price / self._tick_size))
+
+    def lots(self, volume: float) -> int:
+        return int(round(volume / self._lot_size))
 
-        self._ask = []
-        self._askk = {}
+    def price(self, ticks: int) -> float:
+        return round(ticks * self._tick_size, self._price_digits)
+
+    def volume(self, lots: int) -> float:
+        return round(lots * self._lot_size, self._volume_digits)
 
     def push(self, order) -> None:
-        price = round(order.price, 2)
-        volume = round(order.volume, 4)
-
-        if order.side == Side.BUY:
-            if order.type == TickType.FILL or \
-               order.type == TickType.CANCEL:
-                if price not in self._bidd:
-                    pass
-                else:
-                    self._bidd[price].volume -= volume
-                    if self._bidd[price].volume < 1e-5:
-                        self._bid.remove(self._bidd[price])
-                        del self._bidd[price]
-
-            elif order.type == TickType.CHANGE:
-                if price not in self._bidd:
-                    pass
-                else:
-                    self._bidd[price].volume -= volume
-                    if self._bidd[price].volume < 1e-5:
-                        self._bid.remove(self._bidd[price])
-                        del self._bidd[price]
-
-            elif order.type == TickType.OPEN:
-                if order.price in self._bidd:
-                    self._bidd[price].volume += volume
-                else:
-                    self._bid.append(Order(price, volume))
-                    self._bidd[price] = self._bid[-1]
-            else:
-                self._bid.append(Order(price, volume))
-                self._bidd[price] = self._bid[-1]
-        else:
-            if order.type == TickType.FILL or \
-               order.type == TickType.CANCEL:
-                if price not in self._askk:
-                    pass
-                else:
-                    self._askk[price].volume -= volume
-                    if self._askk[price].volume < 1e-5:
-                        self._ask.remove(self._askk[price])
-                        del self._askk[price]
-
-            elif order.type == TickType.CHANGE:
-                if price not in self._askk:
-                    pass
-                else:
-                    self._askk[price].volume -= order.volume
-                    if self._askk[price].volume < 1e-5:
-                        self._ask.remove(self._askk[price])
-                        del self._askk[price]
-
-            elif order.type == TickType.OPEN:
-                if price in self._askk:
-                    self._askk[price].volume += volume
-                else:
-                    self._ask.append(Order(price, volume))
-                    self._askk[price] = self._ask[-1]
+        if math.isnan(order.price) or math.isnan(order.volume):
+            return
 
-            else:
-                self._ask.append(Order(price, volume))
-                self._askk[price] = self._ask[-1]
+        price = self.ticks(order.price)
+        volume = self.lots(order.volume)
+        levels = self._bid if order.side == Side.BUY else self._ask
+
+        if order.type in (TickType.FILL, TickType.CANCEL, TickType.CHANGE):
+            if price in levels:
+                levels.add(price, -volume)
+
+        elif order.type == TickType.OPEN:
+            levels.add(price, volume)
+
+        else:
+            levels.set(price, volume)
 
     def pop(self, order) -> None:
         pass
 
+    def load(self, bids: list, asks: list) -> None:
+        '''replace the book with a snapshot of (price, volume) levels'''
+        for levels, entries in ((self._bid, bids), (self._ask, asks)):
+            levels.clear()
+            for entry in entries:
+                levels.add(self.ticks(float(entry[0])), self.lots(float(entry[1])))
+
+    def side(self, side: Side) -> PriceLevels:
+        return self._bid if side == Side.BUY else self._ask
+
+    def listen(self, listener) -> None:
+        '''call `listener(side, price, volume)` whenever a level changes,
+        with a volume of 0 when the level is removed'''
+        def convert(side, ticks, lots):
+            listener(side, self.price(ticks), self.volume(lots))
+        self._bid.listen(convert)
+        self._ask.listen(convert)
+
+    def level(self, side: Side, price: float) -> float:
+        '''resting volume at a price'''
+        return self.volume(self.side(side).volume(self.ticks(price)))
+
+    def best_bid(self) -> float:
+        bid = self._bid.best()
+        return self.price(bid) if bid is not None else None
+
+    def best_ask(self) -> float:
+        ask = self._ask.best()
+        return self.price(ask) if ask is not None else None
+
+    def tob(self) -> tuple:
+        '''best bid and ask as (price, volume), None for an empty side'''
+        bid, ask = self._bid.best(), self._ask.best()
+        return ((self.price(bid), self.volume(self._bid.volume(bid))) if bid is not None else None,
+                (self.price(ask), self.volume(self._ask.volume(ask))) if ask is not None else None)
+
+    def spread(self) -> float:
+        bid, ask = self._bid.best(), self._ask.best()
+        return self.price(ask - bid) if bid is not None and ask is not None else None
+
+    def mid(self) -> float:
+        bid, ask = self._bid.best(), self._ask.best()
+        return round((ask + bid) * self._tick_size / 2, self._price_digits + 1) if bid is not None and ask is not None else None
+
+    def levels(self, n: int = 10) -> tuple:
+        '''the `n` best bid and ask levels as (price, volume), best first'''
+        return ([(self.price(p), self.volume(v)) for p, v in self._bid.top(n)],
+                [(self.price(p), self.volume(v)) for p, v in self._ask.top(n)])
+
+    def depth(self, side: Side, n: int = None) -> float:
+        '''resting volume on one side over the `n` best levels'''
+        return self.volume(self.side(side).depth(n))
+
+    def price_for_size(self, side: Side, size: float) -> float:
+        '''average price paid by an order on `side` of `size` taking
+        liquidity from the other side, or None if the book is too thin'''
+        levels = self._ask if side == Side.BUY else self._bid
+        lots = self.lots(size)
+        if lots <= 0:
+            best = levels.best()
+            return self.price(best) if best is not None else None
+
+        notional = levels.fill(lots)
+        return notional * self._tick_size / lots if notional is not None else None
+
     def __str__(self) -> str:
+        # both sides printed from highest to lowest price
         return str(self._instrument) + '->\n' + \
-            'ask:\t' + '\n\t'.join(['%.1f\t@\t%.1f' % (x.volume, x.price) for x in sorted(self._ask, reverse=True)]) + \
+            'ask:\t' + '\n\t'.join(['%.1f\t@\t%.1f' % (self.volume(volume), self.price(price)) for price, volume in reversed(list(self._ask))]) + \
             '\n\t=====================\n' + \
-            'bid:\t' + '\n\t'.join(['%.1f\t@\t%.1f' % (x.volume, x.price) for x in sorted(self._bid, reverse=True)]) + '\n'
+            'bid:\t' + '\n\t'.join(['%.1f\t@\t%.1f' % (self.volume(volume), self.price(price)) for price, volume in self._bid]) + '\n'
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
+class L3Book(Book):
+    '''order level book, resting orders by order_id in a FIFO queue per level'''
+
+    def __init__(self, instrument: Instrument, tick_size: float = 0.01, lot_size: float = 0.0001):
+        super(L3Book, self).__init__(instrument, tick_size, lot_size)
+        self._orders = {}  # order_id -> (side, ticks)
+        self._queues = {Side.BUY: {}, Side.SELL: {}}  # side -> ticks -> {order_id: lots}
+
+    def push(self, order) -> None:
+        if not order.order_id:
+            return super(L3Book, self).push(order)
+
+        if order.type == TickType.OPEN:
+            self.open(order.order_id, order.side, order.price, order.volume)
+
+        elif order.type == TickType.TRADE:
+            # order_id is the resting (maker) order
+            self.reduce(order.order_id, order.volume)
+
+        elif order.type == TickType.CHANGE:
+            # remaining is the new size of the order
+            self.resize(order.order_id, order.remaining)
+
+        elif order.type in (TickType.FILL, TickType.CANCEL):
+            # done, whatever is left is off the book
+            self.cancel(order.order_id)
+
+    def load(self, bids: list, asks: list) -> None:
+        '''replace the book with a snapshot of (price, volume, order_id)
+        orders, or (price, volume) levels if the venue doesn't give ids'''
+        self._orders = {}
+        self._queues = {Side.BUY: {}, Side.SELL: {}}
+        self._bid.clear()
+        self._ask.clear()
+        for side, entries in ((Side.BUY, bids), (Side.SELL, asks)):
+            for entry in entries:
+                if len(entry) > 2:
+                    self.open(entry[2], side, float(entry[0]), float(entry[1]))
+                else:
+                    self.side(side).add(self.ticks(float(entry[0])), self.lots(float(entry[1])))
+
+    def open(self, order_id: str, side: Side, price: float, volume: float) -> None:
+        '''add a resting order to the back of its level'''
+        if order_id in self._orders:
+            self.cancel(order_id)
+
+        if math.isnan(price) or math.isnan(volume):
+            return
+
+        price = self.ticks(price)
+        volume = self.lots(volume)
+        if volume <= 0:
+            return
+
+        queues = self._queues[side]
+        if price not in queues:
+            queues[price] = OrderedDict()
+        queues[price][order_id] = volume
+        self._orders[order_id] = (side, price)
+        self.side(side).add(price, volume)
+
+    def resize(self, order_id: str, volume: float) -> None:
+        '''set the remaining size of an order, keeping its place in the queue'''
+        if order_id not in self._orders or math.isnan(volume):
+            return
+        self._resize(order_id, self.lots(volume))
+
+    def _resize(self, order_id: str, lots: int) -> None:
+        if lots <= 0:
+            return self.cancel(order_id)
+
+        side, price = self._orders[order_id]
+        queue = self._queues[side][price]
+        delta = lots - queue[order_id]
+        queue[order_id] = lots
+        self.side(side).add(price, delta)
+
+    def reduce(self, order_id: str, volume: float) -> None:
+        '''take `volume` off an order, e.g. on a fill'''
+        if order_id not in self._orders or math.isnan(volume):
+            return
+        side, price = self._orders[order_id]
+        self._resize(order_id, self._queues[side][price][order_id] - self.lots(volume))
+
+    def cancel(self, order_id: str) -> None:
+        '''remove an order from the book'''
+        if order_id not in self._orders:
+            return
+
+        side, price = self._orders.pop(order_id)
+        queues = self._queues[side]
+        volume = queues[price].pop(order_id)
+        self.side(side).add(price, -volume)
+        if not queues[price]:
+            del queues[price]
+
+    def order(self, order_id: str) -> tuple:
+        '''(side, price, volume) of a resting order, or None'''
+        if order_id not in self._orders:
+            return None
+        side, price = self._orders[order_id]
+        return side, self.price(price), self.volume(self._queues[side][price][order_id])
+
+    def orders(self, side: Side, price: float) -> list:
+        '''resting orders at a level as (order_id, volume), in queue order'''
+        return [(order_id, self.volume(lots)) for order_id, lots in self._queues[side].get(self.ticks(price), {}).items()]
+
+    def queue_position(self, order_id: str) -> tuple:
+        '''(orders, volume) ahead of an order at its level'''
+        side, price = self._orders[order_id]
+        ahead, volume = 0, 0
+        for other, lots in self._queues[side][price].items():
+            if other == order_id:
+                break
+            ahead += 1
+            volume += lots
+        return ahead, self.volume(volume)
+
+    def __contains__(self, order_id: str) -> bool:
+        return order_id in self._orders
+
+
+class AbsoluteBook(Book):
+    '''book for venues whose level updates carry the new total volume at a price'''
+
+    def push(self, order) -> None:
+        if order.type not in (TickType.OPEN, TickType.CHANGE, TickType.CANCEL, TickType.FILL):
+            return
+        if math.isnan(order.price) or math.isnan(order.remaining):
+            return
+        self.side(order.side).set(self.ticks(order.price), self.lots(order.remaining))
+
+
+class BookFeatures(object):
+    '''imbalance, microprice and weighted mid of a book's `n` best levels, kept current'''
+
+    def __init__(self, book: Book, n: int = 5, callback=None) -> None:
+        self._book = book
+        self._n = n
+        self._callback = callback
+
+        # side -> {price: volume} of its top n levels, and running sums
+        self._top = {Side.BUY: {}, Side.SELL: {}}
+        self._cutoff = {Side.BUY: None, Side.SELL: None}  # worst price in the top n
+        self._volume = {Side.BUY: 0, Side.SELL: 0}
+        self._notional = {Side.BUY: 0, Side.SELL: 0}
+
+        self.imbalance = None
+        self.microprice = None
+        self.weighted_mid = None
+
+        for side in (Side.BUY, Side.SELL):
+            self._refresh(side)
+            book.side(side).listen(self._update)
+        self._compute()
+
+    def _refresh(self, side: Side) -> None:
+        top = self._book.side(side).top(self._n)
+        self._top[side] = dict(top)
+        self._cutoff[side] = top[-1][0] if top else None
+        self._volume[side] = sum(volume for _, volume in top)
+        self._notional[side] = sum(price * volume for price, volume in top)
+
+    def _update(self, side: Side, price: int, volume: int) -> None:
+        top = self._top[side]
+        if price in top:
+            if volume > 0:
+                change = volume - top[price]
+                top[price] = volume
+                self._volume[side] += change
+                self._notional[side] += change * price
+            else:
+                # next level down moves into the top n
+                self._refresh(side)
+        elif volume > 0 and (len(top) < self._n or (price > self._cutoff[side] if side == Side.BUY else price < self._cutoff[side])):
+            self._refresh(side)
+        else:
+            # deeper than the top n
+            return
+
+        self._compute()
+        if self._callback is not None:
+            self._callback(self)
+
+    def _compute(self) -> None:
+        tick_size = self._book._tick_size
+        bid_volume, ask_volume = self._volume[Side.BUY], self._volume[Side.SELL]
+        if not bid_volume or not ask_volume:
+            self.imbalance = (bid_volume - ask_volume) / (bid_volume + ask_volume) if bid_volume or ask_volume else None
+            self.microprice = None
+            self.weighted_mid = None
+            return
+
+        self.imbalance = (bid_volume - ask_volume) / (bid_volume + ask_volume)
+        self.weighted_mid = (self._notional[Side.BUY] / bid_volume + self._notional[Side.SELL] / ask_volume) / 2 * tick_size
+
+        bids, asks = self._book.side(Side.BUY), self._book.side(Side.SELL)
+        bid, ask = bids.best(), asks.best()
+        bid_size, ask_size = bids.volume(bid), asks.volume(ask)
+        self.microprice = (bid * ask_size + ask * bid_size) / (bid_size + ask_size) * tick_size
+
+    def __str__(self) -> str:
+        return f'<BookFeatures - imbalance: {self.imbalance} microprice: {self.microprice} weighted mid: {self.weighted_mid}>'
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
+class ConsolidatedBook(object):
+    '''one price ladder for an instrument merged from several exchanges' books'''
+
+    def __init__(self, instrument: Instrument) -> None:
+        self._instrument = instrument
+        # prices here are floats, so always the python levels
+        self._bid = PriceLevels(Side.BUY)
+        self._ask = PriceLevels(Side.SELL)
+        self._venues = {Side.BUY: {}, Side.SELL: {}}  # side -> price -> {exchange: volume}
+
+    def add(self, exchange, book: Book) -> None:
+        '''merge in an exchange's book and follow its changes'''
+        for side in (Side.BUY, Side.SELL):
+            for price, volume in book.side(side):
+                self.update(exchange, side, book.price(price), book.volume(volume))
+        book.listen(lambda side, price, volume: self.update(exchange, side, price, volume))
+
+    def update(self, exchange, side: Side, price: float, volume: float) -> None:
+        '''set the volume an exchange has at a level'''
+        venues = self._venues[side]
+        if volume > 0:
+            if price not in venues:
+                venues[price] = {}
+            venues[price][exchange] = volume
+        elif price in venues and exchange in venues[price]:
+            del venues[price][exchange]
+            if not venues[price]:
+                del venues[price]
+        else:
+            return
+
+        levels = self._bid if side == Side.BUY else self._ask
+        if price in venues:
+            levels.set(price, sum(venues[price].values()))
+        elif price in levels:
+            levels.remove(price)
+
+    def venues(self, side: Side, price: float) -> dict:
+        '''volume by exchange at a level'''
+        return dict(self._venues[side].get(price, {}))
+
+    def _best(self, side: Side) -> tuple:
+        levels = self._bid if side == Side.BUY else self._ask
+        price = levels.best()
+        if price is None:
+            return None
+        return price, levels.volume(price), dict(self._venues[side][price])
+
+    def bbo(self) -> tuple:
+        '''best bid and offer as (price, volume, {exchange: volume}),
+        None for an empty side'''
+        return self._best(Side.BUY), self._best(Side.SELL)
+
+    def best_bid(self) -> float:
+        return self._bid.best()
+
+    def best_ask(self) -> float:
+        return self._ask.best()
+
+    def spread(self) -> float:
+        bid, ask = self._bid.best(), self._ask.best()
+        return ask - bid if bid is not None and ask is not None else None
+
+    def levels(self, n: int = 10) -> tuple:
+        '''the `n` best bid and ask levels as (price, volume, {exchange: volume})'''
+        return tuple([(price, volume, dict(self._venues[side][price])) for price, volume in levels.top(n)]
+                     for side, levels in ((Side.BUY, self._bid), (Side.SELL, self._ask)))
+
+    def __str__(self) -> str:
+        return f'<ConsolidatedBook - {self._instrument} - {self.bbo()}>'
 
     def __repr__(self) -> str:
         return self.__str__()
@@ -103,17 +578,37 @@ class Book(object):
 class OrderBook(object):
     '''OrderBook interface'''
 
-    def __init__(self, instruments):
-        self._ob = {instrument: Book(instrument) for instrument in instruments}
+    def __init__(self, instruments, book=Book, sizes=None):
+        '''`sizes` maps instruments to their (tick size, lot size)'''
+        sizes = sizes or {}
+        self._ob = {instrument: book(instrument, *sizes[instrument]) if instrument in sizes else book(instrument)
+                    for instrument in instruments}
 
-    def preload(self, orders) -> None:
-        pass
+    def preload(self, instrument: Instrument, bids: list, asks: list, sequence: int = -1) -> None:
+        '''replace an instrument's book with a depth snapshot'''
+        book = self._ob[instrument]
+        book.load(bids, asks)
+        book.sequence = sequence
 
     def push(self, order) -> None:
-        self._ob[order.instrument].push(order)
+        book = self._ob.get(order.instrument)
+        if book is not None:
+            book.push(order)
+
+    def book(self, instrument: Instrument) -> Book:
+        return self._ob[instrument]
+
+    def instruments(self) -> list:
+        return list(self._ob.keys())
+
+    def __contains__(self, instrument: Instrument) -> bool:
+        return instrument in self._ob
 
-    def tob(self) -> list:
-        return self._ob
+    def tob(self, instrument: Instrument = None):
+        '''top of book for an instrument, or for every instrument'''
+        if instrument is not None:
+            return self._ob[instrument].tob()
+        return {instrument: book.tob() for instrument, book in self._ob.items()}
 
     def __str__(self) -> str:
         return '\n\n'.join([str(self._ob[b]) for b in self._ob])
@@ -3,7 +3,7 @@ import os.path
 from configparser import ConfigParser
 from pydoc import locate
 from .config import TradingEngineConfig, BacktestConfig, StrategyConfig, SyntheticExchangeConfig
-from .enums import TradingType, InstrumentType, ExchangeType, PairType
+from .enums import TradingType, InstrumentType, ExchangeType, PairType, OverflowPolicy
 from .exceptions import ConfigException
 from .structs import Instrument
 from .utils import str_to_exchange, set_verbose
@@ -55,6 +55,18 @@ def _parse_general(general, config) -> None:
         if general['print'] == '1':
             config.print = True
 
+    if 'order_books' in general:
+        config.order_books = general['order_books'] == '1'
+
+    if 'book_snapshot_path' in general:
+        config.book_snapshot_path = general['book_snapshot_path']
+    config.book_snapshot_interval = float(general.get('book_snapshot_interval', config.book_snapshot_interval))
+    config.resync_stagger = float(general.get('resync_stagger', config.resync_stagger))
+    config.strategy_queue_size = int(general.get('strategy_queue_size', config.strategy_queue_size))
+    config.reorder_lateness = float(general.get('reorder_lateness', config.reorder_lateness))
+    if 'overflow_policy' in general:
+        config.overflow_policy = OverflowPolicy(general['overflow_policy'].upper())
+
 
 def _parse_exchange(exchange, config) -> None:
     if config.type == TradingType.LIVE:
@@ -145,6 +157,14 @@ def _parse_synthetic_config(config, argv):
     new_config.trading_type = config.exchange_options.trading_type
     new_config.currency_pairs = config.exchange_options.currency_pairs
     new_config.instruments = config.exchange_options.instruments
+    new_config.decoder = config.exchange_options.decoder
+    new_config.batch_receive = config.exchange_options.batch_receive
+    new_config.max_batch = config.exchange_options.max_batch
+    new_config.dedup_size = config.exchange_options.dedup_size
+    new_config.dedup_window = config.exchange_options.dedup_window
+    new_config.reconnect_delay = config.exchange_options.reconnect_delay
+    new_config.reconnect_max_delay = config.exchange_options.reconnect_max_delay
+    new_config.stall_timeout = config.exchange_options.stall_timeout
 
     if argv.get('direction'):
         new_config.direction = argv.get('direction')
@@ -170,6 +190,24 @@ def _parse_options(argv, config: TradingEngineConfig) -> None:
         config.exchange_options.instruments = \
             [Instrument(type=InstrumentType.PAIR, underlying=p) for p in config.exchange_options.currency_pairs]
 
+    if argv.get('decoder'):
+        config.exchange_options.decoder = argv.get('decoder')
+
+    if argv.get('batch_receive'):
+        config.exchange_options.batch_receive = argv.get('batch_receive') == '1'
+    if argv.get('max_batch'):
+        config.exchange_options.max_batch = int(argv.get('max_batch'))
+    if argv.get('dedup_size'):
+        config.exchange_options.dedup_size = int(argv.get('dedup_size'))
+    if argv.get('dedup_window'):
+        config.exchange_options.dedup_window = float(argv.get('dedup_window'))
+    if argv.get('reconnect_delay'):
+        config.exchange_options.reconnect_delay = float(argv.get('reconnect_delay'))
+    if argv.get('reconnect_max_delay'):
+        config.exchange_options.reconnect_max_delay = float(argv.get('reconnect_max_delay'))
+    if argv.get('stall_timeout'):
+        config.exchange_options.stall_timeout = float(argv.get('stall_timeout'))
+
 
 def _parse_live_options(argv, config: TradingEngineConfig) -> None:
     log.critical("\n\nWARNING: Live trading. money will be lost ;^)\n\n")
@@ -0,0 +1,121 @@
+from collections import OrderedDict
+from datetime import datetime
+from typing import List
+from .enums import ExchangeType, Side
+from .structs import Instrument, TradeResponse
+
+
+class PendingOrders(object):
+    '''pending orders by order_id, indexed by strategy, instrument, exchange and side'''
+
+    def __init__(self) -> None:
+        self._orders = OrderedDict()  # order_id -> TradeResponse
+        self._added = {}  # order_id -> datetime
+
+        # secondary indexes, key -> {order_id: TradeResponse}
+        self._by_strategy = {}
+        self._by_instrument = {}
+        self._by_exchange = {}
+        self._by_side = {}
+
+    def _indexes(self, resp: TradeResponse):
+        return ((self._by_strategy, resp.strategy),
+                (self._by_instrument, resp.instrument),
+                (self._by_exchange, resp.exchange),
+                (self._by_side, resp.side))
+
+    def add(self, resp: TradeResponse, time: datetime = None) -> None:
+        '''track a pending order'''
+        if resp.order_id in self._orders:
+            self.remove(resp.order_id)
+
+        self._orders[resp.order_id] = resp
+        self._added[resp.order_id] = time or datetime.now()
+
+        for index, key in self._indexes(resp):
+            if key not in index:
+                index[key] = {}
+            index[key][resp.order_id] = resp
+
+    def remove(self, order_id: str) -> TradeResponse:
+        '''stop tracking a pending order and return it'''
+        resp = self._orders.pop(order_id)
+        del self._added[order_id]
+
+        for index, key in self._indexes(resp):
+            del index[key][order_id]
+            if not index[key]:
+                del index[key]
+        return resp
+
+    def get(self, order_id: str, default: TradeResponse = None) -> TradeResponse:
+        return self._orders.get(order_id, default)
+
+    def select(self,
+               strategy=None,
+               instrument: Instrument = None,
+               exchange: ExchangeType = None,
+               side: Side = None) -> List[TradeResponse]:
+        '''pending orders matching all of the given filters, oldest first'''
+        filters = ((self._by_strategy, strategy),
+                   (self._by_instrument, instrument),
+                   (self._by_exchange, exchange),
+                   (self._by_side, side))
+        filters = [(index, key) for index, key in filters if key is not None]
+        if not filters:
+            return list(self._orders.values())
+
+        candidates = [index.get(key, {}) for index, key in filters]
+        smallest = min(candidates, key=len)
+        return [resp for order_id, resp in smallest.items() if all(order_id in c for c in candidates)]
+
+    def exposure(self, **filters) -> float:
+        '''signed notional of pending orders matching the filters
+        (positive for buys, negative for sells)'''
+        total = 0.0
+        for resp in self.select(**filters):
+            volume = resp.remaining if resp.remaining > 0 else resp.volume
+            total += volume * resp.price * (1 if resp.side == Side.BUY else -1)
+        return total
+
+    def age(self, order_id: str, now: datetime = None) -> float:
+        '''seconds since the order was added'''
+        return ((now or datetime.now()) - self._added[order_id]).total_seconds()
+
+    def older_than(self, seconds: float, now: datetime = None) -> List[TradeResponse]:
+        '''pending orders added more than `seconds` ago, oldest first'''
+        now = now or datetime.now()
+        ret = []
+        for order_id, resp in self._orders.items():
+            if (now - self._added[order_id]).total_seconds() <= seconds:
+                # everything after this was added later
+                break
+            ret.append(resp)
+        return ret
+
+    def keys(self):
+        return self._orders.keys()
+
+    def values(self):
+        return self._orders.values()
+
+    def items(self):
+        return self._orders.items()
+
+    def __contains__(self, order_id: str) -> bool:
+        return order_id in self._orders
+
+    def __getitem__(self, order_id: str) -> TradeResponse:
+        return self._orders[order_id]
+
+    def __delitem__(self, order_id: str) -> None:
+        self.remove(order_id)
+
+    def __iter__(self):
+        return iter(self._orders)
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+    def __repr__(self) -> str:
+        return f'<PendingOrders - {len(self._orders)}>'
@@ -1,16 +1,22 @@
 import operator
 # from concurrent.futures import ThreadPoolExecutor
-from datetime import datetime
+from bisect import bisect_right
+from datetime import datetime, timedelta
 from functools import reduce
-from typing import List, Dict
+from typing import List, Dict, Tuple, Union
 from .enums import TradeResult, ExchangeType, PairType, CurrencyType, TradingType, Side
 from .exceptions import QueryException, AATException
 from .execution import Execution
+from .ledger import Ledger
 from .logging import log
+from .order_book import Book, ConsolidatedBook, OrderBook
+from .pending import PendingOrders
 from .risk import Risk
+from .snapshot import Snapshot, SnapshotPublisher
+from .statistics import RollingStatistics
 from .strategy import TradingStrategy
-from .structs import Instrument, MarketData, TradeRequest, TradeResponse
-from .utils import iterate_accounts, pnl_helper, findpath
+from .structs import Account, Instrument, MarketData, TradeRequest, TradeResponse
+from .utils import pnl_helper, findpath
 
 
 class QueryEngine(object):
@@ -19,9 +25,13 @@ class QueryEngine(object):
                  exchanges: List[ExchangeType] = None,
                  pairs: List[PairType] = None,
                  instruments: List[Instrument] = None,
-                 accounts=None,
+                 accounts: Ledger = None,
+                 books: Dict[ExchangeType, OrderBook] = None,
                  risk: Risk = None,
-                 execution: Execution = None):
+                 execution: Execution = None,
+                 snapshot_interval: float = 0.25,
+                 snapshot_trades: int = 100,
+                 statistics_windows: tuple = (timedelta(minutes=1), timedelta(minutes=5), timedelta(hours=1))):
         # self._executor = ThreadPoolExecutor(16)
         self._all = []
         self._trading_type = trading_type
@@ -32,10 +42,16 @@ class QueryEngine(object):
         self.positions_value = [[datetime.now(), 0.0, 0.0, 0.0]]
         self.portfolio_value = [[datetime.now(), risk.total_funds]]
         self.positions = {}
-        self.pending = {}
+        self.pending = PendingOrders()
+
+        # every stored event is stamped with a monotonically
+        # increasing cursor, kept in lists parallel to the data
+        self._cursor = 0
 
         self._trades = []
         self._trades_by_instrument = {}
+        self._trades_cursors = []
+        self._trades_by_instrument_cursors = {}
 
         self._pairs = pairs
 
@@ -45,19 +61,45 @@ class QueryEngine(object):
 
         self._last_price_by_asset_and_exchange = {}
 
+        # live order books by exchange, owned by the trading engine
+        self._books = books or {}
+
+        # books merged across exchanges, by instrument
+        self._consolidated = {}
+        for exchange, ob in self._books.items():
+            for instrument in ob.instruments():
+                if instrument not in self._consolidated:
+                    self._consolidated[instrument] = ConsolidatedBook(instrument)
+                self._consolidated[instrument].add(exchange, ob.book(instrument))
+
+        # rolling statistics by (instrument, exchange), one per window
+        self._statistics_windows = statistics_windows
+        self._statistics = {}
+
         self._trade_reqs = []
         self._trade_resps = []
         self._trade_reqs_by_instrument = {}
         self._trade_resps_by_instrument = {}
+        self._trade_reqs_cursors = []
+        self._trade_resps_cursors = []
+        self._trade_reqs_by_instrument_cursors = {}
+        self._trade_resps_by_instrument_cursors = {}
 
         # public
         self.strategies = []
+        self._callbacks = {}  # strategy -> callback the feeds deliver to, e.g. its queue
 
         self._risk = risk
         self._execution = execution
 
-    def registerStrategy(self, strat: TradingStrategy):
+        # immutable snapshots for readers on other threads
+        self._snapshots = SnapshotPublisher(interval=snapshot_interval, trades=snapshot_trades)
+
+    def registerStrategy(self, strat: TradingStrategy, callback=None):
+        '''register a strategy. Its fills go through `callback` (by default
+        the strategy itself), so they stay in order with its market data'''
         self.strategies.append(strat)
+        self._callbacks[strat] = callback or strat
 
     def query_instruments(self, exchange=None) -> List[PairType]:
         '''get list of all instruments available on all exchanges'''
@@ -75,6 +117,54 @@ class QueryEngine(object):
             return lst_sub[instrument][from_:to_] if page > 1 else lst_sub[instrument][from_:]
         return lst[from_:to_] if page > 1 else lst[from_:]
 
+    def _record(self, item, instrument: Instrument, lst: list, lst_sub: dict, cursors: list, cursors_sub: dict) -> int:
+        '''append an item to a list and its per-instrument list, stamping it with the next cursor'''
+        cursor = self._cursor + 1
+
+        lst.append(item)
+        cursors.append(cursor)
+
+        if instrument not in lst_sub:
+            lst_sub[instrument] = []
+            cursors_sub[instrument] = []
+        lst_sub[instrument].append(item)
+        cursors_sub[instrument].append(cursor)
+
+        # only publish the cursor once the item is visible to readers
+        self._cursor = cursor
+        return cursor
+
+    def _since(self, instrument: Instrument, lst: list, lst_sub: dict, cursors: list, cursors_sub: dict, since: int = 0) -> Tuple[list, int]:
+        '''return items stored after cursor `since`, and the cursor to pass on the next call'''
+        # grab the cursor first, anything stored after this will be seen next call
+        cursor = self._cursor
+
+        if instrument:
+            lst = lst_sub.get(instrument, [])
+            cursors = cursors_sub.get(instrument, [])
+
+        # cursors are sorted, so find the first one after `since`
+        start = bisect_right(cursors, since)
+        end = bisect_right(cursors, cursor, start)
+        return lst[start:end], cursor
+
+    def query_cursor(self) -> int:
+        '''get the cursor of the most recently stored event'''
+        return self._cursor
+
+    def query_accounts(self) -> List[Account]:
+        '''get all accounts'''
+        return list(self._accounts.values()) if self._accounts else []
+
+    def snapshot(self) -> Snapshot:
+        '''get the latest published snapshot. Safe to call from any thread'''
+        return self._snapshots.latest()
+
+    def publish(self, force: bool = False) -> Snapshot:
+        '''publish a new snapshot for readers if one is due (or if forced),
+        called after every change'''
+        return self._snapshots.publish(self, force)
+
     def query_lastpriceall(self) -> List[MarketData]:
         '''get last price of all assets'''
         return [m for exs in self._last_price_by_asset_and_exchange.values() for m in exs.values()]
@@ -91,6 +181,32 @@ class QueryEngine(object):
             raise QueryException('Not found!')
         return self._last_price_by_asset_and_exchange[instrument]["ANY"]
 
+    def query_book(self, instrument: Instrument, exchange: ExchangeType) -> Book:
+        '''get the live order book of an asset on an exchange'''
+        if exchange not in self._books or instrument not in self._books[exchange]:
+            raise QueryException('Not found! (order books are kept with order_books set)')
+        return self._books[exchange].book(instrument)
+
+    def query_consolidated(self, instrument: Instrument) -> ConsolidatedBook:
+        '''get the order book of an asset merged across exchanges'''
+        if instrument not in self._consolidated:
+            raise QueryException('Not found!')
+        return self._consolidated[instrument]
+
+    def query_statistics(self,
+                         instrument: Instrument,
+                         exchange: ExchangeType,
+                         window: Union[timedelta, int] = None) -> Union[RollingStatistics, Dict]:
+        '''get rolling statistics of an asset on an exchange, for one window or all windows'''
+        if (instrument, exchange) not in self._statistics:
+            raise QueryException('Not found!')
+        stats = self._statistics[(instrument, exchange)]
+        if window is None:
+            return dict(stats)
+        if window not in stats:
+            raise QueryException('Not found!')
+        return stats[window]
+
     def query_trades(self, instrument: Instrument = None, page: int = 1) -> List[MarketData]:
         '''get trades for instrument'''
         return self._paginate(instrument,
@@ -106,24 +222,63 @@ class QueryEngine(object):
         '''get trade responses for an instrument'''
         return self._paginate(instrument, self._trade_resps, self._trade_resps_by_instrument, page)
 
+    def query_trades_since(self, since: int = 0, instrument: Instrument = None) -> Tuple[List[MarketData], int]:
+        '''get trades stored after cursor `since`, and the next cursor'''
+        return self._since(instrument,
+                           self._trades,
+                           self._trades_by_instrument,
+                           self._trades_cursors,
+                           self._trades_by_instrument_cursors,
+                           since)
+
+    def query_tradereqs_since(self, since: int = 0, instrument: Instrument = None) -> Tuple[List[TradeRequest], int]:
+        '''get trade requests stored after cursor `since`, and the next cursor'''
+        return self._since(instrument,
+                           self._trade_reqs,
+                           self._trade_reqs_by_instrument,
+                           self._trade_reqs_cursors,
+                           self._trade_reqs_by_instrument_cursors,
+                           since)
+
+    def query_traderesps_since(self, since: int = 0, instrument: Instrument = None) -> Tuple[List[TradeResponse], int]:
+        '''get trade responses stored after cursor `since`, and the next cursor'''
+        return self._since(instrument,
+                           self._trade_resps,
+                           self._trade_resps_by_instrument,
+                           self._trade_resps_cursors,
+                           self._trade_resps_by_instrument_cursors,
+                           since)
+
+    def query_pending(self,
+                      strategy=None,
+                      instrument: Instrument = None,
+                      exchange: ExchangeType = None,
+                      side: Side = None) -> List[TradeResponse]:
+        '''get pending orders, optionally filtered by strategy, instrument, exchange and/or side'''
+        return self.pending.select(strategy=strategy, instrument=instrument, exchange=exchange, side=side)
+
     def newPending(self, resp: TradeResponse) -> None:
-        self.pending[resp.order_id] = resp
+        self.pending.add(resp)
 
     def push_tradereq(self, req: TradeRequest) -> None:
         '''append trade request to list'''
-        self._trade_reqs.append(req)
-        if req.instrument not in self._trade_reqs_by_instrument:
-            self._trade_reqs_by_instrument[req.instrument] = []
-        self._trade_reqs_by_instrument[req.instrument].append(req)
+        self._record(req,
+                     req.instrument,
+                     self._trade_reqs,
+                     self._trade_reqs_by_instrument,
+                     self._trade_reqs_cursors,
+                     self._trade_reqs_by_instrument_cursors)
 
     def push_traderesp(self, resp: TradeResponse) -> None:
         '''append trade response to list'''
         if resp.status in (TradeResult.REJECTED, TradeResult.PENDING, TradeResult.NONE):
             return
-        self._trade_resps.append(resp)
-        if resp.instrument not in self._trade_resps_by_instrument:
-            self._trade_resps_by_instrument[resp.instrument] = []
-        self._trade_resps_by_instrument[resp.instrument].append(resp)
+        self._record(resp,
+                     resp.instrument,
+                     self._trade_resps,
+                     self._trade_resps_by_instrument,
+                     self._trade_resps_cursors,
+                     self._trade_resps_by_instrument_cursors)
 
     def onTrade(self, data: MarketData) -> None:
         '''process market data on trade'''
@@ -131,14 +286,13 @@ class QueryEngine(object):
         # append to list of all data so far
         self._all.append(data)
 
-        # append to list of all trades so far
-        self._trades.append(data)
-
-        # if not tracking, initialize list of trades
-        if data.instrument not in self._trades_by_instrument:
-            self._trades_by_instrument[data.instrument] = []
-        # add data to list
-        self._trades_by_instrument[data.instrument].append(data)
+        # append to list of all trades so far, and list of trades by instrument
+        self._record(data,
+                     data.instrument,
+                     self._trades,
+                     self._trades_by_instrument,
+                     self._trades_cursors,
+                     self._trades_by_instrument_cursors)
 
         # if not tracking by exchange
         if data.instrument not in self._last_price_by_asset_and_exchange:
@@ -149,30 +303,13 @@ class QueryEngine(object):
         # set data to be last on ANY exchange
         self._last_price_by_asset_and_exchange[data.instrument]['ANY'] = data
 
-        # if any pending orders for this trade
-        if data.order_id in self.pending.keys():
-            # grab previous pending response
-            resp = self.pending[data.order_id]
-
-            # if they're equal, ignore remaining
-            resp.volume = resp.remaining - data.remaining if resp != data else resp.volume
-            resp.remaining = data.remaining
-
-            # call on fill to strat
-            if resp.strategy:
-                resp.strategy.onFill(resp)
-            else:
-                raise Exception('Response has no corresponding strategy!')
-
-            # update account holdings
-            self.updateAccounts(resp)
+        # update rolling statistics from market trades (not our own fills)
+        if isinstance(data, MarketData):
+            self._update_statistics(data)
 
-            # update porfolio risk
-            self._risk.update(resp)
-
-            # delete pending order if filled
-            if data.remaining <= 0:
-                del self.pending[data.order_id]
+        # if any pending orders for this trade
+        if data.order_id in self.pending:
+            self._fill(data)
         else:
             # price only
             if data.instrument in self.positions:
@@ -184,6 +321,15 @@ class QueryEngine(object):
         # recalculate value of portfolio
         self._recalculate_portfolio(data)
 
+        self.publish()
+
+    def _update_statistics(self, data: MarketData) -> None:
+        key = (data.instrument, data.exchange)
+        if key not in self._statistics:
+            self._statistics[key] = {window: RollingStatistics(window) for window in self._statistics_windows}
+        for stats in self._statistics[key].values():
+            stats.push(data.time, data.price, data.volume)
+
     def onFill(self, resp: TradeResponse) -> None:
         if self._trading_type not in (TradingType.BACKTEST, TradingType.SIMULATION):
             # only used during offline trading
@@ -196,18 +342,46 @@ class QueryEngine(object):
         resp.remaining = 0.0
         self.onTrade(resp)
 
-    def onCancel(self, data: MarketData) -> None:
-        # if pending order
-        if data.order_id in self.pending.keys():
-            # grab response
-            resp = self.pending[data.order_id]
+    def onOrderFill(self, data: MarketData) -> None:
+        '''one of our orders reported filled by the feed, e.g. as taker'''
+        if data.order_id in self.pending:
+            self._fill(data)
 
-            # delete from tracking
+    def _fill(self, data) -> None:
+        # grab previous pending response
+        resp = self.pending[data.order_id]
+
+        # if they're equal, ignore remaining
+        resp.volume = resp.remaining - data.remaining if resp != data else resp.volume
+        resp.remaining = data.remaining
+
+        # call on fill to strat
+        if resp.strategy:
+            self._callbacks.get(resp.strategy, resp.strategy).onFill(resp)
+        else:
+            raise Exception('Response has no corresponding strategy!')
+
+        # update account holdings
+        self.updateAccounts(resp)
+
+        # update porfolio risk
+        self._risk.update(resp)
+
+        # delete pending order if filled
+        if data.remaining <= 0:
             del self.pending[data.order_id]
 
+    def onCancel(self, data: MarketData) -> None:
+        # if pending order
+        if data.order_id in self.pending:
+            # grab response and delete from tracking
+            resp = self.pending.remove(data.order_id)
+
             # tell risk
             self._risk.cancel(resp)
 
+            self.publish()
+
     def updateAccounts(self, resp: TradeResponse = None) -> None:
         '''update the holdings and spot value of accounts'''
 
@@ -215,39 +389,41 @@ class QueryEngine(object):
         if resp:
 
             # get left and right legs
-            account_left = self._accounts[resp.instrument.underlying.value[0]][resp.exchange]
-            account_right = self._accounts[resp.instrument.underlying.value[1]][resp.exchange]
+            account_left = self._accounts.get(resp.exchange, resp.instrument.underlying.value[0])
+            account_right = self._accounts.get(resp.exchange, resp.instrument.underlying.value[1])
 
             if resp.side == Side.BUY:
                 # if buy
                 # 5 BTCUSD @ $2 -> from_btc += volume, to_usd -= price*volume
-                account_left.balance += resp.volume
-                account_right.balance -= resp.volume * resp.price
+                self._accounts.adjust(account_left, resp.volume)
+                self._accounts.adjust(account_right, -resp.volume * resp.price)
             else:
                 # if sell
                 # 5 BTCUSD @ $2 -> from_btc -= volume, to_usd += price*volume
-                account_left.balance -= resp.volume
-                account_right.balance += resp.volume * resp.price
+                self._accounts.adjust(account_left, -resp.volume)
+                self._accounts.adjust(account_right, resp.volume * resp.price)
             # iterate through these
             accounts = (account_left, account_right)
         else:
             # WARNING
             # don't update value on every tick
             log.warn('Iterating through ALL accounts')
-            accounts = iterate_accounts(self.accounts)
+            accounts = list(self._accounts.values())
 
-        # update account values
+        # update account values, the ledger keeps its totals in step
         for account in accounts:
             log.info(f'Updating value of account {account}')
             if account.currency == CurrencyType.USD:
                 # if holding USD, add value
-                account.value = account.balance
+                self._accounts.update(account, value=account.balance)
             else:
                 # calculate USD value
                 price = self._last_price_by_asset_and_exchange[resp.instrument][resp.exchange].price
-                account.value = account.balance * price
+                self._accounts.update(account, value=account.balance * price)
             log.info(f'New value: {account}')
 
+        self.publish()
+
     def update_positions(self, resp: TradeResponse) -> None:
         '''update positions based on a trade'''
         if resp.status in (TradeResult.REJECTED, TradeResult.PENDING, TradeResult.NONE):
@@ -0,0 +1,92 @@
+import asyncio
+import heapq
+import time
+from datetime import timedelta
+from typing import Callable
+from .structs import MarketData
+
+
+class ReorderBuffer(object):
+    '''puts events merged from several feeds back into timestamp order'''
+
+    def __init__(self, emit: Callable[[MarketData], None], lateness: float = 0.1) -> None:
+        self._emit = emit
+        self._lateness = lateness
+        self._lateness_delta = timedelta(seconds=lateness)
+        self._heap = []  # (time, count, arrival, data)
+        self._count = 0  # ties in time keep arrival order
+        self._latest = None  # latest event time seen
+        self._emitted = None  # time of the last event emitted
+        self._timer = None
+
+        # metrics
+        self.late = 0
+        self.max_late = 0.0  # seconds behind the last event emitted
+        self.emitted = 0
+        self.latency = 0.0  # seconds the last event was held
+        self.max_latency = 0.0
+        self.total_latency = 0.0
+
+    def push(self, data: MarketData) -> None:
+        now = time.monotonic()
+        if self._emitted is not None and data.time < self._emitted:
+            self.late += 1
+            self.max_late = max(self.max_late, (self._emitted - data.time).total_seconds())
+            self._release(data, now, now)
+            return
+
+        heapq.heappush(self._heap, (data.time, self._count, now, data))
+        self._count += 1
+        if self._latest is None or data.time > self._latest:
+            self._latest = data.time
+        self.flush(now)
+
+        if self._heap and self._timer is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return
+            self._timer = loop.call_later(self._lateness, self._expire, loop)
+
+    def flush(self, now: float = None) -> None:
+        '''emit whatever the watermark or the wait has released'''
+        now = time.monotonic() if now is None else now
+        watermark = self._latest - self._lateness_delta if self._latest is not None else None
+        heap = self._heap
+        while heap and (heap[0][0] <= watermark or heap[0][2] <= now - self._lateness):
+            event_time, _, arrival, data = heapq.heappop(heap)
+            self._emitted = event_time
+            self._release(data, arrival, now)
+
+    def drain(self) -> None:
+        '''emit everything held, in order'''
+        now = time.monotonic()
+        while self._heap:
+            event_time, _, arrival, data = heapq.heappop(self._heap)
+            self._emitted = event_time
+            self._release(data, arrival, now)
+
+    def _release(self, data: MarketData, arrival: float, now: float) -> None:
+        self.emitted += 1
+        self.latency = now - arrival
+        self.max_latency = max(self.max_latency, self.latency)
+        self.total_latency += self.latency
+        self._emit(data)
+
+    def _expire(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._timer = None
+        self.flush()
+        if self._heap:
+            self._timer = loop.call_later(self._lateness, self._expire, loop)
+
+    def metrics(self) -> dict:
+        return {'buffered': len(self._heap),
+                'emitted': self.emitted,
+                'late': self.late,
+                'max_late': self.max_late,
+                'latency': self.latency,
+                'max_latency': self.max_latency,
+                'mean_latency': self.total_latency / self.emitted if self.emitted else 0.0}
+
+    def __len__(self) -> int:
+        return len(self._heap)
@@ -0,0 +1,179 @@
+import asyncio
+import time
+from typing import Callable
+from .enums import ResyncState, TickType
+from .exceptions import AATException
+from .logging import log
+from .order_book import OrderBook
+from .structs import Instrument, MarketData
+
+
+class _Stream(object):
+    '''sequencing state of one instrument'''
+
+    def __init__(self) -> None:
+        self.state = ResyncState.SYNCING
+        self.sequence = -1
+        self.buffer = []
+        self.requested = False
+        self.started = None
+
+
+class Resync(object):
+    '''keeps an `OrderBook` in step with a sequenced delta stream, resyncing from snapshots'''
+
+    def __init__(self, book: OrderBook, snapshot: Callable[[Instrument], dict], stagger: float = 0.0) -> None:
+        self._book = book
+        self._snapshot = snapshot
+        self._stagger = stagger
+        self._next_request = 0.0
+        self._streams = {}  # instrument -> _Stream
+        self._replaying = False
+
+        # metrics
+        self.resyncs = 0
+        self.failures = 0
+        self.stale = 0
+        self.buffered = 0
+        self.max_buffered = 0
+        self.recovery_time = 0.0
+        self.last_recovery_time = 0.0
+
+    def state(self, instrument: Instrument) -> ResyncState:
+        return self._streams[instrument].state if instrument in self._streams else ResyncState.SYNCING
+
+    def warm(self, instrument: Instrument, sequence: int) -> None:
+        '''mark a book loaded from elsewhere as live at `sequence`'''
+        stream = _Stream()
+        stream.state = ResyncState.LIVE
+        stream.sequence = sequence
+        self._streams[instrument] = stream
+
+    def push(self, data: MarketData) -> None:
+        if data.sequence < 0:
+            self._book.push(data)
+            return
+
+        if data.instrument not in self._streams:
+            self._streams[data.instrument] = _Stream()
+        stream = self._streams[data.instrument]
+
+        if stream.state == ResyncState.SYNCING:
+            self._buffer(data.instrument, stream, data)
+
+        elif data.sequence <= stream.sequence:
+            # already applied, e.g. replayed or in the snapshot
+            if data.type != TickType.HEARTBEAT:
+                self.stale += 1
+
+        elif data.sequence == stream.sequence + 1 and not data.checkpoint:
+            # heartbeats only move the sequence along
+            if data.type != TickType.HEARTBEAT:
+                self._book.push(data)
+            stream.sequence = data.sequence
+            if data.instrument in self._book:
+                self._book.book(data.instrument).sequence = data.sequence
+
+        else:
+            # a checkpoint past the last applied delta means deltas were missed
+            log.warning(f'Sequence gap on {data.instrument}: {stream.sequence} -> {data.sequence}, resyncing')
+            stream.state = ResyncState.SYNCING
+            self._buffer(data.instrument, stream, data)
+
+    def _buffer(self, instrument: Instrument, stream: _Stream, data: MarketData) -> None:
+        stream.buffer.append(data)
+        self.buffered += 1
+        self.max_buffered = max(self.max_buffered, len(stream.buffer))
+
+        if stream.started is None:
+            stream.started = time.monotonic()
+            self.resyncs += 1
+
+        if not stream.requested and not self._replaying:
+            stream.requested = True
+            self._request(instrument)
+
+    def _request(self, instrument: Instrument) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        if loop is None:
+            try:
+                snapshot = self._snapshot(instrument)
+            except Exception as e:
+                self._failed(instrument, e)
+                return
+            self._load(instrument, snapshot)
+            return
+
+        delay = max(0.0, self._next_request - loop.time())
+        self._next_request = loop.time() + delay + self._stagger
+        if delay > 0:
+            loop.call_later(delay, self._fetch, loop, instrument)
+        else:
+            self._fetch(loop, instrument)
+
+    def _fetch(self, loop: asyncio.AbstractEventLoop, instrument: Instrument) -> None:
+        # REST call off the loop, loaded back on it
+        future = loop.run_in_executor(None, self._snapshot, instrument)
+        future.add_done_callback(lambda f: self._loaded(instrument, f))
+
+    def _loaded(self, instrument: Instrument, future: asyncio.Future) -> None:
+        if future.cancelled():
+            self._streams[instrument].requested = False
+            return
+        if future.exception() is not None:
+            self._failed(instrument, future.exception())
+            return
+        self._load(instrument, future.result())
+
+    def _failed(self, instrument: Instrument, error: Exception) -> None:
+        # retried when the next delta arrives, spaced by the stagger
+        log.error(f'Snapshot for {instrument} failed: {error}')
+        self.failures += 1
+        self._streams[instrument].requested = False
+
+    def _load(self, instrument: Instrument, snapshot: dict) -> None:
+        stream = self._streams[instrument]
+        if snapshot['sequence'] < 0:
+            # can't tell which deltas it includes
+            self._failed(instrument, AATException('Snapshot has no sequence number'))
+            return
+
+        self._book.preload(instrument, snapshot['bids'], snapshot['asks'], snapshot['sequence'])
+
+        buffer, stream.buffer = stream.buffer, []
+        stream.state = ResyncState.LIVE
+        stream.sequence = snapshot['sequence']
+        self.buffered -= len(buffer)
+
+        self._replaying = True
+        try:
+            for data in buffer:
+                self.push(data)
+        finally:
+            self._replaying = False
+
+        if stream.state == ResyncState.SYNCING:
+            # gap after the snapshot (or the snapshot is older than the
+            # deltas), the rest was buffered again
+            self._failed(instrument, AATException(f'Snapshot at {snapshot["sequence"]} does not meet the buffered deltas'))
+            return
+
+        stream.requested = False
+        self.last_recovery_time = time.monotonic() - stream.started
+        self.recovery_time += self.last_recovery_time
+        stream.started = None
+        log.info(f'Resynced {instrument} at {stream.sequence} in {self.last_recovery_time:.3f}s')
+
+    def metrics(self) -> dict:
+        return {'resyncs': self.resyncs,
+                'failures': self.failures,
+                'stale': self.stale,
+                'buffered': self.buffered,
+                'max_buffered': self.max_buffered,
+                'recovery_time': self.recovery_time,
+                'last_recovery_time': self.last_recovery_time,
+                'syncing': [str(i) for i, s in self._streams.items() if s.state == ResyncState.SYNCING]}
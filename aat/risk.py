@@ -3,13 +3,13 @@ from typing import List
 from .config import RiskConfig
 from .enums import Side, TradeResult, OrderType, RiskReason, ExchangeType
 from .exchange import Exchange
+from .ledger import Ledger
 from .logging import log
-from .structs import TradeRequest, TradeResponse, Account, Instrument
-from .utils import iterate_accounts
+from .structs import TradeRequest, TradeResponse, Instrument
 
 
 class Risk(object):
-    def __init__(self, options: RiskConfig, exchanges: List[Exchange], accounts: List[Account]) -> None:
+    def __init__(self, options: RiskConfig, exchanges: List[Exchange], accounts: Ledger) -> None:
         self.trading_type = options.trading_type
         self.max_drawdown = options.max_drawdown
         self.max_risk = options.max_risk
@@ -106,10 +106,8 @@ class Risk(object):
     def updateAccounts(self):
         '''update risk numbers'''
         log.critical('risk not fully implemented - updateRisk')
-        value = 0.0
-
-        for account in iterate_accounts(self.accounts):
-            value += account.value
+        # maintained by the ledger, no need to walk the accounts
+        value = self.accounts.value()
 
         if value < self.total_funds:
             log.info(f'restricting total funds from {self.total_funds} to {value}')
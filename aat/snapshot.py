@@ -0,0 +1,98 @@
+import asyncio
+import copy
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import MappingProxyType
+from typing import Mapping, Tuple
+from .structs import Account, Instrument, MarketData
+
+
+def _empty():
+    return MappingProxyType({})
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    '''immutable, versioned view of the query engine's state'''
+    version: int = 0
+    time: datetime = field(default_factory=datetime.now)
+
+    # query engine cursor at the time the snapshot was taken
+    cursor: int = 0
+
+    # instrument -> {volume, avg_price, unrealized, realized}
+    positions: Mapping[Instrument, Mapping[str, float]] = field(default_factory=_empty)
+
+    # instrument -> exchange (or 'ANY') -> last trade
+    last_prices: Mapping[Instrument, Mapping[object, MarketData]] = field(default_factory=_empty)
+
+    accounts: Tuple[Account, ...] = ()
+
+    # most recent trades, oldest first
+    trades: Tuple[MarketData, ...] = ()
+
+
+class SnapshotPublisher(object):
+    '''publishes snapshots at most once every `interval` seconds'''
+
+    def __init__(self, interval: float = 0.25, trades: int = 100) -> None:
+        self.interval = interval
+        self.trades = trades
+        self._last = None
+        self._snapshot = Snapshot()
+        self._dirty = False  # state changed since the last snapshot
+        self._timer = None
+
+    def latest(self) -> Snapshot:
+        return self._snapshot
+
+    def due(self) -> bool:
+        return self._last is None or (time.monotonic() - self._last) >= self.interval
+
+    def publish(self, query, force: bool = False) -> Snapshot:
+        '''build a new snapshot from the query engine if one is due'''
+        if not force and not self.due():
+            self._dirty = True
+            self._schedule(query)
+            return self._snapshot
+
+        positions = {instrument: MappingProxyType({'volume': p._volume,
+                                                   'avg_price': p._avg_price,
+                                                   'unrealized': p._pnl,
+                                                   'realized': p._realized})
+                     for instrument, p in query.positions.items()}
+
+        last_prices = {instrument: MappingProxyType(dict(exchanges))
+                       for instrument, exchanges in query._last_price_by_asset_and_exchange.items()}
+
+        # accounts are mutated in place on fills, so copy them
+        accounts = tuple(copy.copy(account) for account in query.query_accounts())
+
+        snapshot = Snapshot(version=self._snapshot.version + 1,
+                            cursor=query.query_cursor(),
+                            positions=MappingProxyType(positions),
+                            last_prices=MappingProxyType(last_prices),
+                            accounts=accounts,
+                            trades=tuple(query._trades[-self.trades:]) if self.trades else ())
+
+        # single reference swap, readers see either the old or the new snapshot
+        self._snapshot = snapshot
+        self._last = time.monotonic()
+        self._dirty = False
+        return snapshot
+
+    def _schedule(self, query) -> None:
+        '''publish once the interval is up'''
+        if self._timer is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._timer = loop.call_later(self.interval - (time.monotonic() - self._last), self._trailing, query)
+
+    def _trailing(self, query) -> None:
+        self._timer = None
+        if self._dirty:
+            self.publish(query, force=True)
@@ -0,0 +1,121 @@
+import math
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Union
+
+
+class RollingStatistics(object):
+    '''rolling trade statistics over a time or trade count window'''
+
+    def __init__(self, window: Union[timedelta, int]) -> None:
+        self.window = window
+        self._by_time = isinstance(window, timedelta)
+
+        # (index, time, price, volume, log return)
+        self._trades = deque()
+        self._index = 0
+        self._last_price = None
+
+        self._volume = 0.0
+        self._notional = 0.0
+        self._price = 0.0
+        self._returns = 0.0
+        self._returns_sq = 0.0
+
+        # (index, price), prices decreasing / increasing
+        self._highs = deque()
+        self._lows = deque()
+
+    def push(self, time: datetime, price: float, volume: float) -> None:
+        '''add a trade to the window and evict expired ones'''
+        if self._last_price is not None and self._last_price > 0 and price > 0:
+            ret = math.log(price / self._last_price)
+        else:
+            ret = 0.0
+        self._last_price = price
+
+        index = self._index
+        self._index += 1
+        self._trades.append((index, time, price, volume, ret))
+
+        self._volume += volume
+        self._notional += price * volume
+        self._price += price
+        self._returns += ret
+        self._returns_sq += ret * ret
+
+        while self._highs and self._highs[-1][1] <= price:
+            self._highs.pop()
+        self._highs.append((index, price))
+
+        while self._lows and self._lows[-1][1] >= price:
+            self._lows.pop()
+        self._lows.append((index, price))
+
+        self._evict(time)
+
+    def _evict(self, now: datetime) -> None:
+        trades = self._trades
+        if self._by_time:
+            cutoff = now - self.window
+            while trades and trades[0][1] <= cutoff:
+                self._pop()
+        else:
+            while len(trades) > self.window:
+                self._pop()
+
+    def _pop(self) -> None:
+        index, _, price, volume, ret = self._trades.popleft()
+        self._volume -= volume
+        self._notional -= price * volume
+        self._price -= price
+        self._returns -= ret
+        self._returns_sq -= ret * ret
+
+        if self._highs[0][0] == index:
+            self._highs.popleft()
+        if self._lows[0][0] == index:
+            self._lows.popleft()
+
+    @property
+    def count(self) -> int:
+        return len(self._trades)
+
+    @property
+    def volume(self) -> float:
+        return self._volume
+
+    @property
+    def vwap(self) -> float:
+        return self._notional / self._volume if self._volume > 0 else float('nan')
+
+    @property
+    def mean(self) -> float:
+        '''simple average of trade prices'''
+        return self._price / len(self._trades) if self._trades else float('nan')
+
+    @property
+    def high(self) -> float:
+        return self._highs[0][1] if self._highs else float('nan')
+
+    @property
+    def low(self) -> float:
+        return self._lows[0][1] if self._lows else float('nan')
+
+    @property
+    def volatility(self) -> float:
+        '''realized volatility, the square root of the sum of squared log returns'''
+        return math.sqrt(max(self._returns_sq, 0.0))
+
+    def to_dict(self) -> dict:
+        return {'window': str(self.window),
+                'count': self.count,
+                'volume': self.volume,
+                'vwap': self.vwap,
+                'mean': self.mean,
+                'high': self.high,
+                'low': self.low,
+                'volatility': self.volatility}
+
+    def __repr__(self) -> str:
+        return f'<RollingStatistics - {self.window} - {self.count} trades - vwap {self.vwap}>'
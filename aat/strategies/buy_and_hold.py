@@ -5,6 +5,8 @@ from ..logging import log
 
 
 class BuyAndHoldStrategy(TradingStrategy):
+    declines = frozenset({'onOpen', 'onCancel', 'onChange'})
+
     def __init__(self, *args, **kwargs) -> None:
         super(BuyAndHoldStrategy, self).__init__(*args, **kwargs)
         self.bought = {}
@@ -64,6 +66,8 @@ class BuyAndHoldStrategy(TradingStrategy):
 
 
 class BuyAndHoldStrategy2(TradingStrategy):
+    declines = frozenset({'onOpen', 'onCancel', 'onChange'})
+
     def __init__(self, *args, **kwargs) -> None:
         super(BuyAndHoldStrategy2, self).__init__(*args, **kwargs)
         self.sold = None
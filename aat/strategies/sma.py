@@ -5,6 +5,8 @@ from ..logging import log
 
 
 class SMAStrategy(TradingStrategy):
+    declines = frozenset({'onOpen', 'onCancel', 'onChange'})
+
     def __init__(self, long: int = 20, short: int = 5, *args, **kwargs) -> None:
         super(SMAStrategy, self).__init__(*args, **kwargs)
         self.trades = []
@@ -20,6 +20,15 @@ class Strategy(metaclass=ABCMeta):
 
 
 class TradingStrategy(Strategy, Callback):
+    # set to use query_book / query_consolidated: the engine only keeps
+    # order books (and subscribes to the feeds they need) when asked
+    order_books = False
+
+    # handlers not registered with the feeds, e.g. a strategy trading on
+    # trades alone declines onOpen, onCancel and onChange so feeds can
+    # skip those messages
+    declines = frozenset()
+
     def request(self, req: TradeRequest) -> None:
         '''attempt to buy/sell'''
         return self._te.request(req, self)
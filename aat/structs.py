@@ -184,6 +184,9 @@ class MarketData(Struct):
     sequence: int = -1
     order_type: OrderType = OrderType.NONE
     order_id: str = ''
+    trade_id: str = ''
+    # sequence is the last number sent, e.g. on a heartbeat, not this tick's
+    checkpoint: bool = False
 
     def __eq__(self, other):
         return (self.price == other.price) and \
@@ -197,6 +200,43 @@ class MarketData(Struct):
         return self.price < other.price
 
 
+class _Lazy(object):
+    '''a LazyMarketData field, converted on first read and then stored on
+    the instance, where later reads find it directly'''
+
+    def __init__(self, name: str) -> None:
+        self._name = name
+        self._parse = '_parse_' + name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        value = getattr(obj, self._parse)()
+        obj.__dict__[self._name] = value
+        return value
+
+
+class LazyMarketData(MarketData):
+    '''MarketData over a raw exchange message, fields converted when first read'''
+
+    time = _Lazy('time')
+    volume = _Lazy('volume')
+    price = _Lazy('price')
+    type = _Lazy('type')
+    instrument = _Lazy('instrument')
+    side = _Lazy('side')
+    exchange = _Lazy('exchange')
+    remaining = _Lazy('remaining')
+    sequence = _Lazy('sequence')
+    order_type = _Lazy('order_type')
+    order_id = _Lazy('order_id')
+    trade_id = _Lazy('trade_id')
+
+    def __init__(self, jsn: dict, **kwargs) -> None:
+        self._jsn = jsn
+        self.__dict__.update(kwargs)
+
+
 @dataclass
 class TradeRequest(Struct):
     side: Side
@@ -40,6 +40,244 @@ class TestExchange:
                                        'product_id': 'BTCUSD'}
                     e.receive()
 
+    def test_tick_to_data(self):
+        from ...config import ExchangeConfig
+        from ...exchanges.coinbase import CoinbaseExchange
+        from ...enums import TickType, ExchangeType
+
+        ec = ExchangeConfig()
+        ec.exchange_type = ExchangeType.COINBASE
+        e = CoinbaseExchange(ExchangeType.COINBASE, ec)
+
+        base = {'time': '2017-02-19T18:52:17.088000Z',
+                'product_id': 'BTC-USD',
+                'price': '100.0',
+                'side': 'buy'}
+
+        m = e.tickToData(dict(base, type='change', order_id='a', old_size='1.5', new_size='1.0'))
+        assert m.type == TickType.CHANGE
+        assert m.volume == 0.5
+        assert m.remaining == 1.0
+
+        m = e.tickToData(dict(base, type='match', maker_order_id='a', size='0.25'))
+        assert m.type == TickType.TRADE
+        assert m.order_id == 'a'
+        assert m.volume == 0.25
+
+        m = e.tickToData(dict(base, type='done', order_id='a', reason='filled', remaining_size='0'))
+        assert m.type == TickType.FILL
+        assert m.volume == 0.0
+
+        m = e.tickToData(dict(base, type='done', order_id='a', reason='canceled', remaining_size='0.75'))
+        assert m.type == TickType.CANCEL
+        assert m.volume == 0.75
+
+    def test_book_before_callbacks(self):
+        from ...config import ExchangeConfig
+        from ...exchanges.coinbase import CoinbaseExchange
+        from ...enums import TickType, ExchangeType, PairType
+        from ...order_book import L3Book
+        from ...structs import Instrument
+
+        ec = ExchangeConfig()
+        ec.exchange_type = ExchangeType.COINBASE
+        e = CoinbaseExchange(ExchangeType.COINBASE, ec)
+        e.sizes = MagicMock(return_value={})
+
+        btc = Instrument(underlying=PairType.BTCUSD)
+        ob = e.book([btc])
+        assert isinstance(ob.book(btc), L3Book)
+        assert e.sequenced()
+
+        seen = []
+        e.onBook(ob.push)
+        e.onBook(lambda data: seen.append(('book', data.type)))
+        e.onOpen(lambda data: seen.append(('strategy', ob.tob(btc))))
+
+        base = {'time': '2017-02-19T18:52:17.088000Z', 'product_id': 'BTC-USD', 'side': 'buy', 'order_id': 'a'}
+        e.callback_data(dict(base, type='received', sequence=1))
+        e.callback_data(dict(base, type='open', price='100.0', remaining_size='1.0', sequence=2))
+
+        # received is sequenced but only reaches the book feed
+        assert seen[0] == ('book', TickType.HEARTBEAT)
+        assert seen[1] == ('book', TickType.OPEN)
+        assert seen[2] == ('strategy', ((100.0, 1.0), None))
+
+    def test_done_book_only(self):
+        from ...config import ExchangeConfig
+        from ...exchanges.coinbase import CoinbaseExchange
+        from ...enums import TickType, ExchangeType
+
+        ec = ExchangeConfig()
+        e = CoinbaseExchange(ExchangeType.COINBASE, ec)
+
+        fills, book = [], []
+        e.onFill(fills.append)
+        # nothing wants the market's done messages without a book
+        assert TickType.FILL not in e.subscribed()
+
+        e.onBook(book.append)
+        base = {'time': '2017-02-19T18:52:17.088000Z', 'product_id': 'BTC-USD', 'side': 'buy', 'price': '100.0'}
+        e.callback_data(dict(base, type='done', order_id='someone-elses', reason='filled', remaining_size='0', sequence=1))
+        assert [data.type for data in book] == [TickType.FILL]
+        assert fills == []
+
+    def test_taker_fill(self):
+        from datetime import datetime
+        from ...config import ExchangeConfig
+        from ...exchanges.coinbase import CoinbaseExchange
+        from ...enums import TickType, ExchangeType, PairType, Side, TradeResult, TradingType
+        from ...query import QueryEngine
+        from ...structs import Instrument, TradeResponse
+
+        ec = ExchangeConfig()
+        e = CoinbaseExchange(ExchangeType.COINBASE, ec)
+        query = QueryEngine(trading_type=TradingType.LIVE, risk=MagicMock())
+        query.updateAccounts = MagicMock()
+        query._recalculate_portfolio = MagicMock()
+        e.onTrade(query.onTrade)
+        e.onOrderFill(query.onOrderFill)
+        assert TickType.FILL in e.subscribed()
+
+        strategy = MagicMock()
+        resp = TradeResponse(request=None, side=Side.BUY, exchange=ExchangeType.COINBASE, volume=0.5, price=100.0,
+                             instrument=Instrument(underlying=PairType.BTCUSD), time=datetime.now(),
+                             status=TradeResult.PENDING, order_id='ours', remaining=0.5, strategy=strategy)
+        query.newPending(resp)
+
+        # as taker, the match carries the maker's order id and only done names ours
+        base = {'time': '2017-02-19T18:52:17.088000Z', 'product_id': 'BTC-USD', 'side': 'sell', 'price': '100.0'}
+        e.callback_data(dict(base, type='match', maker_order_id='theirs', taker_order_id='ours', size='0.5', trade_id=1, sequence=1))
+        assert 'ours' in query.pending
+        e.callback_data(dict(base, type='done', order_id='ours', reason='filled', remaining_size='0', sequence=2))
+        assert 'ours' not in query.pending
+        strategy.onFill.assert_called_once_with(resp)
+        assert resp.volume == 0.5 and resp.remaining == 0.0
+        query.updateAccounts.assert_called_once_with(resp)
+
+        # someone else's done is still kept from the callbacks
+        e.callback_data(dict(base, type='done', order_id='theirs', reason='filled', remaining_size='0', sequence=3))
+        assert strategy.onFill.call_count == 1
+
+    def test_heartbeat_channel(self):
+        from ...config import ExchangeConfig
+        from ...exchanges.coinbase import CoinbaseExchange
+        from ...enums import ExchangeType, PairType, ResyncState, Side
+        from ...resync import Resync
+        from ...structs import Instrument
+
+        ec = ExchangeConfig()
+        e = CoinbaseExchange(ExchangeType.COINBASE, ec)
+        e.sizes = MagicMock(return_value={})
+        btc = Instrument(underlying=PairType.BTCUSD)
+        ob = e.book([btc])
+        snapshot = MagicMock(return_value={'bids': [], 'asks': [], 'sequence': 1})
+        resync = Resync(ob, snapshot)
+        e.onBook(resync.push)
+
+        base = {'time': '2017-02-19T18:52:17.088000Z', 'product_id': 'BTC-USD', 'side': 'buy', 'remaining_size': '1.0'}
+        e.callback_data(dict(base, type='open', order_id='a', price='100.0', sequence=2))
+        e.callback_data(dict(base, type='open', order_id='b', price='99.0', sequence=3))
+        # a received message takes a sequence number of its own
+        e.callback_data(dict(base, type='received', order_id='c', sequence=4))
+        # a channel heartbeat repeats the last one sent, nothing is missing
+        e.callback_data({'type': 'heartbeat', 'product_id': 'BTC-USD', 'sequence': 4, 'time': base['time']})
+        assert resync.state(btc) == ResyncState.LIVE
+        assert snapshot.call_count == 1
+
+        # 5 is lost, the heartbeat says it was sent
+        e.callback_data({'type': 'heartbeat', 'product_id': 'BTC-USD', 'sequence': 5, 'time': base['time']})
+        assert snapshot.call_count == 2
+        assert ob.book(btc).level(Side.BUY, 100.0) == 0.0
+
+        e._seqnum_enabled = True
+        e.seqnum(10, btc)
+        e.seqnum(12, btc, checkpoint=True)
+        e.seqnum(12, btc, checkpoint=True)
+        assert e.gaps()[str(btc)]['missing_ranges'] == [(11, 13)]
+        assert e.gaps()[str(btc)]['duplicates'] == 0
+
+    def test_prefilter(self):
+        from ...config import ExchangeConfig
+        from ...exchanges.coinbase import CoinbaseExchange
+        from ...enums import TickType, ExchangeType, PairType
+
+        ec = ExchangeConfig()
+        ec.exchange_type = ExchangeType.COINBASE
+        e = CoinbaseExchange(ExchangeType.COINBASE, ec)
+
+        trades = []
+        e.onTrade(trades.append)
+        assert e.subscribed() == {TickType.TRADE}
+
+        base = {'time': '2017-02-19T18:52:17.088000Z', 'product_id': 'BTC-USD', 'side': 'buy', 'price': '100.0'}
+        e.callback_data(dict(base, type='open', order_id='a', remaining_size='1.0', sequence=1))
+        e.callback_data(dict(base, type='match', maker_order_id='a', size='0.5', sequence=2))
+        assert len(trades) == 1
+
+        # only what is read gets converted
+        m = trades[0]
+        assert 'price' not in m.__dict__
+        assert m.price == 100.0
+        assert m.instrument.underlying == PairType.BTCUSD
+        assert 'price' in m.__dict__ and 'time' not in m.__dict__
+        assert m.to_dict()['volume'] == 0.5
+
+        # books take everything
+        e.onBook(lambda data: None)
+        assert TickType.OPEN in e.subscribed()
+
+    def test_subscription(self):
+        import json
+        from ...config import ExchangeConfig
+        from ...exchanges.coinbase import CoinbaseExchange
+        from ...enums import ExchangeType, PairType
+
+        ec = ExchangeConfig()
+        ec.currency_pairs = [PairType.BTCUSD, PairType.ETHUSD]
+        e = CoinbaseExchange(ExchangeType.COINBASE, ec)
+
+        # trades only, one message for all products
+        e.onTrade(lambda data: None)
+        subs = [json.loads(sub) for sub in e.subscription()]
+        assert subs == [{'type': 'subscribe', 'product_ids': ['BTC-USD', 'ETH-USD'], 'channels': ['matches', 'heartbeat']}]
+
+        # our own cancels come from the user channel, when there are keys
+        e.onOrderCancel(lambda data: None)
+        assert json.loads(e.subscription()[0])['channels'] == ['matches', 'heartbeat']
+        client = MagicMock(apiKey='key', secret='c2VjcmV0', password='pass')
+        with patch.object(CoinbaseExchange, 'oe_client', return_value=client):
+            sub = json.loads(e.subscription()[0])
+        assert sub['channels'] == ['matches', 'heartbeat', 'user']
+        assert sub['key'] == 'key' and sub['passphrase'] == 'pass'
+        assert sub['signature'] and sub['timestamp']
+
+        # anything on the book needs every order
+        e.onOpen(lambda data: None)
+        assert json.loads(e.subscription()[0])['channels'] == ['full', 'heartbeat']
+
+    def test_declined_handlers(self):
+        from ...config import ExchangeConfig
+        from ...exchanges.coinbase import CoinbaseExchange
+        from ...enums import TickType, ExchangeType
+        from ...callback import NullCallback
+
+        class Trades(NullCallback):
+            declines = frozenset({'onOpen', 'onCancel', 'onChange'})
+
+        ec = ExchangeConfig()
+        e = CoinbaseExchange(ExchangeType.COINBASE, ec)
+        e.registerCallback(Trades())
+        cancels = []
+        e.onOrderCancel(cancels.append)
+        assert TickType.OPEN not in e.subscribed()
+        assert not e._market_orders()
+
+        base = {'time': '2017-02-19T18:52:17.088000Z', 'product_id': 'BTC-USD', 'side': 'buy', 'price': '100.0'}
+        assert e.toData(dict(base, type='open', order_id='a', remaining_size='1.0')) is None
+        e.callback_data(dict(base, type='done', order_id='mine', reason='canceled', remaining_size='1.0', sequence=1))
+        assert [data.order_id for data in cancels] == ['mine']
+
     # def test_seqnum_fix(self):
     #     from ...lib.config import ExchangeConfig
     #     from ...lib.exchanges.gdax import GDAXExchange
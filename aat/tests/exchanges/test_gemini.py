@@ -54,3 +54,67 @@ class TestExchange:
                                                    "price": "1059.54"
                                                    }]}
                     e.receive()
+
+    def test_trade_id(self):
+        from ...config import ExchangeConfig
+        from ...exchanges.gemini import GeminiExchange
+        from ...enums import TickType, ExchangeType
+
+        e = GeminiExchange(ExchangeType.GEMINI, ExchangeConfig())
+
+        # market trade
+        m = e.tickToData({'type': 'trade', 'tid': 5, 'price': '100.0', 'amount': '1.0', 'symbol': 'BTCUSD'})
+        assert m.type == TickType.TRADE
+        assert m.trade_id == '5'
+
+        # fills of one of our orders share its order id, not their trade id
+        fills = [e.tickToData({'type': 'fill', 'order_id': '123', 'price': '100.0', 'symbol': 'BTCUSD', 'fill': {'trade_id': trade_id}})
+                 for trade_id in ('7', '8')]
+        assert [m.order_id for m in fills] == ['123', '123']
+        assert [m.trade_id for m in fills] == ['7', '8']
+
+    def test_time(self):
+        from datetime import datetime
+        from ...config import ExchangeConfig
+        from ...exchanges.gemini import GeminiExchange
+        from ...enums import ExchangeType
+
+        e = GeminiExchange(ExchangeType.GEMINI, ExchangeConfig())
+        # exchange time in UTC, whatever the local timezone
+        m = e.tickToData({'type': 'trade', 'tid': 5, 'price': '100.0', 'amount': '1.0', 'symbol': 'BTCUSD', 'timestampms': 1478203017455})
+        assert m.time == datetime(2016, 11, 3, 19, 56, 57, 455000)
+
+    def test_socket_closed(self):
+        import asyncio
+        import aiohttp
+        import json
+        from ...config import ExchangeConfig
+        from ...exchanges.gemini import GeminiExchange
+        from ...enums import ExchangeType, PairType
+
+        class WS(object):
+            def __init__(self, frames, forever=False):
+                self._frames = frames
+                self._forever = forever
+
+            def __aiter__(self):
+                return self
+
+            async def __anext__(self):
+                if self._frames:
+                    return self._frames.pop(0)
+                if self._forever:
+                    await asyncio.sleep(0.01)
+                    return aiohttp.WSMessage(aiohttp.WSMsgType.TEXT, json.dumps({'type': 'heartbeat'}), None)
+                raise StopAsyncIteration
+
+        ec = ExchangeConfig()
+        ec.currency_pairs = [PairType.BTCUSD, PairType.ETHUSD]
+        e = GeminiExchange(ExchangeType.GEMINI, ec)
+        # ETHUSD closes, BTCUSD and the private stream keep going
+        e.ws = [WS([], forever=True), WS([]), WS([], forever=True)]
+
+        async def run():
+            await asyncio.wait_for(e.receive(), 1)
+
+        asyncio.run(run())
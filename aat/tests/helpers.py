@@ -0,0 +1,42 @@
+from datetime import datetime
+
+
+def market_data(pair=None, **kwargs):
+    '''a BTCUSD trade on Coinbase, any field overridden by keyword'''
+    from ..structs import MarketData, Instrument
+    from ..enums import TickType, Side, PairType, ExchangeType
+    fields = dict(time=datetime.now(),
+                  volume=1.0,
+                  price=100.0,
+                  type=TickType.TRADE,
+                  instrument=Instrument(underlying=pair or PairType.BTCUSD),
+                  side=Side.BUY,
+                  exchange=ExchangeType.COINBASE)
+    fields.update(kwargs)
+    return MarketData(**fields)
+
+
+def trade_response(pair=None, **kwargs):
+    '''a pending BTCUSD buy on Coinbase, any field overridden by keyword'''
+    from ..structs import TradeResponse, Instrument
+    from ..enums import TradeResult, Side, PairType, ExchangeType
+    fields = dict(request=None,
+                  side=Side.BUY,
+                  exchange=ExchangeType.COINBASE,
+                  volume=1.0,
+                  price=1.0,
+                  instrument=Instrument(underlying=pair or PairType.BTCUSD),
+                  time=datetime.now(),
+                  status=TradeResult.PENDING)
+    fields.update(kwargs)
+    return TradeResponse(**fields)
+
+
+def account(exchange, currency, balance, value):
+    from ..structs import Account
+    return Account(id=f'{exchange}-{currency}',
+                   currency=currency,
+                   balance=balance,
+                   exchange=exchange,
+                   value=value,
+                   asOf=datetime.now())
@@ -1,7 +1,9 @@
 from ..backtest import *
+from ..book_store import *
 from ..callback import *
 from ..config import *
 from ..data_source import *
+from ..dedup import *
 from ..define import *
 from ..enums import *
 from ..exceptions import *
@@ -11,13 +13,20 @@ from ..exchanges.gemini import *
 from ..exchanges.kraken import *
 from ..exchanges.poloniex import *
 from ..execution import *
+from ..interval_set import *
+from ..ledger import *
 from ..logging import *
 from ..market_data import *
 from ..order_book import *
 from ..order_entry import *
 from ..parser import *
+from ..pending import *
 from ..query import *
+from ..reorder import *
+from ..resync import *
 from ..risk import *
+from ..snapshot import *
+from ..statistics import *
 from ..strategy import *
 from ..structs import *
 from ..trading import *
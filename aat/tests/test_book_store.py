@@ -0,0 +1,100 @@
+import os
+import tempfile
+import time
+from .helpers import market_data
+
+
+class TestBookStore:
+    def setup(self):
+        from ..book_store import BookStore
+        from ..structs import Instrument
+        from ..enums import PairType
+
+        self.instrument = Instrument(underlying=PairType.BTCUSD)
+        self.path = tempfile.mkdtemp()
+        self.store = BookStore(self.path)
+
+    def test_round_trip(self):
+        from ..book_store import dump_book, load_book
+        from ..order_book import Book
+        from ..enums import Side
+
+        book = Book(self.instrument)
+        book.load([(100.01, 1.5), (99.99, 2.0)], [(100.5, 0.25)])
+        book.sequence = 42
+
+        copy = Book(self.instrument)
+        assert load_book(copy, dump_book(book)) <= time.time()
+        assert copy.levels(5) == book.levels(5)
+        assert copy.sequence == 42
+        assert copy.level(Side.BUY, 100.01) == 1.5
+
+    def test_round_trip_orders(self):
+        from ..book_store import dump_book, load_book
+        from ..order_book import L3Book
+        from ..enums import Side, TickType
+
+        book = L3Book(self.instrument)
+        book.push(market_data(type=TickType.OPEN, price=100.0, volume=1.0, side=Side.BUY, order_id='a'))
+        book.push(market_data(type=TickType.OPEN, price=100.0, volume=2.0, side=Side.BUY, order_id='b'))
+        book.push(market_data(type=TickType.OPEN, price=101.0, volume=3.0, side=Side.SELL, order_id='c'))
+
+        copy = L3Book(self.instrument)
+        load_book(copy, dump_book(book))
+        assert copy.levels(5) == book.levels(5)
+        # time priority survives
+        assert copy.queue_position('b') == (1, 1.0)
+        assert 'c' in copy
+
+    def test_store(self):
+        from ..order_book import OrderBook
+        from ..enums import ExchangeType
+
+        ob = OrderBook([self.instrument])
+        ob.preload(self.instrument, [(99.0, 1.0)], [(101.0, 2.0)], 7)
+        self.store.save(ExchangeType.COINBASE, ob)
+        assert os.listdir(self.path) == ['COINBASE-BTC-USD.book']
+
+        warm = OrderBook([self.instrument])
+        assert self.store.load(ExchangeType.COINBASE, warm) == {self.instrument: 7}
+        assert warm.tob(self.instrument) == ((99.0, 1.0), (101.0, 2.0))
+
+        # too old
+        assert self.store.load(ExchangeType.COINBASE, OrderBook([self.instrument]), max_age=-1) == {}
+
+        # nothing there
+        assert self.store.load(ExchangeType.GEMINI, OrderBook([self.instrument])) == {}
+
+    def test_corrupt(self):
+        from ..order_book import OrderBook
+        from ..enums import ExchangeType
+
+        with open(self.store.filename(ExchangeType.COINBASE, self.instrument), 'wb') as fp:
+            fp.write(b'AATB\x01')
+        assert self.store.load(ExchangeType.COINBASE, OrderBook([self.instrument])) == {}
+
+    def test_warm_resync(self):
+        from mock import MagicMock
+        from ..order_book import OrderBook
+        from ..resync import Resync
+        from ..enums import ExchangeType, ResyncState, Side, TickType
+
+        ob = OrderBook([self.instrument])
+        ob.preload(self.instrument, [(99.0, 1.0)], [], 7)
+        self.store.save(ExchangeType.COINBASE, ob)
+
+        warm = OrderBook([self.instrument])
+        snapshot = MagicMock(return_value={'bids': [], 'asks': [], 'sequence': 20})
+        resync = Resync(warm, snapshot)
+        for instrument, sequence in self.store.load(ExchangeType.COINBASE, warm).items():
+            resync.warm(instrument, sequence)
+
+        # carries on from the snapshot without a REST call
+        resync.push(market_data(type=TickType.CHANGE, price=99.0, volume=0.5, side=Side.BUY, sequence=8))
+        assert resync.state(self.instrument) == ResyncState.LIVE
+        assert snapshot.call_count == 0
+        assert warm.book(self.instrument).sequence == 8
+
+        # a gap falls back to a resync
+        resync.push(market_data(type=TickType.CHANGE, price=99.0, volume=0.5, side=Side.BUY, sequence=21))
+        assert snapshot.call_count == 1
@@ -36,3 +36,161 @@ class TestCallback:
         pc = Print(onError=False)
         assert pc.onError == False
         assert pc.onTrade('test-print_onTrade') == None
+
+    def test_conflating_callback(self):
+        import asyncio
+        from datetime import datetime
+        from ..callback import ConflatingCallback, NullCallback
+        from ..enums import ExchangeType, PairType, Side, TickType
+        from ..structs import Instrument, MarketData
+
+        def tick(price, type=TickType.TRADE, pair=PairType.BTCUSD):
+            return MarketData(time=datetime.now(), volume=1.0, price=price, type=type,
+                              instrument=Instrument(underlying=pair), side=Side.BUY, exchange=ExchangeType.COINBASE)
+
+        class Slow(NullCallback):
+            def __init__(self):
+                self.seen = []
+
+            async def onTrade(self, data):
+                self.seen.append((data.instrument.underlying, data.price))
+                await asyncio.sleep(0.01)
+
+            def onOpen(self, data):
+                self.seen.append(('open', data.price))
+
+        consumer = Slow()
+        cc = ConflatingCallback(consumer)
+
+        async def run():
+            cc.onTrade(tick(1.0))
+            await asyncio.sleep(0)
+            # consumer busy with 1.0, these pile up behind it
+            cc.onTrade(tick(2.0))
+            cc.onTrade(tick(10.0, pair=PairType.ETHUSD))
+            cc.onOpen(tick(5.0, type=TickType.OPEN))
+            cc.onTrade(tick(3.0))
+            while cc.metrics()['depth']:
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0.02)
+
+        asyncio.run(run())
+        # latest per key, in order of first arrival
+        assert consumer.seen == [(PairType.BTCUSD, 1.0), (PairType.BTCUSD, 3.0), (PairType.ETHUSD, 10.0), ('open', 5.0)]
+        metrics = cc.metrics()
+        assert (metrics['delivered'], metrics['dropped'], metrics['depth'], metrics['max_depth']) == (4, 1, 0, 3)
+
+        # no loop, straight through
+        consumer = NullCallback()
+        cc = ConflatingCallback(consumer)
+        cc.onChange(tick(1.0, type=TickType.CHANGE))
+        cc.onChange(tick(2.0, type=TickType.CHANGE))
+        assert cc.delivered == 2 and cc.dropped == 0
+
+    def test_queued_callback(self):
+        import asyncio
+        from datetime import datetime
+        from ..callback import QueuedCallback, NullCallback
+        from ..enums import ExchangeType, OverflowPolicy, PairType, Side, TickType
+        from ..structs import Instrument, MarketData
+
+        def tick(price, pair=PairType.BTCUSD):
+            return MarketData(time=datetime.now(), volume=1.0, price=price, type=TickType.TRADE,
+                              instrument=Instrument(underlying=pair), side=Side.BUY, exchange=ExchangeType.COINBASE)
+
+        class Slow(NullCallback):
+            def __init__(self):
+                self.seen = []
+
+            async def onTrade(self, data):
+                self.seen.append(data.price)
+                await asyncio.sleep(0.01)
+
+            def onFill(self, resp):
+                self.seen.append(resp)
+
+        def run(policy, feed):
+            consumer = Slow()
+            qc = QueuedCallback(consumer, maxsize=2, policy=policy)
+
+            async def main():
+                await feed(qc)
+                while qc.metrics()['depth']:
+                    await asyncio.sleep(0.01)
+                await asyncio.sleep(0.02)
+
+            asyncio.run(main())
+            return consumer.seen, qc.metrics()
+
+        async def burst(qc):
+            qc.onTrade(tick(1.0))
+            await asyncio.sleep(0)
+            # consumer busy with 1.0
+            qc.onFill('fill')
+            qc.onTrade(tick(2.0))
+            qc.onTrade(tick(3.0))
+            qc.onTrade(tick(4.0, pair=PairType.ETHUSD))
+
+        seen, metrics = run(OverflowPolicy.DROP_OLDEST, burst)
+        # fills are never dropped
+        assert seen == [1.0, 'fill', 4.0]
+        assert metrics['dropped'] == 2
+
+        seen, metrics = run(OverflowPolicy.CONFLATE, burst)
+        assert seen == [1.0, 'fill', 4.0]
+        assert metrics['dropped'] == 2
+
+        async def blocking(qc):
+            for i in range(5):
+                qc.onTrade(tick(float(i)))
+                await qc.backpressure()
+                assert qc.metrics()['depth'] < 2
+
+        seen, metrics = run(OverflowPolicy.BLOCK, blocking)
+        assert seen == [0.0, 1.0, 2.0, 3.0, 4.0]
+        assert metrics['dropped'] == 0
+        assert metrics['delivered'] == 5
+        assert metrics['max_lag'] > 0
+
+        # no loop, straight through
+        consumer = NullCallback()
+        qc = QueuedCallback(consumer)
+        qc.onChange(tick(1.0))
+        assert qc.delivered == 1
+
+    def test_queued_batches(self):
+        import asyncio
+        from ..callback import QueuedCallback, NullCallback
+
+        class Batched(NullCallback):
+            def __init__(self):
+                self.batches = []
+
+            def onTradeBatch(self, data):
+                self.batches.append(data)
+
+        # only what the callback opted into
+        assert not hasattr(QueuedCallback(NullCallback()), 'onTradeBatch')
+        consumer = Batched()
+        qc = QueuedCallback(consumer)
+        assert not hasattr(qc, 'onOpenBatch')
+
+        async def run():
+            qc.onTradeBatch([1, 2])
+            qc.onTradeBatch([3])
+            assert consumer.batches == []
+            await asyncio.sleep(0.01)
+
+        asyncio.run(run())
+        assert consumer.batches == [[1, 2], [3]]
+
+    def test_queued_declined(self):
+        from ..callback import QueuedCallback, NullCallback
+
+        class Trades(NullCallback):
+            declines = frozenset({'onOpen'})
+
+        # declined handlers stay declined through the queue
+        qc = QueuedCallback(Trades())
+        assert qc.declines == {'onOpen'}
+        assert QueuedCallback(NullCallback()).declines == frozenset()
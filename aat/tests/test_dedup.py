@@ -0,0 +1,62 @@
+from .helpers import market_data
+
+
+class TestDeduplicator:
+    def test_duplicate(self):
+        from ..dedup import Deduplicator
+        from ..enums import ExchangeType
+
+        dedup = Deduplicator()
+        assert not dedup.duplicate(market_data(sequence=1))
+        assert dedup.duplicate(market_data(sequence=1))
+        assert not dedup.duplicate(market_data(sequence=2))
+
+        # trade ids without a sequence, per exchange
+        assert not dedup.duplicate(market_data(trade_id='t1'))
+        assert dedup.duplicate(market_data(trade_id='t1'))
+        assert not dedup.duplicate(market_data(trade_id='t1', exchange=ExchangeType.GEMINI))
+
+        # partial fills of one order are separate trades
+        assert not dedup.duplicate(market_data(trade_id='t2', order_id='123'))
+        assert not dedup.duplicate(market_data(trade_id='t3', order_id='123'))
+
+        # nothing to tell them apart by
+        assert not dedup.duplicate(market_data())
+        assert not dedup.duplicate(market_data(order_id='123'))
+        assert not dedup.duplicate(market_data(order_id='123'))
+        assert dedup.metrics() == {'duplicates': 2, 'evicted': 0, 'size': 6}
+
+    def test_bounded(self):
+        import time
+        from ..dedup import Deduplicator
+
+        dedup = Deduplicator(maxsize=2)
+        for i in range(3):
+            dedup.duplicate(market_data(sequence=i))
+        assert len(dedup) == 2
+        assert not dedup.duplicate(market_data(sequence=0))
+        assert dedup.evicted == 2
+
+        dedup = Deduplicator(window=0.01)
+        dedup.duplicate(market_data(sequence=1))
+        time.sleep(0.02)
+        dedup.duplicate(market_data(sequence=2))
+        assert len(dedup) == 1
+        assert not dedup.duplicate(market_data(sequence=1))
+
+    def test_exchange(self):
+        from ..config import ExchangeConfig
+        from ..enums import ExchangeType
+        from ..exchanges.coinbase import CoinbaseExchange
+
+        e = CoinbaseExchange(ExchangeType.COINBASE, ExchangeConfig())
+        trades, book = [], []
+        e.onTrade(trades.append)
+        e.onBook(book.append)
+
+        # replayed after a reconnect
+        for sequence in (1, 2, 1, 2, 3):
+            e.dispatch(market_data(sequence=sequence))
+        assert [t.sequence for t in trades] == [1, 2, 3]
+        # books sort out their own repeats
+        assert len(book) == 5
@@ -29,3 +29,192 @@ class TestExchange:
             assert False
         except:
             assert True
+
+    def test_sizes(self):
+        import ccxt
+        from mock import MagicMock
+        from ..config import ExchangeConfig
+        from ..enums import ExchangeType, PairType
+        from ..exchanges.coinbase import CoinbaseExchange
+        from ..structs import Instrument
+
+        e = CoinbaseExchange(ExchangeType.COINBASE, ExchangeConfig())
+        client = MagicMock()
+        client.precisionMode = ccxt.TICK_SIZE
+        client.fetch_markets.return_value = [{'symbol': 'BTC/USD', 'precision': {'price': 0.01, 'amount': 1e-08}},
+                                             {'symbol': 'ETH/USD', 'precision': {'price': None, 'amount': 1e-08}}]
+        e.oe_client = MagicMock(return_value=client)
+
+        assert e.sizes() == {Instrument(underlying=PairType.BTCUSD): (0.01, 1e-08)}
+
+        client.precisionMode = ccxt.DECIMAL_PLACES
+        client.fetch_markets.return_value = [{'symbol': 'BTC/USD', 'precision': {'price': 2, 'amount': 8}}]
+        e = CoinbaseExchange(ExchangeType.COINBASE, ExchangeConfig())
+        e.oe_client = MagicMock(return_value=client)
+        assert e.sizes() == {Instrument(underlying=PairType.BTCUSD): (0.01, 1e-08)}
+
+    def test_receive_batch(self):
+        import asyncio
+        import aiohttp
+        import json
+        from collections import deque
+        from ..config import ExchangeConfig
+        from ..enums import ExchangeType
+        from ..exchanges.coinbase import CoinbaseExchange
+
+        class Reader(object):
+            def __init__(self, frames):
+                self._buffer = deque(frames)
+
+        class WS(object):
+            '''first frame arrives alone, the rest are buffered behind it'''
+            def __init__(self, frames):
+                self._reader = Reader(frames)
+
+            async def receive(self):
+                return self._reader._buffer.popleft()
+
+        base = {'time': '2017-02-19T18:52:17.088000Z', 'product_id': 'BTC-USD', 'side': 'buy', 'price': '100.0'}
+        frames = [aiohttp.WSMessage(aiohttp.WSMsgType.TEXT, json.dumps(dict(base, **msg)), None) for msg in
+                  ({'type': 'open', 'order_id': 'a', 'remaining_size': '1.0', 'sequence': 1},
+                   {'type': 'match', 'maker_order_id': 'a', 'size': '0.5', 'sequence': 2},
+                   {'type': 'received', 'order_id': 'b', 'sequence': 3},
+                   {'type': 'match', 'maker_order_id': 'a', 'size': '0.5', 'sequence': 4})]
+        frames.append(aiohttp.WSMessage(aiohttp.WSMsgType.CLOSED, None, None))
+
+        ec = ExchangeConfig()
+        ec.batch_receive = True
+        e = CoinbaseExchange(ExchangeType.COINBASE, ec)
+        e.ws = WS(frames)
+
+        seen = []
+        e.onBook(lambda data: seen.append(('book', data.sequence)))
+        e.onTrade(lambda data: seen.append(('trade', data.sequence)))
+        e.onOpen(lambda data: seen.append(('open', data.sequence)))
+        e.onTradeBatch(lambda data: seen.append(('trades', [d.sequence for d in data])))
+
+        asyncio.run(e.receive())
+        # per tick callbacks see the books as of their own tick
+        assert seen == [('book', 1), ('open', 1), ('book', 2), ('trade', 2), ('book', 3), ('book', 4), ('trade', 4),
+                        ('trades', [2, 4])]
+
+    def test_register_batch(self):
+        from mock import MagicMock
+        from ..callback import NullCallback, QueuedCallback
+        from ..config import ExchangeConfig
+        from ..enums import ExchangeType, TickType
+        from ..exchanges.coinbase import CoinbaseExchange
+
+        class Batched(NullCallback):
+            def __init__(self):
+                self.batches = []
+
+            def onTradeBatch(self, data):
+                self.batches.append(data)
+
+        e = CoinbaseExchange(ExchangeType.COINBASE, ExchangeConfig())
+        cb = Batched()
+        cb.onTrade = MagicMock()
+        e.registerCallback(cb)
+
+        # opted in callbacks take lists, one at a time is a list of one
+        e.callback(TickType.TRADE, 'tick')
+        assert cb.batches == [['tick']]
+        assert cb.onTrade.call_count == 0
+        assert TickType.TRADE in e.subscribed()
+
+        # queued callbacks can hold up the feed
+        queued = QueuedCallback(NullCallback())
+        e.registerCallback(queued)
+        assert e._backpressure == [queued.backpressure]
+
+    def test_seqnum(self):
+        from ..config import ExchangeConfig
+        from ..enums import ExchangeType
+        from ..exchanges.coinbase import CoinbaseExchange
+
+        e = CoinbaseExchange(ExchangeType.COINBASE, ExchangeConfig())
+        e.seqnum(1, 'BTC')
+        e.seqnum(2, 'BTC')
+        e.seqnum(10 ** 7, 'BTC')
+        e.seqnum(5, 'BTC')
+        e.seqnum(1, 'ETH')
+        e.seqnum(3, 'ETH')
+
+        # seen already, the gaps stay as they were
+        e.seqnum(10 ** 7, 'BTC')
+        e.seqnum(1, 'ETH')
+
+        gaps = e.gaps()
+        assert gaps['BTC'] == {'last': 10 ** 7, 'gaps': 1, 'max_gap': 10 ** 7 - 3, 'late': 1, 'duplicates': 1, 'resets': 0,
+                               'missing': 10 ** 7 - 4, 'missing_ranges': [(3, 5), (6, 10 ** 7)]}
+        assert gaps['ETH']['missing_ranges'] == [(2, 3)]
+        assert gaps['ETH']['duplicates'] == 1
+
+        # a short run back is a replay
+        for number in list(range(1, 11)) + [7, 8, 9, 10, 11]:
+            e.seqnum(number, 'LTC')
+        gaps = e.gaps()['LTC']
+        assert (gaps['resets'], gaps['duplicates'], gaps['last']) == (0, 4, 11)
+
+        # counting on from below is the feed starting over, however close
+        e.seqnum(13, 'LTC')
+        for number in range(1, 6):
+            e.seqnum(number, 'LTC')
+        gaps = e.gaps()['LTC']
+        assert (gaps['resets'], gaps['duplicates'], gaps['last'], gaps['missing']) == (1, 4, 5, 0)
+        e.seqnum(6, 'LTC')
+        assert e.gaps()['LTC']['last'] == 6
+
+    def test_reconnect(self):
+        import asyncio
+        import aiohttp
+        from mock import MagicMock
+        from ..config import ExchangeConfig
+        from ..enums import ExchangeType
+        from ..exchanges.coinbase import CoinbaseExchange
+
+        ec = ExchangeConfig()
+        ec.reconnect_delay = 0.01
+        ec.reconnect_max_delay = 0.02
+        ec.stall_timeout = 0.05
+        e = CoinbaseExchange(ExchangeType.COINBASE, ec)
+        e.close = MagicMock(side_effect=asyncio.sleep)
+        attempts = []
+
+        async def run():
+            done = asyncio.Event()
+
+            async def connect(session):
+                attempts.append(session)
+                if len(attempts) == 1:
+                    raise aiohttp.ClientConnectionError('refused')
+                if len(attempts) == 5:
+                    done.set()
+                    await asyncio.Event().wait()
+
+            async def receive():
+                if len(attempts) == 3:
+                    raise ValueError('bad message')
+                if len(attempts) == 4:
+                    # connected but silent
+                    await asyncio.Event().wait()
+
+            e.connect = connect
+            e.receive = receive
+            task = asyncio.ensure_future(e.run(None))
+            await done.wait()
+            task.cancel()
+
+        asyncio.run(run())
+        metrics = e.connection()
+        # refused, closed by the server, bad message, stalled
+        assert metrics['errors'] == 2
+        assert metrics['connects'] == 3
+        assert metrics['stalls'] == 1
+        assert metrics['reconnects'] == 4
+        assert metrics['connected'] is False
+        assert 0 < metrics['recovery'] <= metrics['max_recovery']
+        # one session for every connection, each closed, cancelled included
+        assert len(set(map(id, attempts))) == 1
+        assert e.close.call_count == 5
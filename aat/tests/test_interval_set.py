@@ -0,0 +1,39 @@
+class TestIntervalSet:
+    def test_add_remove(self):
+        from ..interval_set import IntervalSet
+
+        s = IntervalSet()
+        s.add(10, 20)
+        s.add(30, 40)
+        assert len(s) == 20
+        assert 10 in s and 19 in s and 20 not in s
+
+        # merges overlapping and touching ranges
+        s.add(20, 30)
+        assert list(s.ranges()) == [(10, 40)]
+        s.add(5, 8)
+        assert list(s.ranges()) == [(5, 8), (10, 40)]
+        assert len(s) == 33
+
+        # ends, middle, and a range of one
+        assert s.remove(10)
+        assert s.remove(39)
+        assert s.remove(25)
+        assert not s.remove(25)
+        assert list(s.ranges()) == [(5, 8), (11, 25), (26, 39)]
+        s.add(50, 51)
+        assert s.remove(50)
+        assert str(s) == '{5-7, 11-24, 26-38}'
+
+        s.clear()
+        assert not s and len(s) == 0
+
+    def test_large(self):
+        from ..interval_set import IntervalSet
+
+        # a jump of a billion is one range
+        s = IntervalSet()
+        s.add(1, 10 ** 9)
+        assert s.remove(500)
+        assert len(s) == 10 ** 9 - 2
+        assert list(s.ranges()) == [(1, 500), (501, 10 ** 9)]
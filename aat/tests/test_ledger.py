@@ -0,0 +1,51 @@
+from .helpers import account
+
+
+class TestLedger:
+    def setup(self):
+        from ..ledger import Ledger
+        from ..enums import ExchangeType, CurrencyType
+
+        self.ledger = Ledger([account(ExchangeType.COINBASE, CurrencyType.USD, 100.0, 100.0),
+                              account(ExchangeType.COINBASE, CurrencyType.BTC, 2.0, 20.0),
+                              account(ExchangeType.GEMINI, CurrencyType.USD, 50.0, 50.0),
+                              account(ExchangeType.GEMINI, CurrencyType.BTC, 1.0, 10.0)])
+
+    def test_lookup(self):
+        from ..enums import ExchangeType, CurrencyType
+
+        assert len(self.ledger) == 4
+        assert self.ledger.get(ExchangeType.GEMINI, CurrencyType.BTC).balance == 1.0
+        assert (ExchangeType.KRAKEN, CurrencyType.BTC) not in self.ledger
+        # iterates keys like a dict
+        assert (ExchangeType.GEMINI, CurrencyType.BTC) in list(self.ledger)
+        assert self.ledger[(ExchangeType.GEMINI, CurrencyType.BTC)] is self.ledger.get(ExchangeType.GEMINI, CurrencyType.BTC)
+        assert set(self.ledger.by_exchange(ExchangeType.COINBASE).keys()) == {CurrencyType.USD, CurrencyType.BTC}
+        assert set(self.ledger.by_currency(CurrencyType.BTC).keys()) == {ExchangeType.COINBASE, ExchangeType.GEMINI}
+
+    def test_totals(self):
+        from ..enums import ExchangeType, CurrencyType
+
+        assert self.ledger.value() == 180.0
+        assert self.ledger.value(currency=CurrencyType.BTC) == 30.0
+        assert self.ledger.value(exchange=ExchangeType.GEMINI) == 60.0
+        assert self.ledger.balance(CurrencyType.USD) == 150.0
+
+        # a fill touches two accounts and the totals follow
+        btc = self.ledger.get(ExchangeType.COINBASE, CurrencyType.BTC)
+        usd = self.ledger.get(ExchangeType.COINBASE, CurrencyType.USD)
+        self.ledger.adjust(btc, 1.0)
+        self.ledger.adjust(usd, -10.0)
+        self.ledger.update(btc, value=30.0)
+        self.ledger.update(usd, value=usd.balance)
+
+        assert btc.balance == 3.0
+        assert usd.balance == 90.0
+        assert self.ledger.balance(CurrencyType.BTC) == 4.0
+        assert self.ledger.balance(CurrencyType.USD) == 140.0
+        assert self.ledger.value(exchange=ExchangeType.COINBASE) == 120.0
+        assert self.ledger.value() == sum(a.value for a in self.ledger.values())
+
+        self.ledger.remove(ExchangeType.GEMINI, CurrencyType.BTC)
+        assert self.ledger.value(currency=CurrencyType.BTC) == 30.0
+        assert self.ledger.balance(CurrencyType.BTC) == 3.0
@@ -1,7 +1,7 @@
 import pytest
 import random
 from datetime import datetime
-from aat.order_book import OrderBook
+from aat.order_book import OrderBook, AbsoluteBook, Book, BookFeatures, ConsolidatedBook, L3Book, NativePriceLevels, PriceLevels
 from aat.structs import MarketData, Instrument
 from aat.enums import Side, \
                       OptionSide, \
@@ -106,6 +106,328 @@ class TestDataSource:
 
         print(str(ob))
 
+    def test_price_levels(self):
+        # python levels, and the C++ ones when the extension is built
+        for levels in filter(None, (PriceLevels, NativePriceLevels)):
+            self._test_price_levels(levels)
+
+    def _test_price_levels(self, levels):
+        bids = levels(Side.BUY)
+        asks = levels(Side.SELL)
+        assert bids.best() is None
+
+        for price in (10, 12, 11):
+            bids.add(price, 2)
+            asks.add(price + 5, 2)
+
+        assert bids.best() == 12
+        assert asks.best() == 15
+        assert [p for p, _ in bids] == [12, 11, 10]
+        assert [p for p, _ in asks] == [15, 16, 17]
+        assert asks.top(2) == [(15, 2), (16, 2)]
+
+        # partial then full removal
+        assert bids.add(12, -1) == 1
+        assert bids.add(12, -1) == 0
+        assert 12 not in bids
+        assert bids.best() == 11
+
+        # removal from the middle
+        asks.set(16, 0)
+        assert [p for p, _ in asks] == [15, 17]
+        assert len(asks) == 2
+
+        assert asks.depth() == 4
+        assert asks.depth(1) == 2
+        assert asks.fill(3) == 15 * 2 + 17
+        assert asks.fill(5) is None
+
+        changes = []
+        asks.listen(lambda side, price, volume: changes.append((side, price, volume)))
+        asks.add(15, 1)
+        asks.remove(17)
+        asks.clear()
+        assert changes == [(Side.SELL, 15, 3), (Side.SELL, 17, 0), (Side.SELL, 15, 0)]
+        assert asks.best() is None
+
+    def test_price_levels_cache(self):
+        import random
+        random.seed(0)
+        for levels in filter(None, (PriceLevels, NativePriceLevels)):
+            for side in (Side.BUY, Side.SELL):
+                book = levels(side)
+                for _ in range(2000):
+                    book.add(random.randrange(100), random.choice((5, 5, -5)))
+
+                    # cached answers match walking the levels
+                    n = random.randrange(10)
+                    walked = list(book)
+                    assert book.depth(n) == sum(volume for _, volume in walked[:n])
+                    size = random.randrange(1, 50)
+                    notional, left = 0, size
+                    for price, volume in walked:
+                        take = min(volume, left)
+                        notional += take * price
+                        left -= take
+                        if not left:
+                            break
+                    assert book.fill(size) == (None if left else notional)
+
+    def test_book_ticks_and_lots(self):
+        instrument = Instrument(underlying=PairType.BTCETH)
+        book = OrderBook([instrument], sizes={instrument: (0.00001, 0.001)}).book(instrument)
+
+        for _ in range(10):
+            book.push(MarketData(time=datetime.now(),
+                                 volume=0.1,
+                                 price=0.02135,
+                                 type=TickType.OPEN,
+                                 instrument=instrument,
+                                 side=Side.BUY,
+                                 exchange=ExchangeType.COINBASE))
+        assert book._bid.best() == 2135
+        assert book._bid.volume(2135) == 1000
+        assert book.tob() == ((0.02135, 1.0), None)
+
+        # float residue would leave a level behind here
+        for _ in range(10):
+            book.push(MarketData(time=datetime.now(),
+                                 volume=0.1,
+                                 price=0.02135,
+                                 type=TickType.CANCEL,
+                                 instrument=instrument,
+                                 side=Side.BUY,
+                                 exchange=ExchangeType.COINBASE))
+        assert len(book._bid) == 0
+
+    def test_book_ticks(self):
+        instrument = Instrument(underlying=PairType.BTCUSD)
+        ob = OrderBook([instrument])
+
+        def tick(type, side, price, volume):
+            ob.push(MarketData(time=datetime.now(),
+                               volume=volume,
+                               price=price,
+                               type=type,
+                               instrument=instrument,
+                               side=side,
+                               exchange=ExchangeType.COINBASE))
+
+        tick(TickType.OPEN, Side.BUY, 100.0, 1.0)
+        tick(TickType.OPEN, Side.BUY, 100.0, 2.0)
+        tick(TickType.OPEN, Side.SELL, 101.0, 1.0)
+        book = ob._ob[instrument]
+        assert book.level(Side.BUY, 100.0) == 3.0
+
+        tick(TickType.FILL, Side.BUY, 100.0, 1.0)
+        tick(TickType.CHANGE, Side.SELL, 101.0, 0.25)
+        assert book.level(Side.BUY, 100.0) == 2.0
+        assert book.level(Side.SELL, 101.0) == 0.75
+
+        tick(TickType.CANCEL, Side.BUY, 100.0, 2.0)
+        assert book.best_bid() is None
+        assert book.best_ask() == 101.0
+
+    def test_book_queries(self):
+        instrument = Instrument(underlying=PairType.BTCUSD)
+        ob = OrderBook([instrument])
+        book = ob.book(instrument)
+        assert ob.tob(instrument) == (None, None)
+        assert book.spread() is None
+
+        for side, price, volume in ((Side.BUY, 99.0, 1.0),
+                                    (Side.BUY, 98.0, 2.0),
+                                    (Side.SELL, 101.0, 1.0),
+                                    (Side.SELL, 102.0, 2.0),
+                                    (Side.SELL, 103.0, 4.0)):
+            ob.push(MarketData(time=datetime.now(),
+                               volume=volume,
+                               price=price,
+                               type=TickType.OPEN,
+                               instrument=instrument,
+                               side=side,
+                               exchange=ExchangeType.COINBASE))
+
+        assert ob.tob() == {instrument: ((99.0, 1.0), (101.0, 1.0))}
+        assert book.spread() == 2.0
+        assert book.mid() == 100.0
+        assert book.levels(1) == ([(99.0, 1.0)], [(101.0, 1.0)])
+        assert book.depth(Side.SELL, 2) == 3.0
+        assert book.depth(Side.SELL) == 7.0
+
+        assert book.price_for_size(Side.BUY, 1.0) == 101.0
+        assert book.price_for_size(Side.BUY, 3.0) == (101.0 + 2 * 102.0) / 3
+        assert book.price_for_size(Side.SELL, 2.0) == (99.0 + 98.0) / 2
+        assert book.price_for_size(Side.SELL, 5.0) is None
+
+        # cached depth is dropped from the changed level down
+        book._ask.add(10200, -20000)
+        assert book.depth(Side.SELL) == 5.0
+        assert book.price_for_size(Side.BUY, 3.0) == (101.0 + 2 * 103.0) / 3
+        book._ask.add(10000, 10000)
+        assert book.tob()[1] == (100.0, 1.0)
+        assert book.price_for_size(Side.BUY, 2.0) == 100.5
+
+    def test_l3_book(self):
+        instrument = Instrument(underlying=PairType.BTCUSD)
+        ob = OrderBook([instrument], book=L3Book)
+        book = ob.book(instrument)
+
+        def tick(type, order_id, side=Side.BUY, price=100.0, volume=0.0, remaining=0.0):
+            ob.push(MarketData(time=datetime.now(),
+                               volume=volume,
+                               price=price,
+                               type=type,
+                               instrument=instrument,
+                               side=side,
+                               remaining=remaining,
+                               order_id=order_id,
+                               exchange=ExchangeType.COINBASE))
+
+        tick(TickType.OPEN, 'a', volume=1.0)
+        tick(TickType.OPEN, 'b', volume=2.0)
+        tick(TickType.OPEN, 'c', volume=0.5)
+        tick(TickType.OPEN, 'd', side=Side.SELL, price=101.0, volume=3.0)
+        assert book.tob() == ((100.0, 3.5), (101.0, 3.0))
+        assert book.orders(Side.BUY, 100.0) == [('a', 1.0), ('b', 2.0), ('c', 0.5)]
+        assert book.queue_position('c') == (2, 3.0)
+
+        # partial fill of the first order in the queue
+        tick(TickType.TRADE, 'a', volume=0.25)
+        assert book.order('a') == (Side.BUY, 100.0, 0.75)
+        assert book.level(Side.BUY, 100.0) == 3.25
+
+        # size change keeps priority
+        tick(TickType.CHANGE, 'b', volume=1.0, remaining=1.0)
+        assert book.queue_position('c') == (2, 1.75)
+
+        # done, whatever the reason
+        tick(TickType.FILL, 'a')
+        tick(TickType.CANCEL, 'b')
+        assert book.queue_position('c') == (0, 0.0)
+        assert 'a' not in book
+
+        # unknown orders are ignored
+        tick(TickType.CANCEL, 'zzz')
+        tick(TickType.TRADE, 'zzz', volume=1.0)
+
+        tick(TickType.CANCEL, 'c')
+        assert book.tob() == (None, (101.0, 3.0))
+        assert len(book._bid) == 0
+
+    def test_absolute_book(self):
+        instrument = Instrument(underlying=PairType.BTCUSD)
+        ob = OrderBook([instrument], book=AbsoluteBook)
+
+        def tick(type, price, remaining, side=Side.BUY):
+            ob.push(MarketData(time=datetime.now(),
+                               volume=0.0,
+                               price=price,
+                               type=type,
+                               instrument=instrument,
+                               side=side,
+                               remaining=remaining,
+                               exchange=ExchangeType.GEMINI))
+
+        tick(TickType.CHANGE, 100.0, 2.0)
+        tick(TickType.CHANGE, 100.0, 1.5)
+        tick(TickType.TRADE, 100.0, 0.0)
+        tick(TickType.CHANGE, 101.0, 1.0, Side.SELL)
+        assert ob.tob(instrument) == ((100.0, 1.5), (101.0, 1.0))
+
+        tick(TickType.CANCEL, 100.0, 0.0)
+        assert ob.tob(instrument) == (None, (101.0, 1.0))
+
+        # untracked instruments are ignored
+        ob.push(MarketData(time=datetime.now(),
+                           volume=1.0,
+                           price=1.0,
+                           type=TickType.OPEN,
+                           instrument=Instrument(underlying=PairType.ETHUSD),
+                           side=Side.BUY,
+                           exchange=ExchangeType.GEMINI))
+
+    def test_consolidated_book(self):
+        instrument = Instrument(underlying=PairType.BTCUSD)
+        coinbase = OrderBook([instrument]).book(instrument)
+        gemini = OrderBook([instrument], sizes={instrument: (0.05, 0.001)}).book(instrument)
+
+        def tick(book, type, side, price, volume):
+            book.push(MarketData(time=datetime.now(),
+                                 volume=volume,
+                                 price=price,
+                                 type=type,
+                                 instrument=instrument,
+                                 side=side,
+                                 exchange=ExchangeType.COINBASE))
+
+        # existing levels are merged when a venue is added
+        tick(coinbase, TickType.OPEN, Side.BUY, 100.0, 1.0)
+        book = ConsolidatedBook(instrument)
+        book.add(ExchangeType.COINBASE, coinbase)
+        book.add(ExchangeType.GEMINI, gemini)
+        assert book.bbo() == ((100.0, 1.0, {ExchangeType.COINBASE: 1.0}), None)
+
+        tick(gemini, TickType.OPEN, Side.BUY, 100.0, 2.0)
+        tick(gemini, TickType.OPEN, Side.SELL, 100.05, 1.0)
+        tick(coinbase, TickType.OPEN, Side.SELL, 100.1, 1.0)
+        assert book.bbo() == ((100.0, 3.0, {ExchangeType.COINBASE: 1.0, ExchangeType.GEMINI: 2.0}),
+                              (100.05, 1.0, {ExchangeType.GEMINI: 1.0}))
+        assert book.levels(2)[1] == [(100.05, 1.0, {ExchangeType.GEMINI: 1.0}),
+                                     (100.1, 1.0, {ExchangeType.COINBASE: 1.0})]
+
+        # one venue leaving a level only changes its share
+        tick(coinbase, TickType.CANCEL, Side.BUY, 100.0, 1.0)
+        assert book.bbo()[0] == (100.0, 2.0, {ExchangeType.GEMINI: 2.0})
+
+        tick(gemini, TickType.FILL, Side.SELL, 100.05, 1.0)
+        assert book.best_ask() == 100.1
+        assert book.venues(Side.SELL, 100.05) == {}
+
+        # snapshot reloads drop the venue's old levels
+        gemini.load([], [])
+        assert book.bbo() == (None, (100.1, 1.0, {ExchangeType.COINBASE: 1.0}))
+
+    def test_book_features(self):
+        instrument = Instrument(underlying=PairType.BTCUSD)
+
+        for levels in filter(None, (PriceLevels, NativePriceLevels)):
+            book = Book(instrument, tick_size=1.0, lot_size=1.0)
+            book._bid, book._ask = levels(Side.BUY), levels(Side.SELL)
+            book.load([(99, 1), (98, 2), (97, 4)], [(101, 3), (102, 1)])
+
+            updates = []
+            features = BookFeatures(book, n=2, callback=updates.append)
+            assert features.imbalance == (3 - 4) / 7
+            assert features.microprice == (99 * 3 + 101 * 1) / 4
+            assert features.weighted_mid == ((99 * 1 + 98 * 2) / 3 + (101 * 3 + 102 * 1) / 4) / 2
+
+            # deeper than the top 2, nothing changes
+            book.side(Side.BUY).add(97, 5)
+            assert updates == []
+
+            # against the book re-walked after every change
+            random.seed(1)
+            for _ in range(2000):
+                side = random.choice((Side.BUY, Side.SELL))
+                price = random.randint(90, 99) if side == Side.BUY else random.randint(101, 110)
+                book.side(side).add(price, random.choice((1, 2, -1, -3)))
+
+                bids, asks = book.levels(2)
+                bid_depth, ask_depth = sum(v for _, v in bids), sum(v for _, v in asks)
+                if bids and asks:
+                    assert features.imbalance == pytest.approx((bid_depth - ask_depth) / (bid_depth + ask_depth))
+                    assert features.microprice == pytest.approx((bids[0][0] * asks[0][1] + asks[0][0] * bids[0][1]) / (bids[0][1] + asks[0][1]))
+                    assert features.weighted_mid == pytest.approx((sum(p * v for p, v in bids) / bid_depth + sum(p * v for p, v in asks) / ask_depth) / 2)
+                else:
+                    assert features.microprice is None
+                    assert features.weighted_mid is None
+            assert updates[-1] is features
+
+            book.load([], [(101, 1)])
+            assert features.imbalance == -1.0
+            assert features.microprice is None
+
     @pytest.mark.skip(reason="no way of currently testing this")
     def test_order_book_sequence(self):
         pairs = [PairType.BTCUSD]
@@ -173,17 +495,16 @@ class TestDataSource:
 
         print(ob)
 
-        print(ob._ob[instruments[0]]._bidd.keys())
-        print(ob._ob[instruments[0]]._bid)
+        print(list(ob._ob[instruments[0]]._bid))
         # TODO check floating point error
-        assert ob._ob[instruments[0]]._bidd[0.0] == 1.0
-        assert ob._ob[instruments[0]]._bidd[0.2] == 1.0
-        assert ob._ob[instruments[0]]._bidd[0.4] == 1.0
-        assert ob._ob[instruments[0]]._bidd[0.6] == 1.0
-        assert ob._ob[instruments[0]]._bidd[0.8] == 1.0
-        assert ob._ob[instruments[0]]._bidd[1.0] == 1.0
-        assert ob._ob[instruments[0]]._askk[1.2] == 1.0
-        assert ob._ob[instruments[0]]._askk[1.4] == 1.0
-        assert ob._ob[instruments[0]]._askk[1.6] == 1.0
-        assert ob._ob[instruments[0]]._askk[1.8] == 1.0
-        assert ob._ob[instruments[0]]._askk[1.8] == 1.0
+        assert ob.book(instruments[0]).level(Side.BUY, 0.0) == 1.0
+        assert ob.book(instruments[0]).level(Side.BUY, 0.2) == 1.0
+        assert ob.book(instruments[0]).level(Side.BUY, 0.4) == 1.0
+        assert ob.book(instruments[0]).level(Side.BUY, 0.6) == 1.0
+        assert ob.book(instruments[0]).level(Side.BUY, 0.8) == 1.0
+        assert ob.book(instruments[0]).level(Side.BUY, 1.0) == 1.0
+        assert ob.book(instruments[0]).level(Side.SELL, 1.2) == 1.0
+        assert ob.book(instruments[0]).level(Side.SELL, 1.4) == 1.0
+        assert ob.book(instruments[0]).level(Side.SELL, 1.6) == 1.0
+        assert ob.book(instruments[0]).level(Side.SELL, 1.8) == 1.0
+        assert ob.book(instruments[0]).level(Side.SELL, 1.8) == 1.0
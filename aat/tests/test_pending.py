@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+from .helpers import trade_response
+
+
+class TestPendingOrders:
+    def setup(self):
+        from ..pending import PendingOrders
+        from ..enums import PairType, ExchangeType, Side
+
+        self.strat1 = object()
+        self.strat2 = object()
+        self.pending = PendingOrders()
+        self.start = datetime(2020, 1, 1)
+
+        self.resps = [trade_response(PairType.BTCUSD, order_id='1', strategy=self.strat1, exchange=ExchangeType.COINBASE, side=Side.BUY, price=10),
+                      trade_response(PairType.ETHUSD, order_id='2', strategy=self.strat1, exchange=ExchangeType.GEMINI, side=Side.SELL, price=5),
+                      trade_response(PairType.BTCUSD, order_id='3', strategy=self.strat2, exchange=ExchangeType.COINBASE, side=Side.SELL, price=20),
+                      trade_response(PairType.BTCUSD, order_id='4', strategy=self.strat2, exchange=ExchangeType.GEMINI, side=Side.BUY, price=30)]
+        for i, resp in enumerate(self.resps):
+            self.pending.add(resp, time=self.start + timedelta(seconds=i))
+
+    def test_dict_like(self):
+        assert len(self.pending) == 4
+        assert '1' in self.pending
+        assert self.pending['2'] is self.resps[1]
+        del self.pending['2']
+        assert '2' not in self.pending
+        assert list(self.pending) == ['1', '3', '4']
+
+    def test_select(self):
+        from ..enums import PairType, ExchangeType, Side
+        from ..structs import Instrument
+
+        assert self.pending.select() == self.resps
+        assert self.pending.select(strategy=self.strat1) == self.resps[:2]
+        assert self.pending.select(instrument=Instrument(underlying=PairType.BTCUSD)) == [self.resps[0], self.resps[2], self.resps[3]]
+        assert self.pending.select(exchange=ExchangeType.GEMINI, side=Side.BUY) == [self.resps[3]]
+        assert self.pending.select(strategy=self.strat2, exchange=ExchangeType.COINBASE) == [self.resps[2]]
+        assert self.pending.select(instrument=Instrument(underlying=PairType.LTCUSD)) == []
+
+        # indexes are cleaned up on removal
+        self.pending.remove('3')
+        assert self.pending.select(strategy=self.strat2) == [self.resps[3]]
+        assert self.pending.select(exchange=ExchangeType.COINBASE, side=Side.SELL) == []
+
+    def test_exposure(self):
+        from ..enums import ExchangeType
+        assert self.pending.exposure() == 10 - 5 - 20 + 30
+        assert self.pending.exposure(exchange=ExchangeType.COINBASE) == 10 - 20
+        assert self.pending.exposure(strategy=self.strat1) == 10 - 5
+
+    def test_age(self):
+        now = self.start + timedelta(seconds=10)
+        assert self.pending.age('1', now) == 10
+        assert self.pending.older_than(7.5, now) == self.resps[:3]
+        assert self.pending.older_than(100, now) == []
@@ -0,0 +1,183 @@
+from datetime import datetime
+from mock import MagicMock
+from .helpers import market_data
+
+
+class TestQuery:
+    def setup(self):
+        from ..query import QueryEngine
+        from ..enums import TradingType
+
+        self.query = QueryEngine(trading_type=TradingType.BACKTEST, risk=MagicMock())
+        # skip valuation, these tests only exercise storage
+        self.query._recalculate_portfolio = MagicMock()
+
+    def test_query_trades_since(self):
+        from ..enums import PairType
+        from ..structs import Instrument
+
+        trades, cursor = self.query.query_trades_since()
+        assert trades == []
+        assert cursor == 0
+
+        btc = [market_data(price=i) for i in range(3)]
+        eth = [market_data(PairType.ETHUSD, price=i) for i in range(2)]
+        for t in btc + eth:
+            self.query.onTrade(t)
+
+        trades, cursor = self.query.query_trades_since()
+        assert trades == btc + eth
+        assert cursor == 5
+
+        # nothing new
+        trades, cursor2 = self.query.query_trades_since(cursor)
+        assert trades == []
+        assert cursor2 == cursor
+
+        # only the delta
+        new = market_data(price=10)
+        self.query.onTrade(new)
+        trades, cursor = self.query.query_trades_since(cursor)
+        assert [t.price for t in trades] == [10]
+        assert cursor == 6
+
+        # by instrument
+        trades, _ = self.query.query_trades_since(3, Instrument(underlying=PairType.BTCUSD))
+        assert [t.price for t in trades] == [10]
+        trades, _ = self.query.query_trades_since(0, Instrument(underlying=PairType.LTCUSD))
+        assert trades == []
+
+    def test_query_tradereqs_since(self):
+        from ..enums import PairType, Side, OrderType, ExchangeType
+        from ..structs import TradeRequest, Instrument
+
+        reqs = [TradeRequest(side=Side.BUY,
+                             exchange=ExchangeType.COINBASE,
+                             volume=1.0,
+                             price=float(i),
+                             instrument=Instrument(underlying=PairType.BTCUSD),
+                             order_type=OrderType.MARKET,
+                             time=datetime.now()) for i in range(3)]
+        self.query.push_tradereq(reqs[0])
+        _, cursor = self.query.query_tradereqs_since()
+
+        self.query.onTrade(market_data())
+        self.query.push_tradereq(reqs[1])
+        self.query.push_tradereq(reqs[2])
+
+        # cursors are shared across event types, so trades don't shift requests
+        items, cursor = self.query.query_tradereqs_since(cursor)
+        assert items == reqs[1:]
+        assert cursor == 4
+        assert self.query.query_tradereqs_since(cursor)[0] == []
+
+    def test_snapshot(self):
+        import pytest
+        from dataclasses import FrozenInstanceError
+        from ..enums import PairType, ExchangeType
+        from ..structs import Instrument
+
+        assert self.query.snapshot().version == 0
+
+        self.query.onTrade(market_data(price=5))
+        snapshot = self.query.snapshot()
+        assert snapshot.version == 1
+        assert snapshot.cursor == 1
+        assert snapshot.last_prices[Instrument(underlying=PairType.BTCUSD)][ExchangeType.COINBASE].price == 5
+        assert [t.price for t in snapshot.trades] == [5]
+
+        # immutable
+        with pytest.raises(FrozenInstanceError):
+            snapshot.version = 5
+        with pytest.raises(TypeError):
+            snapshot.last_prices[Instrument(underlying=PairType.ETHUSD)] = {}
+
+        # rate limited, the reader keeps seeing the same snapshot
+        self.query._snapshots.interval = 1000
+        self.query.onTrade(market_data(price=6))
+        assert self.query.snapshot() is snapshot
+
+        # until forced
+        self.query.publish(force=True)
+        assert self.query.snapshot().version == 2
+        assert [t.price for t in self.query.snapshot().trades] == [5, 6]
+        assert snapshot.last_prices[Instrument(underlying=PairType.BTCUSD)][ExchangeType.COINBASE].price == 5
+
+    def test_snapshot_trailing(self):
+        import asyncio
+
+        self.query._snapshots.interval = 0.05
+
+        async def run():
+            self.query.onTrade(market_data(price=5))
+            self.query.onTrade(market_data(price=6))
+            # second trade is inside the interval, then the market goes quiet
+            assert [t.price for t in self.query.snapshot().trades] == [5]
+            await asyncio.sleep(0.1)
+
+        asyncio.run(run())
+        assert self.query.snapshot().version == 2
+        assert [t.price for t in self.query.snapshot().trades] == [5, 6]
+
+    def test_fill_through_callback(self):
+        from ..enums import PairType, ExchangeType, Side, TradeResult
+        from ..structs import Instrument, TradeResponse
+
+        strategy, queue = MagicMock(), MagicMock()
+        self.query.registerStrategy(strategy, queue)
+        self.query.updateAccounts = MagicMock()
+
+        resp = TradeResponse(request=None, side=Side.BUY, exchange=ExchangeType.COINBASE, volume=1.0, price=1.0,
+                             instrument=Instrument(underlying=PairType.BTCUSD), time=datetime.now(),
+                             status=TradeResult.PENDING, order_id='1', remaining=1.0, strategy=strategy)
+        self.query.newPending(resp)
+
+        data = market_data()
+        data.order_id = '1'
+        self.query.onTrade(data)
+        # in order with the strategy's queued market data
+        queue.onFill.assert_called_once_with(resp)
+        assert strategy.onFill.call_count == 0
+
+    def test_query_book(self):
+        import pytest
+        from ..enums import PairType, ExchangeType
+        from ..exceptions import QueryException
+        from ..order_book import OrderBook
+        from ..query import QueryEngine
+        from ..structs import Instrument
+        from ..enums import TradingType
+
+        btc = Instrument(underlying=PairType.BTCUSD)
+        ob = OrderBook([btc])
+        query = QueryEngine(trading_type=TradingType.LIVE, books={ExchangeType.COINBASE: ob}, risk=MagicMock())
+
+        assert query.query_book(btc, ExchangeType.COINBASE) is ob.book(btc)
+        assert query.query_consolidated(btc).bbo() == (None, None)
+        with pytest.raises(QueryException):
+            query.query_book(btc, ExchangeType.GEMINI)
+        with pytest.raises(QueryException):
+            query.query_book(Instrument(underlying=PairType.ETHUSD), ExchangeType.COINBASE)
+
+    def test_query_statistics(self):
+        import pytest
+        from ..enums import PairType, ExchangeType
+        from ..exceptions import QueryException
+        from ..structs import Instrument
+
+        btc = Instrument(underlying=PairType.BTCUSD)
+        with pytest.raises(QueryException):
+            self.query.query_statistics(btc, ExchangeType.COINBASE)
+
+        for price, volume in ((10.0, 1.0), (20.0, 3.0)):
+            self.query.onTrade(market_data(price=price, volume=volume))
+
+        stats = self.query.query_statistics(btc, ExchangeType.COINBASE)
+        assert len(stats) == 3
+        for s in stats.values():
+            assert s.count == 2
+            assert s.vwap == 17.5
+            assert s.high == 20.0
+
+        with pytest.raises(QueryException):
+            self.query.query_statistics(btc, ExchangeType.GEMINI)
@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+from .helpers import market_data
+
+_START = datetime(2020, 1, 1)
+
+
+def _at(offset):
+    return _START + timedelta(seconds=offset)
+
+
+def _offsets(emitted):
+    return [(data.time - _START).total_seconds() for data in emitted]
+
+
+class TestReorder:
+    def setup(self):
+        from ..reorder import ReorderBuffer
+        self.emitted = []
+        # long enough that wall clock time never releases anything here
+        self.buffer = ReorderBuffer(self.emitted.append, lateness=10.0)
+
+    def test_order(self):
+        from ..enums import ExchangeType
+
+        # two feeds interleaved out of order
+        for offset, exchange in ((1, ExchangeType.COINBASE), (0.5, ExchangeType.GEMINI), (3, ExchangeType.COINBASE), (2, ExchangeType.GEMINI)):
+            self.buffer.push(market_data(time=_at(offset), exchange=exchange))
+        assert self.emitted == []
+        assert len(self.buffer) == 4
+
+        # watermark at 11.5 - 10 releases what came before it
+        self.buffer.push(market_data(time=_at(11.5)))
+        assert _offsets(self.emitted) == [0.5, 1]
+
+        self.buffer.drain()
+        assert _offsets(self.emitted) == [0.5, 1, 2, 3, 11.5]
+        assert self.buffer.metrics()['buffered'] == 0
+        assert self.buffer.late == 0
+
+    def test_late(self):
+        self.buffer.push(market_data(time=_at(1)))
+        self.buffer.push(market_data(time=_at(20)))
+        assert _offsets(self.emitted) == [1]
+
+        # behind an emitted event, passed straight through
+        self.buffer.push(market_data(time=_at(0.25)))
+        assert _offsets(self.emitted) == [1, 0.25]
+        assert self.buffer.late == 1
+        assert self.buffer.max_late == 0.75
+        # not late, still ahead of the last emitted, held for the watermark
+        self.buffer.push(market_data(time=_at(15)))
+        assert self.buffer.late == 1
+        assert len(self.buffer) == 2
+
+    def test_expire(self):
+        import asyncio
+        from ..reorder import ReorderBuffer
+
+        emitted = []
+        buffer = ReorderBuffer(emitted.append, lateness=0.05)
+
+        async def run():
+            buffer.push(market_data(time=_at(0.02)))
+            buffer.push(market_data(time=_at(0.01)))
+            assert emitted == []
+            # no more events, released by the timer
+            await asyncio.sleep(0.2)
+
+        asyncio.run(run())
+        assert _offsets(emitted) == [0.01, 0.02]
+        metrics = buffer.metrics()
+        assert metrics['emitted'] == 2
+        assert metrics['buffered'] == 0
+        assert 0.05 <= metrics['max_latency'] < 0.2
+        assert 0 < metrics['mean_latency'] <= metrics['max_latency']
@@ -0,0 +1,151 @@
+from functools import partial
+from mock import MagicMock
+from .helpers import market_data
+
+
+class TestResync:
+    def setup(self):
+        from ..order_book import OrderBook
+        from ..resync import Resync
+        from ..structs import Instrument
+        from ..enums import PairType, TickType
+
+        self.instrument = Instrument(underlying=PairType.BTCUSD)
+        self.ob = OrderBook([self.instrument])
+        self.snapshot = MagicMock(return_value={'bids': [('99.0', '2.0')], 'asks': [('101.0', '3.0')], 'sequence': 10})
+        self.resync = Resync(self.ob, self.snapshot)
+        self.delta = partial(market_data, type=TickType.OPEN)
+
+    def test_initial_sync(self):
+        from ..enums import ResyncState, Side
+
+        # first delta triggers a snapshot, older deltas are dropped
+        self.resync.push(self.delta(sequence=9, price=98.0))
+        self.snapshot.assert_called_once_with(self.instrument)
+        assert self.resync.state(self.instrument) == ResyncState.LIVE
+        assert self.ob.tob(self.instrument) == ((99.0, 2.0), (101.0, 3.0))
+        assert self.resync.stale == 1
+
+        self.resync.push(self.delta(sequence=11, price=99.0))
+        assert self.ob.book(self.instrument).level(Side.BUY, 99.0) == 3.0
+        assert self.resync.resyncs == 1
+        assert self.resync.buffered == 0
+
+    def test_gap(self):
+        from ..enums import ResyncState, Side
+
+        self.resync.push(self.delta(sequence=10))
+        self.resync.push(self.delta(sequence=11, price=98.0))
+
+        # 12 is lost, fetch a new snapshot and replay past it
+        self.snapshot.return_value = {'bids': [('97.0', '1.0')], 'asks': [], 'sequence': 13}
+        self.resync.push(self.delta(sequence=14, price=96.0))
+        assert self.resync.resyncs == 2
+        assert self.resync.state(self.instrument) == ResyncState.LIVE
+        assert self.ob.book(self.instrument).levels(5)[0] == [(97.0, 1.0), (96.0, 1.0)]
+        assert self.ob.book(self.instrument).level(Side.BUY, 98.0) == 0.0
+
+    def test_heartbeat(self):
+        from ..enums import ResyncState, TickType
+
+        self.resync.push(self.delta(sequence=10))
+        # sequence only, nothing changes on the book
+        self.resync.push(self.delta(sequence=11, price=50.0, type=TickType.HEARTBEAT))
+        self.resync.push(self.delta(sequence=11, price=50.0, type=TickType.HEARTBEAT))
+        self.resync.push(self.delta(sequence=12, price=99.0))
+        assert self.resync.state(self.instrument) == ResyncState.LIVE
+        assert self.resync.resyncs == 1
+        # only the delta already in the snapshot
+        assert self.resync.stale == 1
+        assert self.ob.book(self.instrument).levels(5)[0] == [(99.0, 3.0)]
+
+    def test_snapshot_behind(self):
+        from ..enums import ResyncState
+
+        # snapshot older than the buffered deltas, retried with the next delta
+        self.snapshot.side_effect = [{'bids': [], 'asks': [], 'sequence': 5},
+                                     {'bids': [], 'asks': [], 'sequence': 20}]
+        self.resync.push(self.delta(sequence=10))
+        assert self.snapshot.call_count == 1
+        assert self.resync.state(self.instrument) == ResyncState.SYNCING
+        assert self.resync.failures == 1
+
+        self.resync.push(self.delta(sequence=11))
+        assert self.snapshot.call_count == 2
+        assert self.resync.state(self.instrument) == ResyncState.LIVE
+        assert self.resync.max_buffered == 2
+
+    def test_snapshot_unsequenced(self):
+        from ..enums import ResyncState
+
+        # no nonce from the exchange, nothing can be replayed on top
+        self.snapshot.return_value = {'bids': [], 'asks': [], 'sequence': -1}
+        for sequence in range(10, 15):
+            self.resync.push(self.delta(sequence=sequence))
+        assert self.snapshot.call_count == 5
+        assert self.resync.failures == 5
+        assert self.resync.state(self.instrument) == ResyncState.SYNCING
+        assert self.resync.buffered == 5
+
+    def test_snapshot_failure(self):
+        from ..enums import ResyncState
+
+        self.snapshot.side_effect = [Exception('boom'), {'bids': [], 'asks': [], 'sequence': 11}]
+        self.resync.push(self.delta(sequence=12))
+        assert self.resync.failures == 1
+        assert self.resync.state(self.instrument) == ResyncState.SYNCING
+        assert self.resync.buffered == 1
+
+        self.resync.push(self.delta(sequence=13))
+        assert self.resync.state(self.instrument) == ResyncState.LIVE
+        assert self.resync.buffered == 0
+        assert self.ob.book(self.instrument).depth(self.delta(sequence=0).side) == 2.0
+
+    def test_async(self):
+        import asyncio
+        from ..enums import ResyncState
+
+        async def run():
+            self.resync.push(self.delta(sequence=11))
+            self.resync.push(self.delta(sequence=12))
+            # snapshot is fetched off the loop, deltas buffer meanwhile
+            assert self.resync.state(self.instrument) == ResyncState.SYNCING
+            assert self.resync.buffered == 2
+            while self.resync.state(self.instrument) != ResyncState.LIVE:
+                await asyncio.sleep(0.01)
+
+        asyncio.run(run())
+        assert self.resync.buffered == 0
+        assert self.resync.metrics()['syncing'] == []
+        assert self.ob.book(self.instrument).depth(self.delta(sequence=0).side) == 4.0
+
+    def test_stagger(self):
+        import asyncio
+        import time
+        from ..order_book import OrderBook
+        from ..resync import Resync
+        from ..structs import Instrument
+        from ..enums import PairType, ResyncState
+
+        other = Instrument(underlying=PairType.ETHUSD)
+        calls = []
+
+        def snapshot(instrument):
+            calls.append(time.monotonic())
+            return {'bids': [], 'asks': [], 'sequence': 10}
+
+        resync = Resync(OrderBook([self.instrument, other]), snapshot, stagger=0.1)
+
+        async def run():
+            resync.push(self.delta(sequence=11))
+            data = self.delta(sequence=11)
+            data.instrument = other
+            resync.push(data)
+            while resync.metrics()['syncing']:
+                await asyncio.sleep(0.01)
+
+        asyncio.run(run())
+        # second instrument waits its turn
+        assert len(calls) == 2
+        assert calls[1] - calls[0] >= 0.09
+        assert resync.state(other) == ResyncState.LIVE
@@ -5,6 +5,7 @@ from datetime import datetime
 class TestRisk:
     def setup(self):
         from ..config import RiskConfig
+        from ..ledger import Ledger
         from ..risk import Risk
         from ..enums import ExchangeType, CurrencyType
         from ..structs import Account
@@ -15,18 +16,18 @@ class TestRisk:
         rc.total_funds = 100.0
 
         ex = {ExchangeType.COINBASE: MagicMock()}
-        accounts = {CurrencyType.BTC: {ExchangeType.COINBASE: Account(id='1',
-                                                                      currency=CurrencyType.BTC,
-                                                                      balance=1.0,
-                                                                      exchange=MagicMock(),
-                                                                      value=-1,
-                                                                      asOf=datetime.now())},
-                    CurrencyType.USD: {ExchangeType.COINBASE: Account(id='2',
-                                                                      currency=CurrencyType.USD,
-                                                                      balance=1.0,
-                                                                      exchange=MagicMock(),
-                                                                      value=-1,
-                                                                      asOf=datetime.now())}}
+        accounts = Ledger([Account(id='1',
+                                   currency=CurrencyType.BTC,
+                                   balance=1.0,
+                                   exchange=ExchangeType.COINBASE,
+                                   value=-1,
+                                   asOf=datetime.now()),
+                           Account(id='2',
+                                   currency=CurrencyType.USD,
+                                   balance=1.0,
+                                   exchange=ExchangeType.COINBASE,
+                                   value=-1,
+                                   asOf=datetime.now())])
         ex[ExchangeType.COINBASE].accounts.return_value = accounts
 
         self.risk = Risk(rc, ex, accounts)
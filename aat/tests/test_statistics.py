@@ -0,0 +1,49 @@
+import math
+from datetime import datetime, timedelta
+
+
+class TestStatistics:
+    def test_count_window(self):
+        from ..statistics import RollingStatistics
+
+        stats = RollingStatistics(3)
+        assert stats.count == 0
+        assert math.isnan(stats.vwap)
+
+        prices = [10.0, 12.0, 11.0, 9.0, 13.0]
+        volumes = [1.0, 2.0, 1.0, 3.0, 1.0]
+        now = datetime(2020, 1, 1)
+        for i, (p, v) in enumerate(zip(prices, volumes)):
+            stats.push(now + timedelta(seconds=i), p, v)
+
+            # compare against a brute force calculation over the window
+            ps, vs = prices[max(0, i - 2):i + 1], volumes[max(0, i - 2):i + 1]
+            assert stats.count == len(ps)
+            assert math.isclose(stats.volume, sum(vs))
+            assert math.isclose(stats.vwap, sum(a * b for a, b in zip(ps, vs)) / sum(vs))
+            assert math.isclose(stats.mean, sum(ps) / len(ps))
+            assert stats.high == max(ps)
+            assert stats.low == min(ps)
+
+            rets = [math.log(prices[j] / prices[j - 1]) for j in range(max(1, i - 2), i + 1)]
+            assert math.isclose(stats.volatility, math.sqrt(sum(r * r for r in rets)), abs_tol=1e-12)
+
+    def test_time_window(self):
+        from ..statistics import RollingStatistics
+
+        stats = RollingStatistics(timedelta(seconds=10))
+        now = datetime(2020, 1, 1)
+        stats.push(now, 100.0, 1.0)
+        stats.push(now + timedelta(seconds=5), 50.0, 1.0)
+        assert stats.count == 2
+        assert stats.high == 100.0
+
+        stats.push(now + timedelta(seconds=11), 75.0, 2.0)
+        assert stats.count == 2
+        assert stats.high == 75.0
+        assert stats.low == 50.0
+        assert math.isclose(stats.vwap, (50.0 + 150.0) / 3)
+
+        stats.push(now + timedelta(seconds=30), 80.0, 1.0)
+        assert stats.count == 1
+        assert stats.high == stats.low == stats.vwap == 80.0
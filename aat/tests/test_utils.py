@@ -61,6 +61,25 @@ class TestUtils:
         assert(str_to_exchange('kraken') == ExchangeType.KRAKEN)
         assert(str_to_exchange('poloniex') == ExchangeType.POLONIEX)
 
+    def test_json_decoder(self):
+        import json
+        import pytest
+        from ..utils import json_decoder
+        from ..exceptions import ConfigException
+
+        frame = '{"type": "match", "price": "10.01", "sequence": 1}'
+        for name in ('auto', 'orjson', 'ujson', 'json'):
+            try:
+                decode = json_decoder(name)
+            except ConfigException:
+                # not installed
+                continue
+            assert decode(frame) == json.loads(frame)
+            assert decode(frame.encode()) == json.loads(frame)
+
+        with pytest.raises(ConfigException):
+            json_decoder('yaml')
+
     def test_trade_req_to_params(self):
         from ..utils import trade_req_to_params
         from ..structs import TradeRequest, Instrument, ExchangeType
@@ -2,16 +2,20 @@ import asyncio
 import tornado
 import uvloop
 from .backtest import Backtest
-from .callback import Print
+from .book_store import BookStore
+from .callback import Print, QueuedCallback
 from .config import TradingEngineConfig
 from .enums import TradingType, Side, CurrencyType, TradeResult
 from .execution import Execution
+from .ledger import Ledger
 from .query import QueryEngine
+from .reorder import ReorderBuffer
+from .resync import Resync
 from .risk import Risk
 from .strategy import TradingStrategy
 from .structs import TradeRequest, TradeResponse
 from .ui.server import ServerApplication
-from .utils import ex_type_to_ex, iterate_accounts
+from .utils import ex_type_to_ex
 from .logging import log
 
 
@@ -29,37 +33,32 @@ class TradingEngine(object):
         # instantiate exchange instance
         self.exchanges = {o: ex_type_to_ex(o)(o, options.exchange_options) for o in options.exchange_options.exchange_types}
 
-        # lookup by exchange or currency
-        self.accounts = {}
-        for ex in self.exchanges.values():
-            self.accounts[ex._exchange] = {}
-            for account in ex.accounts().values():
-                self.accounts[ex._exchange][account.currency] = account
-                if account.currency not in self.accounts:
-                    self.accounts[account.currency] = {}
-                self.accounts[account.currency][ex._exchange] = account
+        # lookup by exchange and/or currency
+        self.accounts = Ledger()
 
         # get account information and balances
-        for account in iterate_accounts(self.accounts):
-            if self.trading_type == TradingType.BACKTEST:
-                log.info(f'Adjusting account balance to 1,000 {account}')
-                account.balance = 1000
-
-            if account.currency == CurrencyType.USD:
-                log.info(f'Adjusting account balance to 100,000 {account}')
-                # if holding USD, add value
-                account.balance = 100000
-                account.value = account.balance
-                options.risk_options.total_funds += account.balance
-            else:
-                log.info(f'Adjusting account balance to 1,000 {account}')
-                account.balance = 1000
-
-                # calculate USD value
-                ex = self.exchanges[account.exchange]
-                spot = ex.ticker(currency=account.currency)['last']
-                options.risk_options.total_funds += account.balance * spot
-                account.value = account.balance * spot
+        for ex in self.exchanges.values():
+            for account in ex.accounts().values():
+                if self.trading_type == TradingType.BACKTEST:
+                    log.info(f'Adjusting account balance to 1,000 {account}')
+                    account.balance = 1000
+
+                if account.currency == CurrencyType.USD:
+                    log.info(f'Adjusting account balance to 100,000 {account}')
+                    # if holding USD, add value
+                    account.balance = 100000
+                    account.value = account.balance
+                    options.risk_options.total_funds += account.balance
+                else:
+                    log.info(f'Adjusting account balance to 1,000 {account}')
+                    account.balance = 1000
+
+                    # calculate USD value
+                    spot = ex.ticker(currency=account.currency)['last']
+                    options.risk_options.total_funds += account.balance * spot
+                    account.value = account.balance * spot
+
+                self.accounts.add(account)
 
         log.info(self.accounts)
         log.info("Running with %.2f USD" % options.risk_options.total_funds)
@@ -73,24 +72,57 @@ class TradingEngine(object):
         # instantiate execution engine
         self.execution = Execution(options.execution_options, self.exchanges, self.accounts)
 
+        instruments = {name: list(set(options.exchange_options.instruments).intersection(ex.markets()))
+                       for name, ex in self.exchanges.items()}
+
+        # one order book per exchange, kept current from its market data.
+        # Only when asked for: books need every message on the feed
+        order_books = options.order_books or any(getattr(x.clazz, 'order_books', False) for x in options.strategy_options)
+        self.books = {}
+        self.resyncs = {}
+        self.book_store = BookStore(options.book_snapshot_path) if options.book_snapshot_path and order_books else None
+        self._book_snapshot_interval = options.book_snapshot_interval
+        if order_books and self.trading_type in (TradingType.LIVE, TradingType.SIMULATION, TradingType.SANDBOX):
+            for name, ex in self.exchanges.items():
+                self.books[name] = ex.book(instruments[name])
+
+                if ex.sequenced():
+                    # recover from gaps with snapshots
+                    self.resyncs[name] = Resync(self.books[name], ex.orderBook, stagger=options.resync_stagger)
+                    ex.onBook(self.resyncs[name].push)
+
+                    # warm start from the last snapshots on disk. Only sequenced
+                    # books, elsewhere nothing would clear out levels gone since
+                    if self.book_store:
+                        loaded = self.book_store.load(name, self.books[name], max_age=options.book_snapshot_interval * 10)
+                        for instrument, sequence in loaded.items():
+                            self.resyncs[name].warm(instrument, sequence)
+                else:
+                    ex.onBook(self.books[name].push)
+
         # instantiate query engine
         self.query = QueryEngine(trading_type=self.trading_type,
                                  exchanges=self.exchanges,
                                  pairs=options.exchange_options.currency_pairs,
                                  accounts=self.accounts,
-                                 instruments={name:
-                                              list(set(options.exchange_options.instruments).intersection(
-                                                  ex.markets())) for name, ex in self.exchanges.items()},
+                                 instruments=instruments,
+                                 books=self.books,
                                  risk=self.risk,
                                  execution=self.execution)
 
         # register query hooks
+        self.reorder = None
         if self.trading_type in (TradingType.LIVE, TradingType.SIMULATION, TradingType.SANDBOX):
+            if options.reorder_lateness > 0:
+                # trades from all exchanges recorded in timestamp order
+                self.reorder = ReorderBuffer(self.query.onTrade, options.reorder_lateness)
+
             for exc in self.exchanges.values():
 
                 # Track my trades and cancels for future callbacks
-                exc.onTrade(self.query.onTrade)
-                exc.onCancel(self.query.onCancel)
+                exc.onTrade(self.reorder.push if self.reorder else self.query.onTrade)
+                exc.onOrderCancel(self.query.onCancel)
+                exc.onOrderFill(self.query.onOrderFill)
 
                 if options.print:
                     exc.registerCallback(Print(onTrade=True, onReceived=True, onOpen=True, onFill=True, onCancel=True, onChange=True, onError=False))
@@ -99,6 +131,11 @@ class TradingEngine(object):
             self.backtest.onCancel(self.query.onCancel)
             self.backtest.registerCallback(Print())
 
+        # per strategy consumer queues, if any
+        self._strategy_queue_size = options.strategy_queue_size
+        self._overflow_policy = options.overflow_policy
+        self.queues = {}  # strategy -> QueuedCallback
+
         # register strategies from config
         for x in options.strategy_options:
             log.critical('Registering strategy: %s', str(x.clazz))
@@ -121,15 +158,21 @@ class TradingEngine(object):
 
     def registerStrategy(self, strat: TradingStrategy):
         if self.trading_type in (TradingType.LIVE, TradingType.SIMULATION, TradingType.SANDBOX):
+            callback = strat.callback()
+            if self._strategy_queue_size > 0:
+                # own consumer task, a slow strategy only holds up itself
+                callback = self.queues[strat] = QueuedCallback(callback, self._strategy_queue_size, self._overflow_policy)
+
             # register for exchange data
             for ex in self.exchanges.values():
-                ex.registerCallback(strat.callback())
+                ex.registerCallback(callback)
         else:
             # register for backtest data
-            self.backtest.registerCallback(strat.callback())
+            callback = strat.callback()
+            self.backtest.registerCallback(callback)
 
-        # add to tickables
-        self.query.registerStrategy(strat)
+        # add to tickables, fills go where its market data goes
+        self.query.registerStrategy(strat, callback)
 
         # give self to strat so it can request trading actions
         strat.setEngine(self)
@@ -153,6 +196,15 @@ class TradingEngine(object):
             async def _run():
                 await asyncio.wait([ex.run(self) for ex in self.exchanges.values()])
 
+            # periodic order book snapshots to disk
+            async def _snapshot():
+                while True:
+                    await asyncio.sleep(self._book_snapshot_interval)
+                    try:
+                        self.saveBooks()
+                    except Exception as e:
+                        log.error(f'Order book snapshot failed: {e}')
+
             # get event loop
             loop = asyncio.get_event_loop()
 
@@ -164,6 +216,8 @@ class TradingEngine(object):
 
             # run asyncio loop
             loop.create_task(_run())
+            if self.book_store:
+                loop.create_task(_snapshot())
             loop.run_forever()
 
         else:
@@ -174,6 +228,20 @@ class TradingEngine(object):
             # let backtester run
             self.backtest.run(self)
 
+    def saveBooks(self):
+        '''snapshot every order book. Books are serialized here, on the
+        loop that updates them, and written to disk off of it'''
+        snapshots = {}
+        for name in self.resyncs:
+            snapshots.update(self.book_store.dump(name, self.books[name]))
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.book_store.write(snapshots)
+            return
+        loop.run_in_executor(None, self.book_store.write, snapshots)
+
     def terminate(self):
         for strat in self._strats:
             strat.onExit()
@@ -278,5 +346,9 @@ class TradingEngine(object):
         return resp
 
     def cancelAll(self, strat=None):
-        resp = self.execution.cancelAll(self._pending)
+        if strat is None:
+            # cancel everything on every exchange
+            return self.execution.cancelAll()
+        # only cancel the strategy's own pending orders
+        resp = self.execution.cancelAll(self.query.pending.select(strategy=strat))
         return resp
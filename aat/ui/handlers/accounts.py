@@ -16,7 +16,8 @@ class AccountsHandler(PerspectiveHTTPMixin, HTTPHandler):
 
     @run_on_executor
     def get_data(self, **psp_kwargs):
-        dat = [a.to_dict(True) for ex in self.te.exchanges.values() for a in ex.accounts().values()]
+        # read from the latest snapshot so we never iterate state the engine is mutating
+        dat = [a.to_dict(True) for a in self.te.query.snapshot().accounts]
         super(AccountsHandler, self).loadData(data=dat, **psp_kwargs)
         self.psp.schema['asOf'] = 'datetime'
         return super(AccountsHandler, self).getData()
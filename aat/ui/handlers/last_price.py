@@ -16,7 +16,9 @@ class LastPriceHandler(PerspectiveHTTPMixin, HTTPHandler):
 
     @run_on_executor
     def get_data(self, **psp_kwargs):
-        msgs = [s.to_dict(True, True) for s in self.te.query.query_lastpriceall()]
+        # read from the latest snapshot so we never iterate state the engine is mutating
+        last_prices = self.te.query.snapshot().last_prices
+        msgs = [m.to_dict(True, True) for exs in last_prices.values() for m in exs.values()]
         if len(msgs) > 0:
             for msg in msgs:
                 msg['underlying'] = msg['instrument']['underlying']
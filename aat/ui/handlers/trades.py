@@ -17,7 +17,7 @@ class TradesHandler(PerspectiveHTTPMixin, HTTPHandler):
         self.psp_kwargs = psp_kwargs or {}
 
     @run_on_executor
-    def get_data(self, exchange=None, pair=None, **psp_kwargs):
+    def get_data(self, exchange=None, pair=None, since=None, **psp_kwargs):
         try:
             if pair is not None:
                 pair = PairType.from_string(pair)
@@ -27,7 +27,13 @@ class TradesHandler(PerspectiveHTTPMixin, HTTPHandler):
         except (ValueError, TypeError):
             instrument = None
 
-        msgs = [x.to_dict(True, True) for x in self.te.query.query_trades(instrument)]
+        if since is not None:
+            # incremental poll, only send trades after the client's cursor
+            trades, self.cursor = self.te.query.query_trades_since(since, instrument)
+        else:
+            trades = self.te.query.query_trades(instrument)
+
+        msgs = [x.to_dict(True, True) for x in trades]
         if len(msgs) > 0:
             for msg in msgs:
                 msg['underlying'] = msg['instrument']['underlying']
@@ -39,5 +45,9 @@ class TradesHandler(PerspectiveHTTPMixin, HTTPHandler):
     @tornado.gen.coroutine
     def get(self):
         pair = self.get_argument('pair', '')
-        dat = yield self.get_data(pair=pair, **self.psp_kwargs)
+        since = self.get_argument('since', '')
+        since = int(since) if since.isdigit() else None
+        dat = yield self.get_data(pair=pair, since=since, **self.psp_kwargs)
+        if since is not None:
+            self.set_header('X-Cursor', str(self.cursor))
         self.write(dat)
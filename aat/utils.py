@@ -1,11 +1,12 @@
 import ccxt
+import importlib
 import logging
 import os
 import pytz
 from datetime import datetime
 from functools import lru_cache
 from .enums import ExchangeType, ExchangeType_from_string, ExchangeTypes, CurrencyType, OrderType, Side, PairType
-from .exceptions import AATException
+from .exceptions import AATException, ConfigException
 from .logging import log
 
 
@@ -91,6 +92,28 @@ def str_to_order_type(s: str) -> OrderType:
     return OrderType.NONE
 
 
+@lru_cache(None)
+def json_decoder(name: str = 'auto'):
+    '''JSON decode function by library name
+
+    Args:
+        name (string): `orjson`, `ujson`, `json`, or `auto` for the fastest
+                       one installed
+    Returns:
+        function decoding a str or bytes websocket frame
+    '''
+    if name not in ('auto', 'orjson', 'ujson', 'json'):
+        raise ConfigException(f'JSON decoder not recognized: {name}')
+
+    # orjson and ujson take bytes as is, json detects their encoding
+    for module in (('orjson', 'ujson', 'json') if name == 'auto' else (name,)):
+        try:
+            return importlib.import_module(module).loads
+        except ImportError:
+            continue
+    raise ConfigException(f'JSON decoder not installed: {name}')
+
+
 @lru_cache(None)
 def str_to_exchange(exchange: str) -> ExchangeType:
     if exchange.upper() not in ExchangeTypes:
@@ -179,14 +202,6 @@ def findpath(inst, markets):
     raise AATException(f'Need {"/".join(c.value for c in to_try)} for intermediary: {inst}')
 
 
-def iterate_accounts(accounts_dict):
-    for currency in accounts_dict:
-        if not isinstance(currency, CurrencyType):
-            continue
-        for account in accounts_dict[currency].values():
-            yield account
-
-
 def sign(x): return (1, -1)[x < 0]
 
 
@@ -0,0 +1,51 @@
+'''Book feature upkeep per update, incremental vs re-walking the top levels.
+
+    PYTHONPATH=. python3 benchmarks/bench_book_features.py [updates] [levels] [n]
+'''
+import random
+import sys
+import time
+from aat.enums import PairType, Side
+from aat.order_book import Book, BookFeatures
+from aat.structs import Instrument
+
+
+def rewalk(book, n):
+    bids, asks = book.side(Side.BUY).top(n), book.side(Side.SELL).top(n)
+    bid_depth, ask_depth = sum(v for _, v in bids), sum(v for _, v in asks)
+    return ((bid_depth - ask_depth) / (bid_depth + ask_depth),
+            (bids[0][0] * asks[0][1] + asks[0][0] * bids[0][1]) / (bids[0][1] + asks[0][1]),
+            (sum(p * v for p, v in bids) / bid_depth + sum(p * v for p, v in asks) / ask_depth) / 2)
+
+
+def setup(levels):
+    book = Book(Instrument(underlying=PairType.BTCUSD), tick_size=1.0, lot_size=1.0)
+    book.load([(1000000 - i, 1000) for i in range(levels)], [(1000001 + i, 1000) for i in range(levels)])
+    return book
+
+
+def main(count=200000, levels=5000, n=10):
+    random.seed(0)
+    # resizes anywhere in the book, a quarter of them near the top
+    data = [(random.choice((Side.BUY, Side.SELL)),
+             int(random.expovariate(1.0 / n)) % levels if random.random() < .25 else random.randrange(levels),
+             random.choice((100, -100)))
+            for _ in range(count)]
+    print(f'{count} updates over {levels} levels a side, top {n} features')
+
+    for name in ('rewalk', 'incremental'):
+        book = setup(levels)
+        if name == 'incremental':
+            BookFeatures(book, n)
+
+        start = time.perf_counter()
+        for side, offset, volume in data:
+            book.side(side).add(1000000 - offset if side == Side.BUY else 1000001 + offset, volume)
+            if name == 'rewalk':
+                rewalk(book, n)
+        elapsed = time.perf_counter() - start
+        print(f'{name:>12}: {elapsed / count * 1e9:>8.0f} ns/update')
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:4]))
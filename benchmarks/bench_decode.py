@@ -0,0 +1,58 @@
+'''Websocket frame decode cost per exchange message type, for each JSON
+decoder installed, from str (text frames) and bytes (binary frames).
+
+    PYTHONPATH=. python3 benchmarks/bench_decode.py [repeats]
+'''
+import json
+import sys
+import time
+from aat.exceptions import ConfigException
+from aat.utils import json_decoder
+
+MESSAGES = {
+    'coinbase received': {'type': 'received', 'time': '2020-01-01T00:00:00.000000Z', 'product_id': 'BTC-USD', 'sequence': 10000000001,
+                          'order_id': 'd50ec984-77a8-460a-b958-66f114b0de9b', 'size': '1.34', 'price': '502.1', 'side': 'buy', 'order_type': 'limit'},
+    'coinbase open': {'type': 'open', 'time': '2020-01-01T00:00:00.000000Z', 'product_id': 'BTC-USD', 'sequence': 10000000002,
+                      'order_id': 'd50ec984-77a8-460a-b958-66f114b0de9b', 'price': '200.2', 'remaining_size': '1.00', 'side': 'sell'},
+    'coinbase match': {'type': 'match', 'trade_id': 10, 'sequence': 10000000003, 'maker_order_id': 'ac928c66-ca53-498f-9c13-a110027a60e8',
+                       'taker_order_id': '132fb6ae-456b-4654-b4e0-d681ac05cea1', 'time': '2020-01-01T00:00:00.000000Z',
+                       'product_id': 'BTC-USD', 'size': '5.23512', 'price': '400.23', 'side': 'sell'},
+    'coinbase done': {'type': 'done', 'time': '2020-01-01T00:00:00.000000Z', 'product_id': 'BTC-USD', 'sequence': 10000000004,
+                      'price': '200.2', 'order_id': 'd50ec984-77a8-460a-b958-66f114b0de9b', 'reason': 'filled', 'side': 'sell',
+                      'remaining_size': '0'},
+    'coinbase change': {'type': 'change', 'time': '2020-01-01T00:00:00.000000Z', 'sequence': 10000000005,
+                        'order_id': 'ac928c66-ca53-498f-9c13-a110027a60e8', 'product_id': 'BTC-USD', 'new_size': '5.23512',
+                        'old_size': '12.234412', 'price': '400.23', 'side': 'sell'},
+    'gemini update': {'type': 'update', 'eventId': 5375461993, 'timestamp': 1547760288, 'timestampms': 1547760288001, 'socket_sequence': 15,
+                      'events': [{'type': 'change', 'side': 'buy', 'price': '3626.73', 'remaining': '1.6', 'delta': '0.8',
+                                  'reason': 'place'}]},
+    'gemini initial': {'type': 'update', 'eventId': 5375461992, 'socket_sequence': 0,
+                       'events': [{'type': 'change', 'side': 'buy' if i < 250 else 'sell', 'price': str(3600 + i * 0.01),
+                                   'remaining': '1.5', 'delta': '1.5', 'reason': 'initial'} for i in range(500)]},
+}
+
+
+def main(repeats=20000):
+    decoders = []
+    for name in ('json', 'ujson', 'orjson'):
+        try:
+            decoders.append((name, json_decoder(name)))
+        except ConfigException:
+            print(f'{name}: not installed')
+
+    print(f'{"message":>18} {"bytes":>6} ' + ' '.join(f'{name + " " + kind:>14}' for name, _ in decoders for kind in ('str', 'bytes')) + '   (ns/frame)')
+    for message, jsn in MESSAGES.items():
+        text = json.dumps(jsn)
+        count = repeats if len(text) < 10000 else max(repeats // 100, 1)
+        timings = []
+        for _, decode in decoders:
+            for frame in (text, text.encode()):
+                start = time.perf_counter()
+                for _ in range(count):
+                    decode(frame)
+                timings.append((time.perf_counter() - start) / count * 1e9)
+        print(f'{message:>18} {len(text):>6} ' + ' '.join(f'{t:>14.0f}' for t in timings))
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,87 @@
+'''Order book update throughput, sorted price levels vs the previous
+list based book.
+
+    PYTHONPATH=. python3 benchmarks/bench_order_book.py [ticks] [levels]
+'''
+import random
+import sys
+import time
+from datetime import datetime
+from aat.enums import ExchangeType, PairType, Side, TickType
+from aat.order_book import Book, Order
+from aat.structs import Instrument, MarketData
+
+
+class ListBook(object):
+    '''previous book implementation, unsorted lists plus a price index'''
+
+    def __init__(self, instrument):
+        self._instrument = instrument
+        self._levels = {Side.BUY: ([], {}), Side.SELL: ([], {})}
+
+    def push(self, order):
+        price = round(order.price, 2)
+        volume = round(order.volume, 4)
+        lst, index = self._levels[order.side]
+
+        if order.type in (TickType.FILL, TickType.CANCEL, TickType.CHANGE):
+            if price in index:
+                index[price].volume -= volume
+                if index[price].volume < 1e-5:
+                    lst.remove(index[price])
+                    del index[price]
+        elif order.type == TickType.OPEN and price in index:
+            index[price].volume += volume
+        else:
+            lst.append(Order(price, volume))
+            index[price] = lst[-1]
+
+    def best(self):
+        # the list is unsorted, so top of book is a scan
+        bids, _ = self._levels[Side.BUY]
+        asks, _ = self._levels[Side.SELL]
+        return (max(bids).price if bids else None,
+                min(asks).price if asks else None)
+
+
+def best(book):
+    return book._bid.best(), book._ask.best()
+
+
+def ticks(count, levels, instrument):
+    '''random opens and cancels clustered around the top of book'''
+    ret = []
+    for _ in range(count):
+        side = random.choice((Side.BUY, Side.SELL))
+        distance = int(random.expovariate(10.0 / levels)) % levels
+        price = (1000 - distance if side == Side.BUY else 1001 + distance) / 100
+        ret.append(MarketData(time=datetime.now(),
+                              volume=random.randrange(1, 20) / 10,
+                              price=price,
+                              type=random.choice((TickType.OPEN, TickType.OPEN, TickType.CANCEL)),
+                              instrument=instrument,
+                              side=side,
+                              exchange=ExchangeType.COINBASE))
+    return ret
+
+
+def run(name, book, data, top):
+    start = time.perf_counter()
+    for item in data:
+        book.push(item)
+        top(book)
+    elapsed = time.perf_counter() - start
+    print(f'{name:>8}: {len(data) / elapsed:>12,.0f} ticks/s  ({elapsed:.3f}s)')
+
+
+def main(count=50000, levels=1000):
+    random.seed(0)
+    instrument = Instrument(underlying=PairType.BTCUSD)
+    data = ticks(count, levels, instrument)
+    print(f'{count} ticks over ~{levels} levels per side, top of book read after every tick')
+    run('list', ListBook(instrument), data, ListBook.best)
+    run('sorted', Book(instrument), data, best)
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
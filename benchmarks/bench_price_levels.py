@@ -0,0 +1,52 @@
+'''Price level update and top of book cost, python vs C++ levels.
+
+    PYTHONPATH=. python3 benchmarks/bench_price_levels.py [updates] [levels]
+'''
+import random
+import sys
+import time
+from aat.enums import Side
+from aat.order_book import NativePriceLevels, PriceLevels
+
+
+def near_top(count, levels):
+    '''(price, volume delta) mostly near the top of the book'''
+    return [(1000000 - int(random.expovariate(10.0 / levels)) % levels, random.choice((100, 100, -100)))
+            for _ in range(count)]
+
+
+def anywhere(count, levels):
+    '''(price, volume delta) anywhere in the book, creating and removing levels'''
+    return [(1000000 - random.randrange(2 * levels), random.choice((1000, -1000)))
+            for _ in range(count)]
+
+
+def run(name, clazz, data, levels):
+    book = clazz(Side.BUY)
+    # prefill to depth
+    for i in range(levels):
+        book.set(1000000 - i, 1000)
+
+    add, best = book.add, book.best
+    start = time.perf_counter()
+    for price, volume in data:
+        add(price, volume)
+        best()
+    elapsed = time.perf_counter() - start
+    print(f'{name:>8}: {elapsed / len(data) * 1e9:>8.0f} ns/update  ({len(book)} levels)')
+
+
+def main(count=200000, levels=50000):
+    random.seed(0)
+    for updates in (near_top, anywhere):
+        data = updates(count, levels)
+        print(f'{updates.__name__}: {count} updates over {levels} levels, top of book read after every update')
+        run('python', PriceLevels, data, levels)
+        if NativePriceLevels is None:
+            print('  native: extension not built (python3 setup.py build_ext --inplace)')
+        else:
+            run('native', NativePriceLevels, data, levels)
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
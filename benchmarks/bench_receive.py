@@ -0,0 +1,81 @@
+'''Coinbase feed handler throughput on a burst of buffered frames,
+one at a time vs batched, with an order book and a trade callback.
+Conversion and the books cost the same per tick either way, so the two
+are on par here; batching saves on consumers with a per call cost.
+
+    PYTHONPATH=. python3 benchmarks/bench_receive.py [frames]
+'''
+import asyncio
+import aiohttp
+import json
+import sys
+import time
+from collections import deque
+from aat.config import ExchangeConfig
+from aat.enums import ExchangeType, PairType
+from aat.exchanges.coinbase import CoinbaseExchange
+from aat.order_book import L3Book, OrderBook
+from aat.structs import Instrument
+
+
+class _Reader(object):
+    def __init__(self, frames):
+        self._buffer = deque(frames)
+
+
+class _WS(object):
+    '''every frame already buffered, as in a burst'''
+
+    def __init__(self, frames):
+        self._reader = _Reader(frames)
+
+    async def receive(self):
+        return self._reader._buffer.popleft()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        msg = await self.receive()
+        if msg.type == aiohttp.WSMsgType.CLOSED:
+            raise StopAsyncIteration
+        return msg
+
+
+def frames(count):
+    ret = []
+    for i in range(count // 4):
+        order_id = f'order-{i}'
+        base = {'time': '2020-01-01T00:00:00.000000Z', 'product_id': 'BTC-USD', 'side': 'buy', 'price': str(100 + i % 50)}
+        for msg in ({'type': 'received', 'order_id': order_id, 'size': '1.0'},
+                    {'type': 'open', 'order_id': order_id, 'remaining_size': '1.0'},
+                    {'type': 'match', 'maker_order_id': order_id, 'size': '0.5'},
+                    {'type': 'done', 'order_id': order_id, 'reason': 'canceled', 'remaining_size': '0.5'}):
+            ret.append(aiohttp.WSMessage(aiohttp.WSMsgType.TEXT, json.dumps(dict(base, sequence=len(ret) + 1, **msg)), None))
+    ret.append(aiohttp.WSMessage(aiohttp.WSMsgType.CLOSED, None, None))
+    return ret
+
+
+def main(count=200000):
+    data = frames(count)
+    instrument = Instrument(underlying=PairType.BTCUSD)
+    for batch in (False, True):
+        options = ExchangeConfig()
+        options.batch_receive = batch
+        e = CoinbaseExchange(ExchangeType.COINBASE, options)
+        ob = OrderBook([instrument], book=L3Book)
+        e.onBook(ob.push)
+        if batch:
+            e.onTradeBatch(lambda ticks: None)
+        else:
+            e.onTrade(lambda tick: None)
+        e.ws = _WS(data)
+
+        start = time.perf_counter()
+        asyncio.run(e.receive())
+        elapsed = time.perf_counter() - start
+        print(f'{"batched" if batch else "single":>8}: {elapsed / count * 1e9:>8.0f} ns/frame')
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -1,10 +1,27 @@
 #pragma once
 #include <iostream>
 #include <pybind11/pybind11.h>
+#include <aat/book.hpp>
 
 namespace py = pybind11;
 
 PYBIND11_MODULE(binding, m)
 {
     m.doc() = "C++ bindings";
+    using namespace aat::book;
+    py::class_<PriceLevels>(m, "PriceLevels")
+        .def(py::init<py::object>())
+        .def("add", &PriceLevels::add)
+        .def("set", &PriceLevels::set)
+        .def("remove", &PriceLevels::remove)
+        .def("clear", &PriceLevels::clear)
+        .def("listen", &PriceLevels::listen)
+        .def("volume", &PriceLevels::volume)
+        .def("best", &PriceLevels::best)
+        .def("top", &PriceLevels::top)
+        .def("depth", &PriceLevels::depth, py::arg("n") = py::none())
+        .def("fill", &PriceLevels::fill)
+        .def("__iter__", &PriceLevels::iter)
+        .def("__contains__", &PriceLevels::contains)
+        .def("__len__", &PriceLevels::size);
 }
@@ -0,0 +1,191 @@
+#pragma once
+
+#include <algorithm>
+#include <cstdint>
+#include <iterator>
+#include <map>
+#include <vector>
+#include <pybind11/pybind11.h>
+#include "common.h"
+
+namespace py = pybind11;
+
+namespace aat {
+namespace book {
+
+    // Price levels on one side of a book, in integer ticks and lots.
+    //
+    // Levels are kept in a std::map keyed by sign * price (negated for
+    // asks), so the best level is always the last entry for both sides.
+    // Cumulative volume and notional from the best level down are cached
+    // as deep as queries have needed, and a change only drops the part of
+    // the cache at or behind the changed level.
+    // Mirrors aat.order_book.PriceLevels.
+    class AAT_HIDDEN PriceLevels {
+    public:
+        explicit PriceLevels(py::object side)
+            : side_(side),
+              sign_(side.attr("value").cast<std::string>() == "BUY" ? 1 : -1) {}
+
+        std::int64_t add(std::int64_t price, std::int64_t volume) {
+            auto it = levels_.find(sign_ * price);
+            if (it != levels_.end()) {
+                volume += it->second;
+            }
+            return set(price, volume);
+        }
+
+        std::int64_t set(std::int64_t price, std::int64_t volume) {
+            if (volume <= 0) {
+                auto it = levels_.find(sign_ * price);
+                if (it != levels_.end()) {
+                    erase(it, price);
+                }
+                return 0;
+            }
+
+            levels_[sign_ * price] = volume;
+            invalidate(sign_ * price);
+            notify(price, volume);
+            return volume;
+        }
+
+        void remove(std::int64_t price) {
+            auto it = levels_.find(sign_ * price);
+            if (it == levels_.end()) {
+                throw py::key_error(std::to_string(price));
+            }
+            erase(it, price);
+        }
+
+        void clear() {
+            // listeners see the book already empty
+            std::map<std::int64_t, std::int64_t> levels;
+            levels.swap(levels_);
+            depth_keys_.clear();
+            depth_volumes_.clear();
+            depth_notionals_.clear();
+            if (listeners_.size()) {
+                for (auto& level : levels) {
+                    notify(sign_ * level.first, 0);
+                }
+            }
+        }
+
+        void listen(py::object listener) { listeners_.append(listener); }
+
+        std::int64_t volume(std::int64_t price) const {
+            auto it = levels_.find(sign_ * price);
+            return it == levels_.end() ? 0 : it->second;
+        }
+
+        py::object best() const {
+            if (levels_.empty()) {
+                return py::none();
+            }
+            return py::int_(sign_ * levels_.rbegin()->first);
+        }
+
+        py::list top(std::int64_t n) const {
+            py::list ret;
+            for (auto it = levels_.rbegin(); it != levels_.rend() && n > 0; ++it, --n) {
+                ret.append(py::make_tuple(sign_ * it->first, it->second));
+            }
+            return ret;
+        }
+
+        std::int64_t depth(py::object n) {
+            std::int64_t count = n.is_none() ? static_cast<std::int64_t>(levels_.size()) : n.cast<std::int64_t>();
+            if (count <= 0) {
+                return 0;
+            }
+            std::size_t cached = extend(static_cast<std::size_t>(count));
+            return cached ? depth_volumes_[cached - 1] : 0;
+        }
+
+        // notional (price * volume) to fill size, or None if the book is too thin.
+        // Accumulated in floating point, ticks * lots can exceed 64 bits
+        py::object fill(std::int64_t size) {
+            // cached cumulative volume usually covers it already
+            std::size_t i = std::lower_bound(depth_volumes_.begin(), depth_volumes_.end(), size) - depth_volumes_.begin();
+            while (i == depth_volumes_.size()) {
+                if (extend(i + 16) == i) {
+                    return py::none();
+                }
+                i = std::lower_bound(depth_volumes_.begin() + i, depth_volumes_.end(), size) - depth_volumes_.begin();
+            }
+
+            std::int64_t volume = i ? depth_volumes_[i - 1] : 0;
+            long double notional = i ? depth_notionals_[i - 1] : 0;
+            notional += static_cast<long double>(size - volume) * sign_ * depth_keys_[i];
+            return py::float_(static_cast<double>(notional));
+        }
+
+        py::iterator iter() const {
+            return py::iter(top(static_cast<std::int64_t>(levels_.size())));
+        }
+
+        bool contains(std::int64_t price) const { return levels_.count(sign_ * price) > 0; }
+
+        std::size_t size() const { return levels_.size(); }
+
+    private:
+        void erase(std::map<std::int64_t, std::int64_t>::iterator it, std::int64_t price) {
+            levels_.erase(it);
+            invalidate(sign_ * price);
+            notify(price, 0);
+        }
+
+        void invalidate(std::int64_t key) {
+            // cached levels better than the changed one are still valid
+            while (!depth_keys_.empty() && depth_keys_.back() <= key) {
+                depth_keys_.pop_back();
+                depth_volumes_.pop_back();
+                depth_notionals_.pop_back();
+            }
+        }
+
+        // extend the cumulative cache to n levels (or all of them),
+        // returning the number of cached levels
+        std::size_t extend(std::size_t n) {
+            n = std::min(n, levels_.size());
+            std::size_t i = depth_keys_.size();
+            if (i >= n) {
+                return n;
+            }
+
+            std::int64_t volume = i ? depth_volumes_.back() : 0;
+            long double notional = i ? depth_notionals_.back() : 0;
+            // next level behind the deepest cached one
+            auto it = i ? std::make_reverse_iterator(levels_.find(depth_keys_.back())) : levels_.rbegin();
+            for (; i < n; ++i, ++it) {
+                volume += it->second;
+                notional += static_cast<long double>(it->second) * sign_ * it->first;
+                depth_keys_.push_back(it->first);
+                depth_volumes_.push_back(volume);
+                depth_notionals_.push_back(notional);
+            }
+            return n;
+        }
+
+        void notify(std::int64_t price, std::int64_t volume) {
+            if (listeners_.size()) {
+                for (auto listener : listeners_) {
+                    listener(side_, price, volume);
+                }
+            }
+        }
+
+        py::object side_;
+        std::int64_t sign_;
+        std::map<std::int64_t, std::int64_t> levels_;
+        py::list listeners_;
+
+        // cumulative depth from the best level, best first
+        std::vector<std::int64_t> depth_keys_;
+        std::vector<std::int64_t> depth_volumes_;
+        std::vector<long double> depth_notionals_;
+    };
+
+}  // namespace book
+}  // namespace aat
@@ -30,7 +30,7 @@ name = 'aat'
 
 
 requires = [
-    'aiohttp>=3.5.4',
+    'aiohttp>=3.5.4,<4',
     'aiostream>=0.3.1',
     'ccxt>=1.18.529',
     'cycler>=0.10.0',
@@ -155,6 +155,7 @@ setup(
     install_requires=requires,
     extras_require={
         'dev': requires_dev,
+        'fast': ['orjson>=3.0.0'],
     },
     python_requires='>=3.7',
     classifiers=[